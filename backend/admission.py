@@ -0,0 +1,78 @@
+import threading
+import time
+
+
+class AdmissionController:
+    """限制同时处理的请求数，已满时立即拒绝（由调用方返回 429），不排队等待
+
+    突发流量下排队只会让所有请求的延迟一起变长，直接拒绝可以让客户端按 Retry-After 重试，
+    已接受的请求保持正常延迟。max_in_flight 为 0 时不限制。
+    """
+
+    def __init__(self, max_in_flight, retry_after=1):
+        self.max_in_flight = max_in_flight
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """占用一个名额，已满时返回 False"""
+        with self._lock:
+            if self.max_in_flight and self.in_flight >= self.max_in_flight:
+                self.rejected += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+
+class Deadline:
+    """请求的截止时间（perf_counter 时间），budget_seconds 为 None 时没有截止时间"""
+
+    def __init__(self, start, budget_seconds=None):
+        self.expires = start + budget_seconds if budget_seconds is not None else None
+
+    def remaining(self):
+        """剩余秒数，没有截止时间时返回 None"""
+        return self.expires - time.perf_counter() if self.expires is not None else None
+
+    def allows(self, cost_seconds):
+        """剩余时间是否足够完成一个耗时约 cost_seconds 的步骤"""
+        return self.expires is None or time.perf_counter() + cost_seconds <= self.expires
+
+
+class CostEstimator:
+    """按键（如模型名）记录某个步骤耗时的指数加权平均，用来判断剩余时间是否足够执行该步骤
+
+    步骤执行后用 observe() 更新；没有记录时估计为 0，即只要还没到截止时间就执行一次。
+    因估计值过大而跳过步骤时调用 skipped()，估计值按 skip_decay 衰减：一次偶然的慢请求
+    （如 GC 停顿）不会让之后的请求永远跳过该步骤，衰减到预算以内后会再执行一次并用实际耗时更新。
+    """
+
+    def __init__(self, alpha=0.2, skip_decay=0.9):
+        self.alpha = alpha
+        self.skip_decay = skip_decay
+        self._estimates = {}
+        self._lock = threading.Lock()
+
+    def observe(self, key, seconds):
+        with self._lock:
+            previous = self._estimates.get(key)
+            self._estimates[key] = seconds if previous is None else previous + self.alpha * (seconds - previous)
+
+    def skipped(self, key):
+        """步骤因估计值过大被跳过，衰减估计值"""
+        with self._lock:
+            if key in self._estimates:
+                self._estimates[key] *= self.skip_decay
+
+    def estimate(self, key):
+        return self._estimates.get(key, 0.0)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._estimates)
@@ -1,69 +1,716 @@
-from flask import Flask, request, jsonify
-import lightgbm as lgb
+import time
+# 启动耗时从导入依赖开始计算
+startup_started = time.perf_counter()
+from flask import Flask, Response, request, jsonify, g, send_file
 import numpy as np
-import pickle
+import math
 import os
-import json
-import shap
+import shutil
+import tempfile
+import threading
+from metrics import MetricsRegistry, BATCH_SIZE_BUCKETS
+from model_bundle import ModelBundle, ModelWatcher
+from prediction_cache import PredictionCache
+from batch_formats import BatchFormatError, parse_batch, parse_row, encode_predictions
+from static_artifacts import ArtifactStore
+from explanations import top_k_contributions
+from tree_engine import binary_model_path
+from conformal import conformal_path
+from feature_pipeline import pipeline_path
+from admission import AdmissionController, CostEstimator, Deadline
+from bulk_jobs import BulkJobManager, JobError
+from simulation import DEFAULT_QUANTILES, FeatureMarginals, simulate, summarize
 
 app = Flask(__name__)
 # 暂时注释CORS，后续安装依赖后再启用
 from flask_cors import CORS
 CORS(app)  # 启用CORS支持
 
+# lightgbm/catboost/shap 在加载模型时才导入，不计入此项
+import_seconds = time.perf_counter() - startup_started
+
 base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 # 加载模型和特征列
 model_path = os.path.join(base_path, 'models', 'lightgbm_model.txt')
 feature_columns_path = os.path.join(base_path, 'models', 'feature_columns.pkl')
+# 特征流水线（派生特征），由特征工程保存；不存在时模型直接使用原始特征
+feature_pipeline_path = pipeline_path(os.path.join(base_path, 'models'))
+
+# 可服务的模型：模型名 -> (类型, 文件)；除默认模型外，文件不存在的模型在加载时跳过
+model_files = {
+    'lightgbm': ('lightgbm', model_path),
+    'lightgbm_optimized': ('lightgbm', os.path.join(base_path, 'models', 'lightgbm_model_optimized.txt')),
+    'catboost': ('catboost', os.path.join(base_path, 'models', 'catboost_model.cbm')),
+}
+# 启用的模型（逗号分隔），默认全部
+served_models = os.environ.get('SERVED_MODELS', ','.join(model_files)).split(',')
+# 请求未指定 model 参数时使用的模型
+default_model = os.environ.get('DEFAULT_MODEL', 'lightgbm')
+# 集成模式权重，如 "lightgbm:0.5,catboost:0.5"；未设置时对已加载的模型等权平均
+ensemble_weights = {name: float(weight) for name, weight in
+                    (item.split(':') for item in os.environ['ENSEMBLE_WEIGHTS'].split(','))} \
+    if os.environ.get('ENSEMBLE_WEIGHTS') else None
 
 # API数据路径
 api_data_dir = os.path.join(base_path, 'api_data')
 
-# 全局变量存储模型和特征列
-model = None
-feature_columns = None
-explainer = None
+# API数据文件在内存中缓存，文件修改后自动重新加载
+artifact_store = ArtifactStore(api_data_dir)
+
+# 推理引擎：lightgbm（默认，使用 Booster）、numpy（向量化树遍历）
+# 或 mmap（与 numpy 相同，但从训练时导出的 .bin 二进制模型映射加载，多个 worker 共享内存页）
+predict_engine = os.environ.get('PREDICT_ENGINE', 'lightgbm')
+
+# 微批处理：合并时间窗口内并发到达的 /predict 请求，窗口为 0 时关闭
+micro_batch_window_ms = float(os.environ.get('MICRO_BATCH_WINDOW_MS', 0))
+micro_batch_max_size = int(os.environ.get('MICRO_BATCH_MAX_SIZE', 64))
+
+# 预测缓存容量（条目数），为 0 时关闭
+prediction_cache_size = int(os.environ.get('PREDICTION_CACHE_SIZE', 10000))
+
+# SHAP 解释后端：native（默认，LightGBM pred_contrib）或 shap（shap.TreeExplainer）
+explainer_backend = os.environ.get('EXPLAINER_BACKEND', 'native')
+
+# /explain/batch 单次请求的最大行数
+explain_batch_max_rows = int(os.environ.get('EXPLAIN_BATCH_MAX_ROWS', 10000))
+
+# 批量评分任务：任务目录（多个 worker 需共享同一目录）、执行任务的线程数、每次读取和预测的行数
+bulk_job_dir = os.environ.get('BULK_JOB_DIR', os.path.join(tempfile.gettempdir(), 'flood_bulk_jobs'))
+bulk_job_workers = int(os.environ.get('BULK_JOB_WORKERS', 1))
+bulk_job_chunk_rows = int(os.environ.get('BULK_JOB_CHUNK_ROWS', 100000))
+# 已结束的批量评分任务保留的秒数，超过后删除任务目录（默认 1 天，为 0 时不删除）
+bulk_job_ttl = float(os.environ.get('BULK_JOB_TTL', 86400))
+
+# /predict/sweep 每个变化特征的默认取值点数和最大取值点数
+sweep_default_steps = int(os.environ.get('SWEEP_DEFAULT_STEPS', 20))
+sweep_max_steps = int(os.environ.get('SWEEP_MAX_STEPS', 100))
+
+# /simulate 的默认样本数、最大样本数、直方图最大分箱数，以及每次抽样和预测的行数
+simulate_default_samples = int(os.environ.get('SIMULATE_DEFAULT_SAMPLES', 100000))
+simulate_max_samples = int(os.environ.get('SIMULATE_MAX_SAMPLES', 1000000))
+simulate_max_bins = int(os.environ.get('SIMULATE_MAX_BINS', 200))
+simulate_chunk_rows = int(os.environ.get('SIMULATE_CHUNK_ROWS', 65536))
+
+# 启动模式：
+#   eager（默认）：启动时加载模型、创建解释器并预热，完成后才开始服务
+#   background：立即开始服务，模型在后台线程中加载并预热，此前到达的预测请求等待加载完成
+#   lazy：首个预测请求到达时才加载模型，SHAP 解释器在首次需要解释时才创建
+startup_mode = os.environ.get('STARTUP_MODE', 'eager')
+lazy_explainer = startup_mode == 'lazy'
+
+# 模型文件检查间隔（秒），文件变化时自动热更新，为 0 时关闭
+model_watch_interval = float(os.environ.get('MODEL_WATCH_INTERVAL', 5))
+
+# 准入控制：同时处理的模型计算请求（/predict、/predict/batch、/explain/batch、/predict/sweep、/simulate）上限，
+# 已满时立即返回 429 并在 Retry-After 中给出建议的重试秒数；为 0（默认）时不限制
+max_in_flight = int(os.environ.get('MAX_IN_FLIGHT', 0))
+admission_retry_after = int(os.environ.get('ADMISSION_RETRY_AFTER', 1))
+admission_routes = {'/predict', '/predict/batch', '/explain/batch', '/predict/sweep', '/simulate'}
+
+# /predict 的默认截止时间（毫秒，从收到请求开始计算），请求头 X-Request-Deadline-Ms 可单独指定；为 0 时没有截止时间。
+# 剩余时间不足以完成 SHAP 计算时跳过解释，只返回预测值并标记 explanation_dropped
+request_deadline_ms = float(os.environ.get('REQUEST_DEADLINE_MS', 0))
+
+# 管理接口令牌，设置后 /admin/reload 需要在 X-Admin-Token 请求头中携带
+admin_token = os.environ.get('ADMIN_TOKEN')
+
+# 监控指标，以 Prometheus 文本格式从 /metrics 输出（多进程部署时每个 worker 单独统计）
+metrics = MetricsRegistry()
+request_count = metrics.counter('flood_api_requests_total', 'Total HTTP requests.', ('route', 'method', 'status'))
+error_count = metrics.counter('flood_api_errors_total', 'HTTP requests that returned a 4xx/5xx status.', ('route', 'status'))
+request_latency = metrics.histogram('flood_api_request_duration_seconds', 'End-to-end request latency in seconds.',
+                                    labelnames=('route',))
+stage_latency = metrics.histogram('flood_api_stage_duration_seconds', 'Latency of each request processing stage in seconds.',
+                                  labelnames=('route', 'stage'))
+batch_size = metrics.histogram('flood_api_batch_size', 'Rows per batch prediction.', BATCH_SIZE_BUCKETS, ('source',))
+model_predict_latency = metrics.histogram('flood_model_predict_duration_seconds', 'Model predict call latency in seconds.',
+                                          labelnames=('model',))
+model_memory_gauge = metrics.gauge('flood_model_memory_bytes', 'Approximate resident memory added by loading each model.', ('model',))
+model_load_gauge = metrics.gauge('flood_model_load_seconds', 'Time spent loading each model.', ('model',))
+model_reload_count = metrics.counter('flood_model_reloads_total', 'Model hot reload attempts.', ('result',))
+model_info_gauge = metrics.gauge('flood_model_info', 'Currently served model version.', ('version', 'engine'))
+cache_entries_gauge = metrics.gauge('flood_prediction_cache_entries', 'Entries in the /predict cache.')
+startup_gauge = metrics.gauge('flood_startup_seconds', 'Startup time breakdown by phase.', ('phase',))
+cache_lookups_gauge = metrics.gauge('flood_prediction_cache_lookups', 'Prediction cache lookups since the last model change.', ('result',))
+rejected_count = metrics.counter('flood_api_rejected_total', 'Requests rejected with 429 because the in-flight limit was reached.', ('route',))
+in_flight_gauge = metrics.gauge('flood_api_in_flight_requests', 'Admission-controlled requests currently being processed.')
+explanations_dropped = metrics.counter('flood_api_explanations_dropped_total',
+                                       'Explanations skipped because the request deadline was too close.', ('route', 'model'))
+bulk_job_rows = metrics.counter('flood_bulk_job_rows_total', 'Rows scored by bulk scoring jobs.')
+bulk_job_count = metrics.counter('flood_bulk_jobs_total', 'Finished bulk scoring jobs by status.', ('status',))
+shap_cost_gauge = metrics.gauge('flood_shap_cost_estimate_seconds', 'Moving average of single-row SHAP latency per model.', ('model',))
+
+# 各阶段的直方图序列预先取得，请求中只需一次 perf_counter 和一次 observe
+predict_stages = {stage: stage_latency.labels('/predict', stage) for stage in
+                  ('parse', 'validate', 'convert', 'cache', 'predict', 'shap', 'micro_batch', 'intervals', 'build',
+                   'serialize')}
+batch_stages = {stage: stage_latency.labels('/predict/batch', stage) for stage in
+                ('read', 'parse', 'predict', 'intervals', 'encode', 'serialize')}
+explain_stages = {stage: stage_latency.labels('/explain/batch', stage) for stage in
+                  ('read', 'parse', 'predict', 'shap', 'top_k', 'serialize')}
+batch_size_requests = batch_size.labels('/predict/batch')
+sweep_stages = {stage: stage_latency.labels('/predict/sweep', stage) for stage in
+                ('parse', 'validate', 'grid', 'predict', 'build', 'serialize')}
+batch_size_explain = batch_size.labels('/explain/batch')
+batch_size_sweep = batch_size.labels('/predict/sweep')
+simulate_stages = {stage: stage_latency.labels('/simulate', stage) for stage in
+                   ('parse', 'validate', 'simulate', 'aggregate', 'serialize')}
+batch_size_simulate = batch_size.labels('/simulate')
+batch_size_micro = batch_size.labels('micro_batch')
+
+def record_stage(series, start):
+    """记录从 start 到现在的耗时，返回当前时间作为下一阶段的起点"""
+    now = time.perf_counter()
+    series.observe(now - start)
+    return now
+
+def record_request(route, method, status, elapsed):
+    """记录一次请求的路由、状态码和总耗时（Flask 与 ASGI 前端共用）"""
+    request_latency.labels(route).observe(elapsed)
+    request_count.labels(route, method, str(status)).inc()
+    if status >= 400:
+        error_count.labels(route, str(status)).inc()
+
+def record_model_predict(name, elapsed):
+    """记录单个模型一次 predict 调用的耗时"""
+    model_predict_latency.labels(name).observe(elapsed)
+
+def render_metrics():
+    """更新抓取时才计算的指标，返回 Prometheus 文本"""
+    current = bundle
+    model_info_gauge.clear()
+    model_memory_gauge.clear()
+    model_load_gauge.clear()
+    if current is not None:
+        model_info_gauge.labels(current.version, predict_engine).set(1)
+        for name, served in current.models.items():
+            model_load_gauge.labels(name).set(served.load_seconds)
+            if served.memory_bytes is not None:
+                model_memory_gauge.labels(name).set(served.memory_bytes)
+    for phase, seconds in startup_profile.items():
+        if seconds is not None:
+            startup_gauge.labels(phase).set(seconds)
+    in_flight_gauge.labels().set(admission.in_flight)
+    for name, seconds in shap_cost.snapshot().items():
+        shap_cost_gauge.labels(name).set(seconds)
+    if prediction_cache is not None:
+        stats = prediction_cache.stats()
+        cache_entries_gauge.labels().set(stats['size'])
+        cache_lookups_gauge.labels('hit').set(stats['hits'])
+        cache_lookups_gauge.labels('miss').set(stats['misses'])
+    return metrics.render()
+
+# 当前使用的模型（ModelBundle），热更新时整体替换；请求开始时取一次引用
+bundle = None
+prediction_cache = PredictionCache(prediction_cache_size) if prediction_cache_size > 0 else None
+reload_lock = threading.Lock()
+# 启动耗时分解（秒）：依赖导入、模型库导入、模型解析、解释器初始化、首次预测，以及从启动到可以预测的总耗时
+startup_profile = {"imports": import_seconds}
+background_loader_pid = None
+admission = AdmissionController(max_in_flight, admission_retry_after)
+# 各模型单行 SHAP 计算耗时的估计，用于判断剩余时间是否足够
+shap_cost = CostEstimator()
+
+def load_bundle():
+    """按当前配置加载模型、特征列、特征流水线和 SHAP 解释器"""
+    files = {name: model_files[name] for name in served_models if name in model_files}
+    return ModelBundle.load(files, feature_columns_path, default_model, predict_engine, explainer_backend,
+                            ensemble_weights, micro_batch_window_ms, micro_batch_max_size,
+                            batch_size_micro.observe, record_model_predict, lazy_explainer,
+                            feature_pipeline_path)
+
+def install_bundle(new_bundle):
+    """原子替换当前模型，并清空旧模型的预测缓存"""
+    global bundle
+    bundle = new_bundle
+    if prediction_cache is not None:
+        prediction_cache.reset(new_bundle.version)
 
 # 初始化函数，加载模型和特征列
-def init_model():
-    """初始化模型和特征列"""
-    global model, feature_columns
-    
+def init_model(warm_up=True):
+    """初始化模型和特征列，预热后记录启动耗时分解
+
+    pre-fork 主进程中传入 warm_up=False：LightGBM 的 OpenMP 线程池在 fork 之后不可用，主进程不能执行预测。
+    """
     try:
-        # 加载模型
-        model = lgb.Booster(model_file=model_path)
-        print(f"模型加载成功: {model_path}")
-        
-        # 加载特征列
-        with open(feature_columns_path, 'rb') as f:
-            feature_columns = pickle.load(f)
-        print(f"特征列加载成功: {feature_columns}")
-        
-        # 初始化 SHAP 解释器
-        global explainer
-        explainer = shap.TreeExplainer(model)
-        print("SHAP 解释器初始化成功")
-        
-        return True
+        new_bundle = load_bundle()
+        start = time.perf_counter()
+        if warm_up:
+            new_bundle.warm_up(explain=not lazy_explainer)
+        install_bundle(new_bundle)
     except Exception as e:
         print(f"模型加载失败: {str(e)}")
         return False
+    startup_profile.update(new_bundle.startup_profile())
+    startup_profile["first_predict"] = time.perf_counter() - start if warm_up else None
+    startup_profile["ready"] = time.perf_counter() - startup_started
+    print("启动耗时: " + ", ".join(f"{phase} {seconds:.3f}s" for phase, seconds in startup_profile.items()
+                                 if seconds is not None))
+    return True
+
+def ensure_model():
+    """返回当前模型；延迟启动时首次调用会加载模型，后台加载进行中则等待其完成"""
+    current = bundle
+    if current is None:
+        with reload_lock:
+            if bundle is None and not init_model():
+                raise RuntimeError("Failed to initialize model")
+        current = bundle
+    return current
+
+# 热更新：在后台构建并预热新模型，完成后原子替换
+def reload_model():
+    """重新加载模型，返回新的模型版本号；失败时抛出异常并保留当前模型"""
+    with reload_lock:
+        try:
+            new_bundle = load_bundle()
+            new_bundle.warm_up(explain=not lazy_explainer)
+        except Exception:
+            model_reload_count.labels('failure').inc()
+            raise
+        model_reload_count.labels('success').inc()
+        old_bundle = bundle
+        install_bundle(new_bundle)
+        if old_bundle is not None:
+            old_bundle.close()
+        print(f"模型热更新完成: {new_bundle.version}")
+        return new_bundle.version
+
+watched_files = [path for _, path in model_files.values()] + [feature_columns_path, feature_pipeline_path]
+watched_files += [conformal_path(path) for _, path in model_files.values()]
+if predict_engine == 'mmap':
+    watched_files += [binary_model_path(path) for kind, path in model_files.values() if kind == 'lightgbm']
+model_watcher = ModelWatcher(watched_files,
+                             model_watch_interval, reload_model)
+
+def start_model_watcher():
+    """启动模型文件监控线程（每个进程一个）"""
+    if model_watch_interval > 0:
+        model_watcher.start()
+
+def load_in_background():
+    try:
+        ensure_model()
+    except RuntimeError:
+        pass
+
+def start_background_tasks():
+    """启动模型文件监控；background 模式下同时在后台线程中加载并预热模型（每个进程一次）
+
+    同时清理批量评分任务：执行进程已退出的未完成任务标记为 failed，删除过期的任务目录。
+    """
+    global background_loader_pid
+    start_model_watcher()
+    bulk_jobs.cleanup()
+    if startup_mode == 'background' and bundle is None and background_loader_pid != os.getpid():
+        background_loader_pid = os.getpid()
+        threading.Thread(target=load_in_background, name='model-loader', daemon=True).start()
+
+def unknown_model_error(current, name):
+    return {"error": f"Unknown model '{name}', available: {current.available_models()}"}, 400
+
+def overloaded_error():
+    """准入名额已满时的响应：(响应体, 状态码, 响应头)"""
+    return ({"error": "Server is busy, retry later"}, 429, {"Retry-After": str(admission.retry_after)})
+
+def parse_coverage(value):
+    """解析覆盖率参数：数字、数字列表或逗号分隔的字符串，返回 (用作响应键的字符串列表, 数值列表)"""
+    if isinstance(value, str):
+        value = value.split(',')
+    elif not isinstance(value, list):
+        value = [value]
+    try:
+        levels = [float(v) for v in value if not isinstance(v, bool)]
+    except (TypeError, ValueError):
+        levels = []
+    if not levels or len(levels) != len(value):
+        raise ValueError("Invalid coverage, expected a number or a list of numbers such as 0.9")
+    return [f"{level:g}" for level in levels], levels
+
+def interval_levels(current, coverage, model_name):
+    """校验覆盖率参数，返回 (响应键, 查表下标)；未请求区间时返回 None，参数无效时抛出 ValueError"""
+    if coverage is None:
+        return None
+    keys, levels = parse_coverage(coverage)
+    return keys, current.interval_levels(levels, model_name)
+
+def request_deadline(header_value, start):
+    """根据 X-Request-Deadline-Ms 请求头（未提供时使用 REQUEST_DEADLINE_MS）创建截止时间，请求头无效时抛出 ValueError"""
+    budget_ms = request_deadline_ms
+    if header_value is not None:
+        try:
+            budget_ms = float(header_value)
+        except ValueError:
+            budget_ms = float('nan')
+        if not budget_ms > 0:
+            raise ValueError("Invalid X-Request-Deadline-Ms header, expected a positive number of milliseconds")
+    return Deadline(start, budget_ms / 1000 if budget_ms > 0 else None)
+
+# 单样本预测（与 Web 框架无关，Flask 与 ASGI 前端共用）
+def run_predict(data, start=None, deadline=None):
+    """校验请求数据并预测，返回 (响应体, 状态码)
+
+    start 为上一阶段结束时的 perf_counter 值，各阶段耗时记录到 /metrics。
+    deadline 为请求的截止时间，剩余时间不足以完成 SHAP 计算时跳过解释。
+    """
+    current = ensure_model()
+    t = start if start is not None else time.perf_counter()
+    if deadline is None:
+        deadline = request_deadline(None, t)
+    feature_columns = current.feature_columns
+    
+    # 验证数据格式
+    if not isinstance(data, dict) or 'features' not in data:
+        return {"error": "Invalid request format, 'features' key is required"}, 400
+    
+    # 提取特征数据
+    features = data['features']
+    
+    # 是否计算 SHAP 值（默认计算），只接受 JSON 布尔值
+    explain = data.get('explain', True)
+    if not isinstance(explain, bool):
+        return {"error": "'explain' must be a boolean"}, 400
+    
+    # 使用的模型（默认模型、指定模型或 ensemble）
+    model_name = current.resolve(data.get('model'))
+    if model_name is None:
+        return unknown_model_error(current, data.get('model'))
+    
+    # 预测区间的覆盖率（可选）
+    try:
+        levels = interval_levels(current, data.get('coverage'), model_name)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    
+    t = record_stage(predict_stages['validate'], t)
+    
+    # 转换为numpy数组，与批量请求使用同一校验（特征数量、数值类型）
+    try:
+        features_array = parse_row(features, len(feature_columns))
+    except BatchFormatError as e:
+        return {"error": str(e)}, e.status_code
+    t = record_stage(predict_stages['convert'], t)
+    
+    # 查询预测缓存
+    cache_key = (model_name,) + tuple(features_array[0].tolist())
+    cached = prediction_cache.get(cache_key, explain) if prediction_cache is not None else None
+    t = record_stage(predict_stages['cache'], t)
+    
+    explanation_dropped = False
+    if cached is not None:
+        prediction, shap_row = cached
+    else:
+        # 剩余时间不足以完成 SHAP 计算时只预测（估计值见 shap_cost）
+        explain_now = explain and deadline.allows(shap_cost.estimate(model_name))
+        if current.batcher is not None:
+            # 启用微批处理时与并发请求合并执行（按模型和是否计算 SHAP 分组），SHAP 耗时估计为等待合并批次结果的时间；
+            # 解释器首次创建的耗时不计入估计
+            if explain_now:
+                current.init_explainers(model_name)
+            batch_start = time.perf_counter()
+            prediction, shap_row = current.batcher.submit(features_array[0], (model_name, explain_now)).result()
+            t = record_stage(predict_stages['micro_batch'], t)
+            if explain_now:
+                shap_cost.observe(model_name, t - batch_start)
+        else:
+            prediction, shap_row = current.predict(features_array, model_name)[0], None
+            t = record_stage(predict_stages['predict'], t)
+            if explain_now:
+                current.init_explainers(model_name)
+                shap_start = time.perf_counter()
+                shap_row = current.explain(features_array, model_name)[0]
+                t = record_stage(predict_stages['shap'], t)
+                shap_cost.observe(model_name, t - shap_start)
+        if explain and not explain_now:
+            # 临近截止时间：跳过 SHAP，只返回预测值；估计值随之衰减，之后会再尝试计算
+            explanation_dropped = True
+            explanations_dropped.labels('/predict', model_name).inc()
+            shap_cost.skipped(model_name)
+    
+    if cached is None and prediction_cache is not None:
+        prediction_cache.put(cache_key, prediction, shap_row, current.version)
+        
+    # 构建响应
+    response = {
+        "prediction": float(prediction),
+        "model": model_name,
+        "features": dict(zip(feature_columns, features)),
+        "message": "Prediction completed successfully"
+    }
+    if levels is not None:
+        keys, indices = levels
+        lower, upper = current.intervals(np.array([prediction]), indices, model_name)
+        response["intervals"] = {key: {"lower": float(lower[0, i]), "upper": float(upper[0, i])}
+                                 for i, key in enumerate(keys)}
+        t = record_stage(predict_stages['intervals'], t)
+    if explain:
+        response["explanation_dropped"] = explanation_dropped
+    if explain and not explanation_dropped:
+        response["shap_values"] = dict(zip(current.model_columns, shap_row.tolist()))
+        response["base_value"] = float(current.expected_value(model_name))
+    record_stage(predict_stages['build'], t)
+    
+    return response, 200
+
+# 批量预测（与 Web 框架无关，Flask 与 ASGI 前端共用）
+def run_batch_predict(mimetype, body, model_name=None, start=None, coverage=None):
+    """解析并整体校验批量请求体后预测，返回 (响应体, 响应格式, 状态码)
+
+    coverage 为逗号分隔的覆盖率（可选），指定时同时返回对应的预测区间。
+    """
+    current = ensure_model()
+    t = start if start is not None else time.perf_counter()
+    resolved = current.resolve(model_name)
+    if resolved is None:
+        error, status = unknown_model_error(current, model_name)
+        return error, 'application/json', status
+    try:
+        levels = interval_levels(current, coverage, resolved)
+    except ValueError as e:
+        return {"error": str(e)}, 'application/json', 400
+    try:
+        features_array, response_format = parse_batch(mimetype, body, current.feature_columns)
+    except BatchFormatError as e:
+        return {"error": str(e)}, 'application/json', e.status_code
+    t = record_stage(batch_stages['parse'], t)
+    batch_size_requests.observe(len(features_array))
+    
+    # 进行批量预测（集成模式下每个模型对整批数据只预测一次）
+    predictions = current.predict(features_array, resolved)
+    t = record_stage(batch_stages['predict'], t)
+    intervals = None
+    if levels is not None:
+        keys, indices = levels
+        lower, upper = current.intervals(predictions, indices, resolved)
+        intervals = [(key, lower[:, i], upper[:, i]) for i, key in enumerate(keys)]
+        t = record_stage(batch_stages['intervals'], t)
+    response = encode_predictions(predictions, response_format, intervals)
+    if isinstance(response, dict):
+        response["model"] = resolved
+    record_stage(batch_stages['encode'], t)
+    return response, response_format, 200
+
+# 记录每个请求的耗时和状态码
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+# 准入控制：模型计算接口的名额已满时直接返回 429
+@app.before_request
+def admit_request():
+    if request.url_rule is not None and request.url_rule.rule in admission_routes:
+        # 先读完请求体（缓存在 request 中）再占用名额，慢速上传不会长时间占用名额
+        request.get_data()
+        if not admission.try_acquire():
+            rejected_count.labels(request.url_rule.rule).inc()
+            body, status, headers = overloaded_error()
+            return jsonify(body), status, headers
+        g.admitted = True
+
+@app.teardown_request
+def release_admission(exc):
+    if g.pop('admitted', False):
+        admission.release()
+
+@app.after_request
+def record_request_metrics(response):
+    start = g.get('request_start')
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        record_request(route, request.method, response.status_code, time.perf_counter() - start)
+    return response
+
+# 批量解释（与 Web 框架无关，Flask 与 ASGI 前端共用）
+def run_explain_batch(mimetype, body, top_k=None, model_name=None, start=None):
+    """对整批样本一次性计算 SHAP 值，返回 (响应体, 状态码)
+
+    响应为紧凑的数组布局：特征名只返回一次，每行的贡献值按 feature_names 顺序排列；
+    指定 top_k 时每行只返回按 |贡献| 降序的前 k 个特征序号和贡献值。
+    """
+    current = ensure_model()
+    t = start if start is not None else time.perf_counter()
+    resolved = current.resolve(model_name)
+    if resolved is None:
+        return unknown_model_error(current, model_name)
+    try:
+        features_array, _ = parse_batch(mimetype, body, current.feature_columns)
+    except BatchFormatError as e:
+        return {"error": str(e)}, e.status_code
+    n_features = len(current.model_columns)
+    if top_k is not None and not 1 <= top_k <= n_features:
+        return {"error": f"Invalid top_k {top_k}, expected 1 to {n_features}"}, 400
+    if len(features_array) > explain_batch_max_rows:
+        return {"error": f"Too many rows: {len(features_array)}, at most {explain_batch_max_rows} per request"}, 413
+    t = record_stage(explain_stages['parse'], t)
+    batch_size_explain.observe(len(features_array))
+
+    predictions = current.predict(features_array, resolved)
+    t = record_stage(explain_stages['predict'], t)
+    shap_values = current.explain(features_array, resolved)
+    t = record_stage(explain_stages['shap'], t)
+
+    response = {
+        "model": resolved,
+        "feature_names": list(current.model_columns),
+        "base_value": float(current.expected_value(resolved)),
+        "predictions": predictions.tolist(),
+    }
+    if top_k is None:
+        response["shap_values"] = shap_values.tolist()
+    else:
+        indices, values = top_k_contributions(shap_values, top_k)
+        response["top_k"] = top_k
+        response["indices"] = indices.tolist()
+        response["values"] = values.tolist()
+    record_stage(explain_stages['top_k'], t)
+    return response, 200
+
+# 敏感性扫描（与 Web 框架无关，Flask 与 ASGI 前端共用）
+def sweep_values(stats, steps):
+    """在特征的 [min, max] 范围内均匀取 steps 个点，整数特征取整并去重"""
+    values = np.linspace(stats['min'], stats['max'], steps)
+    if float(stats['min']).is_integer() and float(stats['max']).is_integer():
+        values = np.unique(np.round(values))
+    return values
+
+def run_sweep(data, start=None):
+    """以 features 为基准，让 vary 中的一个或两个特征在 stats.json 的取值范围内变化，
+    整个网格（外加基准样本）一次 predict 完成，返回 (响应体, 状态码)
+
+    一个特征时 predictions 为曲线（长度为取值点数），两个特征时为曲面，
+    predictions[i][j] 对应第一个特征的第 i 个取值和第二个特征的第 j 个取值。
+    """
+    current = ensure_model()
+    t = start if start is not None else time.perf_counter()
+    feature_columns = list(current.feature_columns)
+
+    if not isinstance(data, dict) or 'features' not in data or 'vary' not in data:
+        return {"error": "Invalid request format, 'features' and 'vary' keys are required"}, 400
+    try:
+        base = parse_row(data['features'], len(feature_columns))[0]
+    except BatchFormatError as e:
+        return {"error": str(e)}, e.status_code
+    vary = data['vary']
+    if isinstance(vary, str):
+        vary = [vary]
+    if (not isinstance(vary, list) or not 1 <= len(vary) <= 2 or not all(isinstance(name, str) for name in vary)
+            or len(set(vary)) != len(vary)):
+        return {"error": "'vary' must name one or two distinct features"}, 400
+    unknown = [name for name in vary if name not in feature_columns]
+    if unknown:
+        return {"error": f"Unknown features in 'vary': {unknown}"}, 400
+    steps = data.get('steps', sweep_default_steps)
+    if not isinstance(steps, int) or isinstance(steps, bool) or not 2 <= steps <= sweep_max_steps:
+        return {"error": f"Invalid steps {steps!r}, expected an integer from 2 to {sweep_max_steps}"}, 400
+    model_name = current.resolve(data.get('model'))
+    if model_name is None:
+        return unknown_model_error(current, data.get('model'))
+    feature_stats = artifact_store.load('stats.json')['feature_stats']
+    t = record_stage(sweep_stages['validate'], t)
+
+    # 网格按 C 顺序展开（第一个特征变化最慢），最后一行为基准样本
+    axes = [sweep_values(feature_stats[name], steps) for name in vary]
+    shape = tuple(len(values) for values in axes)
+    grid = np.empty((int(np.prod(shape)) + 1, len(feature_columns)))
+    grid[:] = base
+    for name, values in zip(vary, np.meshgrid(*axes, indexing='ij')):
+        grid[:-1, feature_columns.index(name)] = values.ravel()
+    t = record_stage(sweep_stages['grid'], t)
+    batch_size_sweep.observe(len(grid))
+
+    predictions = current.predict(grid, model_name)
+    t = record_stage(sweep_stages['predict'], t)
+
+    response = {
+        "model": model_name,
+        "axes": [{"feature": name, "values": values.tolist()} for name, values in zip(vary, axes)],
+        "predictions": predictions[:-1].reshape(shape).tolist(),
+        "base_prediction": float(predictions[-1]),
+        "points": len(grid) - 1,
+    }
+    record_stage(sweep_stages['build'], t)
+    return response, 200
+
+# 蒙特卡洛模拟（与 Web 框架无关，Flask 与 ASGI 前端共用）
+def is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def run_simulate(data, start=None):
+    """以 features 为基准，perturb 中的特征按训练集边际分布独立抽样，返回预测值分布的分位数和直方图，
+    返回 (响应体, 状态码)"""
+    current = ensure_model()
+    t = start if start is not None else time.perf_counter()
+    feature_columns = list(current.feature_columns)
+
+    if not isinstance(data, dict) or 'features' not in data or 'perturb' not in data:
+        return {"error": "Invalid request format, 'features' and 'perturb' keys are required"}, 400
+    features = data['features']
+    if not isinstance(features, list) or len(features) != len(feature_columns):
+        length = len(features) if isinstance(features, list) else 1
+        return {"error": f"Invalid number of features. Expected {len(feature_columns)}, got {length}"}, 400
+    if not all(isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+               for value in features):
+        return {"error": "Invalid feature values, all features must be finite numbers"}, 400
+    perturb = data['perturb']
+    if isinstance(perturb, str):
+        perturb = [perturb]
+    if (not isinstance(perturb, list) or not perturb or not all(isinstance(name, str) for name in perturb)
+            or len(set(perturb)) != len(perturb)):
+        return {"error": "'perturb' must name one or more distinct features"}, 400
+    unknown = [name for name in perturb if name not in feature_columns]
+    if unknown:
+        return {"error": f"Unknown features in 'perturb': {unknown}"}, 400
+    samples = data.get('samples', simulate_default_samples)
+    if not is_int(samples) or not 1 <= samples <= simulate_max_samples:
+        return {"error": f"Invalid samples {samples!r}, expected an integer from 1 to {simulate_max_samples}"}, 400
+    bins = data.get('bins', 20)
+    if not is_int(bins) or not 1 <= bins <= simulate_max_bins:
+        return {"error": f"Invalid bins {bins!r}, expected an integer from 1 to {simulate_max_bins}"}, 400
+    quantiles = data.get('quantiles', list(DEFAULT_QUANTILES))
+    if (not isinstance(quantiles, list) or not quantiles
+            or not all(isinstance(q, (int, float)) and not isinstance(q, bool) and 0 <= q <= 1 for q in quantiles)):
+        return {"error": "Invalid quantiles, expected a list of values in [0, 1]"}, 400
+    seed = data.get('seed')
+    if seed is not None and (not is_int(seed) or seed < 0):
+        return {"error": f"Invalid seed {seed!r}, expected a non-negative integer"}, 400
+    model_name = current.resolve(data.get('model'))
+    if model_name is None:
+        return unknown_model_error(current, data.get('model'))
+    try:
+        marginals = FeatureMarginals({name: artifact_store.load('feature_marginals.json')[name] for name in perturb})
+    except (OSError, KeyError):
+        return {"error": "Feature marginals not available, run scripts/generate_api_data.py"}, 503
+    t = record_stage(simulate_stages['validate'], t)
+
+    predictions, scored_rows = simulate(lambda rows: current.predict(rows, model_name),
+                                        np.array(features, dtype=np.float64), feature_columns, marginals, perturb,
+                                        samples, np.random.default_rng(seed), simulate_chunk_rows)
+    t = record_stage(simulate_stages['simulate'], t)
+    batch_size_simulate.observe(scored_rows)
+
+    response = {
+        "model": model_name,
+        "perturb": perturb,
+        "samples": samples,
+        "scored_rows": scored_rows,
+        **summarize(predictions, quantiles, bins),
+    }
+    record_stage(simulate_stages['aggregate'], t)
+    return response, 200
 
 # 健康检查接口
 @app.route('/health', methods=['GET'])
 def health_check():
     """健康检查接口"""
-    return jsonify({"status": "ok", "message": "Flood Prediction API is running"})
+    return jsonify({"status": "ok", "message": "Flood Prediction API is running", "model_ready": bundle is not None})
 
 # 模型信息接口
 @app.route('/info', methods=['GET'])
 def model_info():
     """返回模型信息和特征重要性"""
     try:
-        with open(os.path.join(api_data_dir, 'model_info.json'), 'r', encoding='utf-8') as f:
-            info = json.load(f)
-        return jsonify(info)
+        return artifact_store.respond('model_info.json', request)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -72,91 +719,246 @@ def model_info():
 def predict():
     """接收特征数据，返回预测结果"""
     try:
-        # 获取请求数据
-        data = request.json
-        
-        # 验证数据格式
-        if not data or 'features' not in data:
-            return jsonify({"error": "Invalid request format, 'features' key is required"}), 400
-        
-        # 提取特征数据
-        features = data['features']
-        
-        # 验证特征数量
-        if len(features) != len(feature_columns):
-            return jsonify({"error": f"Invalid number of features. Expected {len(feature_columns)}, got {len(features)}"}), 400
-        
-        # 转换为numpy数组
-        features_array = np.array(features).reshape(1, -1)
-        
-        # 进行预测
-        prediction = model.predict(features_array)[0]
-        
-        # 计算 SHAP 值
-        shap_values = explainer.shap_values(features_array)
-        # 对于回归模型，shap_values 返回的是 (samples, features)
-        # 如果是某些版本的 shap，可能会返回一个列表，取第一个
-        if isinstance(shap_values, list):
-            shap_values = shap_values[0]
-            
-        # 构建响应
-        response = {
-            "prediction": float(prediction),
-            "features": dict(zip(feature_columns, features)),
-            "shap_values": dict(zip(feature_columns, shap_values[0].tolist())),
-            "base_value": float(explainer.expected_value),
-            "message": "Prediction completed successfully"
-        }
-        
-        return jsonify(response)
+        try:
+            deadline = request_deadline(request.headers.get('X-Request-Deadline-Ms'), g.request_start)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        t = time.perf_counter()
+        # 请求体不是合法 JSON 时为 None，由 run_predict 返回 400
+        data = request.get_json(silent=True)
+        t = record_stage(predict_stages['parse'], t)
+        response, status = run_predict(data, t, deadline)
+        t = time.perf_counter()
+        result = jsonify(response)
+        record_stage(predict_stages['serialize'], t)
+        return result, status
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# 预测缓存统计接口
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """返回预测缓存的命中统计"""
+    if prediction_cache is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **prediction_cache.stats()})
+
+# 已加载模型列表
+def list_models():
+    """返回各模型的类型、版本、加载耗时、内存占用和预测延迟，以及特征流水线的派生特征"""
+    current = ensure_model()
+    models = []
+    for name, served in current.models.items():
+        latency = model_predict_latency.labels(name)
+        models.append({
+            "name": name,
+            "kind": served.kind,
+            "version": served.version,
+            "default": name == current.default_model,
+            "load_seconds": served.load_seconds,
+            "explainer_seconds": served.explainer_seconds,
+            "memory_bytes": served.memory_bytes,
+            "conformal": served.conformal is not None,
+            "predict_calls": sum(latency.counts),
+            "mean_predict_ms": latency.sum / sum(latency.counts) * 1000 if sum(latency.counts) else None,
+        })
+    return {"models": models, "ensemble_weights": current.ensemble_weights,
+            "feature_transforms": list(current.pipeline.transforms), "startup": startup_profile}
+
+# 模型列表接口
+@app.route('/models', methods=['GET'])
+def get_models():
+    """返回已加载的模型及集成权重"""
+    return jsonify(list_models())
+
+# 监控指标接口
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """以 Prometheus 文本格式返回各接口、各处理阶段的延迟直方图、批量大小分布、错误数和模型版本"""
+    return Response(render_metrics(), content_type=metrics.content_type)
+
+# 模型热更新接口
+@app.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    """重新加载模型文件，预热完成后原子替换，进行中的请求继续使用旧模型"""
+    if admin_token and request.headers.get('X-Admin-Token') != admin_token:
+        return jsonify({"error": "Forbidden"}), 403
+    try:
+        version = reload_model()
+        return jsonify({"status": "ok", "model_version": version, "message": "Model reloaded successfully"})
+    except Exception as e:
+        return jsonify({"error": str(e), "model_version": bundle.version if bundle else None}), 500
+
 # 批量预测接口
 @app.route('/predict/batch', methods=['POST'])
 def batch_predict():
-    """批量预测接口"""
+    """批量预测接口
+
+    支持的请求格式（按 Content-Type 选择）：
+    - application/json：{"batch_features": [[...], ...]} 或列式 {feature: [values]}
+    - application/x-npy：.npy 格式的 (N, 20) 数组
+    - application/octet-stream：小端 float32 行主序原始字节
+    - application/vnd.apache.arrow.stream：Arrow IPC 流，每个特征一列
+    二进制请求的预测结果以相同格式返回。
+    """
+    try:
+        t = time.perf_counter()
+        body = request.get_data()
+        t = record_stage(batch_stages['read'], t)
+        response, mimetype, status = run_batch_predict(request.mimetype, body, request.args.get('model'), start=t,
+                                                       coverage=request.args.get('coverage'))
+        if isinstance(response, dict):
+            t = time.perf_counter()
+            result = jsonify(response)
+            record_stage(batch_stages['serialize'], t)
+            return result, status
+        return Response(response, status=status, mimetype=mimetype)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# 敏感性扫描接口
+@app.route('/predict/sweep', methods=['POST'])
+def predict_sweep():
+    """在基准特征向量上扫描一个或两个特征的取值范围，返回预测曲线或曲面
+
+    请求体：{"features": [...], "vary": ["MonsoonIntensity", "Deforestation"], "steps": 20, "model": "lightgbm"}
+    """
     try:
-        # 获取请求数据
+        t = time.perf_counter()
         data = request.json
-        
-        # 验证数据格式
-        if not data or 'batch_features' not in data:
-            return jsonify({"error": "Invalid request format, 'batch_features' key is required"}), 400
-        
-        # 提取批量特征数据
-        batch_features = data['batch_features']
-        
-        # 验证每个样本的特征数量
-        for i, features in enumerate(batch_features):
-            if len(features) != len(feature_columns):
-                return jsonify({"error": f"Invalid number of features at index {i}. Expected {len(feature_columns)}, got {len(features)}"}), 400
-        
-        # 转换为numpy数组
-        features_array = np.array(batch_features)
-        
-        # 进行批量预测
-        predictions = model.predict(features_array)
-        
-        # 构建响应
-        response = {
-            "predictions": [float(pred) for pred in predictions],
-            "batch_size": len(predictions),
-            "message": "Batch prediction completed successfully"
-        }
-        
-        return jsonify(response)
+        t = record_stage(sweep_stages['parse'], t)
+        response, status = run_sweep(data, t)
+        t = time.perf_counter()
+        result = jsonify(response)
+        record_stage(sweep_stages['serialize'], t)
+        return result, status
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# 蒙特卡洛模拟接口
+@app.route('/simulate', methods=['POST'])
+def simulate_risk():
+    """扰动不确定的输入特征（按训练集边际分布抽样），返回预测洪水概率的分布
+
+    请求体：{"features": [...], "perturb": ["ClimateChange", "MonsoonIntensity"], "samples": 100000,
+            "bins": 20, "quantiles": [0.05, 0.5, 0.95], "seed": 42, "model": "lightgbm"}
+    """
+    try:
+        t = time.perf_counter()
+        # 请求体不是合法 JSON 时为 None，由 run_simulate 返回 400
+        data = request.get_json(silent=True)
+        t = record_stage(simulate_stages['parse'], t)
+        response, status = run_simulate(data, t)
+        t = time.perf_counter()
+        result = jsonify(response)
+        record_stage(simulate_stages['serialize'], t)
+        return result, status
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# 批量解释接口
+@app.route('/explain/batch', methods=['POST'])
+def explain_batch():
+    """批量计算 SHAP 值
+
+    请求体格式与 /predict/batch 相同（按 Content-Type 选择），
+    可选查询参数 top_k：每行只返回绝对贡献最大的 k 个特征。
+    """
+    try:
+        top_k = request.args.get('top_k')
+        if top_k is not None:
+            if not top_k.isdigit():
+                return jsonify({"error": "Invalid top_k, expected a positive integer"}), 400
+            top_k = int(top_k)
+        t = time.perf_counter()
+        body = request.get_data()
+        t = record_stage(explain_stages['read'], t)
+        response, status = run_explain_batch(request.mimetype, body, top_k, request.args.get('model'), start=t)
+        t = time.perf_counter()
+        result = jsonify(response)
+        record_stage(explain_stages['serialize'], t)
+        return result, status
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# 批量评分任务
+bulk_jobs = BulkJobManager(bulk_job_dir, os.path.join(base_path, 'csv_data'), lambda: ensure_model(),
+                           bulk_job_workers, bulk_job_chunk_rows,
+                           on_chunk=lambda rows: bulk_job_rows.labels().inc(rows),
+                           on_finish=lambda status: bulk_job_count.labels(status).inc(),
+                           ttl=bulk_job_ttl)
+
+def job_urls(status):
+    """在任务状态中加入查询和下载地址"""
+    job_id = status['job_id']
+    return {**status, "status_url": f"/jobs/{job_id}", "result_url": f"/jobs/{job_id}/result"}
+
+# 批量评分任务提交接口
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """提交批量评分任务，立即返回任务编号（202）
+
+    输入文件三选一：multipart/form-data 的 file 字段、text/csv 请求体，
+    或 JSON {"path": "test.csv"} 指定 csv_data/ 下的文件。
+    可选参数 model、format（parquet 或 csv）通过查询参数或 JSON 字段传入。
+    """
+    try:
+        if request.mimetype in ('multipart/form-data', 'text/csv'):
+            job_id, input_path = bulk_jobs.new_job()
+            try:
+                if request.mimetype == 'text/csv':
+                    source = None
+                    with open(input_path, 'wb') as f:
+                        shutil.copyfileobj(request.stream, f, 1 << 20)
+                else:
+                    upload = request.files.get('file')
+                    if upload is None:
+                        raise JobError("Missing 'file' field in multipart upload")
+                    source = upload.filename
+                    upload.save(input_path)
+            except Exception:
+                bulk_jobs.discard(job_id)
+                raise
+            status = bulk_jobs.submit(job_id, input_path, request.args.get('model'), request.args.get('format'), source)
+        else:
+            data = {**request.args, **(request.get_json(silent=True) or {})}
+            if 'path' not in data:
+                raise JobError("Invalid request format, upload a CSV file or pass 'path' under csv_data/")
+            status = bulk_jobs.submit_path(data['path'], data.get('model'), data.get('format'))
+        return jsonify(job_urls(status)), 202
+    except JobError as e:
+        return jsonify({"error": str(e)}), e.status_code
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# 批量评分任务状态接口
+@app.route('/jobs/<job_id>', methods=['GET', 'DELETE'])
+def job_status(job_id):
+    """GET 返回任务状态和进度，DELETE 删除已结束的任务及其结果文件"""
+    try:
+        if request.method == 'DELETE':
+            bulk_jobs.delete(job_id)
+            return jsonify({"job_id": job_id, "message": "Job deleted"})
+        return jsonify(job_urls(bulk_jobs.status(job_id)))
+    except JobError as e:
+        return jsonify({"error": str(e)}), e.status_code
+
+# 批量评分结果下载接口
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    """下载已完成任务的结果文件"""
+    try:
+        path, mimetype, download_name = bulk_jobs.result(job_id)
+        return send_file(path, mimetype=mimetype, as_attachment=True, download_name=download_name)
+    except JobError as e:
+        return jsonify({"error": str(e)}), e.status_code
+
 # 数据统计接口
 @app.route('/stats', methods=['GET'])
 def get_stats():
     """获取数据统计信息"""
     try:
-        with open(os.path.join(api_data_dir, 'stats.json'), 'r', encoding='utf-8') as f:
-            stats = json.load(f)
-        return jsonify(stats)
+        return artifact_store.respond('stats.json', request)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -165,9 +967,7 @@ def get_stats():
 def get_evaluation():
     """获取模型评估指标"""
     try:
-        with open(os.path.join(api_data_dir, 'evaluation.json'), 'r', encoding='utf-8') as f:
-            evaluation = json.load(f)
-        return jsonify(evaluation)
+        return artifact_store.respond('evaluation.json', request)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -176,9 +976,7 @@ def get_evaluation():
 def get_distribution():
     """获取目标变量分布"""
     try:
-        with open(os.path.join(api_data_dir, 'distribution.json'), 'r', encoding='utf-8') as f:
-            distribution = json.load(f)
-        return jsonify(distribution)
+        return artifact_store.respond('distribution.json', request)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -187,9 +985,7 @@ def get_distribution():
 def get_correlation():
     """获取特征相关性矩阵"""
     try:
-        with open(os.path.join(api_data_dir, 'correlation.json'), 'r', encoding='utf-8') as f:
-            correlation = json.load(f)
-        return jsonify(correlation)
+        return artifact_store.respond('correlation.json', request)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -198,9 +994,7 @@ def get_correlation():
 def get_predictions_comparison():
     """获取预测值与真实值对比数据"""
     try:
-        with open(os.path.join(api_data_dir, 'predictions_comparison.json'), 'r', encoding='utf-8') as f:
-            comparison = json.load(f)
-        return jsonify(comparison)
+        return artifact_store.respond('predictions_comparison.json', request)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -209,9 +1003,7 @@ def get_predictions_comparison():
 def get_error_distribution():
     """获取预测误差分布"""
     try:
-        with open(os.path.join(api_data_dir, 'error_distribution.json'), 'r', encoding='utf-8') as f:
-            error_dist = json.load(f)
-        return jsonify(error_dist)
+        return artifact_store.respond('error_distribution.json', request)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -220,9 +1012,7 @@ def get_error_distribution():
 def get_model_params():
     """获取模型参数"""
     try:
-        with open(os.path.join(api_data_dir, 'model_params.json'), 'r', encoding='utf-8') as f:
-            params = json.load(f)
-        return jsonify(params)
+        return artifact_store.respond('model_params.json', request)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -231,9 +1021,7 @@ def get_model_params():
 def get_training_info():
     """获取训练信息"""
     try:
-        with open(os.path.join(api_data_dir, 'training_info.json'), 'r', encoding='utf-8') as f:
-            info = json.load(f)
-        return jsonify(info)
+        return artifact_store.respond('training_info.json', request)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -242,9 +1030,7 @@ def get_training_info():
 def get_csv_info():
     """获取csv信息"""
     try:
-        with open(os.path.join(api_data_dir, 'csv_info.json'), 'r', encoding='utf-8') as f:
-            info = json.load(f)
-        return jsonify(info)
+        return artifact_store.respond('csv_info.json', request)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -253,18 +1039,29 @@ def get_csv_info():
 def get_training_curve():
     """获取训练曲线数据"""
     try:
-        with open(os.path.join(api_data_dir, 'training_curve.json'), 'r', encoding='utf-8') as f:
-            curve_data = json.load(f)
-        return jsonify(curve_data)
+        return artifact_store.respond('training_curve.json', request)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# 应用工厂：供 gunicorn 等 pre-fork 服务器在主进程中加载模型，worker 以写时复制方式共享
+def create_app(start_background=True):
+    """返回 Flask 应用；eager 启动模式下先加载模型、特征列和 SHAP 解释器
+
+    pre-fork 部署时主进程传入 start_background=False，由各 worker 在 fork 后启动模型监控和后台加载。
+    """
+    if startup_mode == 'eager' and bundle is None and not init_model(warm_up=start_background):
+        raise RuntimeError("Failed to initialize model")
+    if start_background:
+        start_background_tasks()
+    return app
+
 # 主函数
 if __name__ == '__main__':
-    # 初始化模型
-    if init_model():
-        # 启动服务
-        app.run(host='0.0.0.0', port=5000, debug=False)
-    else:
+    # 初始化模型（background/lazy 模式下推迟到后台线程或首个请求）
+    if startup_mode == 'eager' and not init_model():
         print("Failed to initialize model, exiting...")
-        exit(1)
\ No newline at end of file
+        exit(1)
+    # 启动模型文件监控和后台加载
+    start_background_tasks()
+    # 启动服务
+    app.run(host='0.0.0.0', port=5000, debug=False)
\ No newline at end of file
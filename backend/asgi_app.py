@@ -0,0 +1,405 @@
+# 异步 ASGI 版本的 API 服务，路由和 JSON 格式与 app.py 完全一致
+# 启动方式：cd backend && uvicorn asgi_app:app --host 0.0.0.0 --port 5000
+#
+# 事件循环只负责连接和请求读写，model.predict 与 SHAP 计算放到有界线程池中执行
+# （LightGBM 预测时会释放 GIL），静态数据接口直接返回内存中的缓存，
+# 文件修改检查在后台线程中定期进行，请求处理过程中不做任何文件 I/O。
+import asyncio
+import json
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import FileResponse, JSONResponse, Response
+from starlette.routing import Match, Route
+from werkzeug.http import parse_accept_header, parse_etags
+
+import app as backend
+from bulk_jobs import JobError
+from static_artifacts import select_encoding
+
+# 模型计算线程池大小，限制同时进行的预测/SHAP 计算数量
+model_threads = int(os.environ.get('MODEL_THREADS', os.cpu_count() or 4))
+# 静态数据文件修改检查间隔（秒）
+artifact_refresh_interval = float(os.environ.get('ARTIFACT_REFRESH_INTERVAL', 2))
+
+model_pool = ThreadPoolExecutor(max_workers=model_threads, thread_name_prefix='model')
+io_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='artifact-io')
+
+# 静态数据接口与 api_data 文件的对应关系
+STATIC_ROUTES = {
+    '/info': 'model_info.json',
+    '/stats': 'stats.json',
+    '/evaluation': 'evaluation.json',
+    '/distribution': 'distribution.json',
+    '/correlation': 'correlation.json',
+    '/predictions-comparison': 'predictions_comparison.json',
+    '/error-distribution': 'error_distribution.json',
+    '/model-params': 'model_params.json',
+    '/training-info': 'training_info.json',
+    '/csv-info': 'csv_info.json',
+    '/training-curve': 'training_curve.json',
+}
+
+
+async def run_in_pool(pool, fn, *args):
+    """在指定线程池中执行阻塞函数"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, fn, *args)
+
+
+def error_response(e, status_code=500):
+    return JSONResponse({"error": str(e)}, status_code=status_code)
+
+
+# 健康检查接口
+async def health_check(request):
+    return JSONResponse({"status": "ok", "message": "Flood Prediction API is running",
+                         "model_ready": backend.bundle is not None})
+
+
+# 预测接口
+async def predict(request):
+    try:
+        try:
+            # 截止时间从收到请求开始计算，线程池排队时间也计入
+            deadline = backend.request_deadline(request.headers.get('x-request-deadline-ms'), time.perf_counter())
+        except ValueError as e:
+            return error_response(e, 400)
+        body = await request.body()
+        t = time.perf_counter()
+        try:
+            data = json.loads(body)
+        except ValueError:
+            # 与 Flask 版本一致，不合法的 JSON 由 run_predict 返回 400
+            data = None
+        backend.record_stage(backend.predict_stages['parse'], t)
+        # 线程池排队时间不计入处理阶段，阶段计时在工作线程中重新开始
+        response, status = await run_in_pool(model_pool, backend.run_predict, data, None, deadline)
+        t = time.perf_counter()
+        result = JSONResponse(response, status_code=status)
+        backend.record_stage(backend.predict_stages['serialize'], t)
+        return result
+    except Exception as e:
+        return error_response(e)
+
+
+# 批量预测接口
+async def batch_predict(request):
+    try:
+        mimetype = request.headers.get('content-type', '').split(';')[0].strip().lower()
+        body = await request.body()
+        response, response_format, status = await run_in_pool(model_pool, backend.run_batch_predict, mimetype, body,
+                                                              request.query_params.get('model'), None,
+                                                              request.query_params.get('coverage'))
+        if isinstance(response, dict):
+            return JSONResponse(response, status_code=status)
+        return Response(response, status_code=status, media_type=response_format)
+    except Exception as e:
+        return error_response(e)
+
+
+# 敏感性扫描接口
+async def predict_sweep(request):
+    try:
+        body = await request.body()
+        t = time.perf_counter()
+        data = json.loads(body)
+        backend.record_stage(backend.sweep_stages['parse'], t)
+        response, status = await run_in_pool(model_pool, backend.run_sweep, data)
+        t = time.perf_counter()
+        result = JSONResponse(response, status_code=status)
+        backend.record_stage(backend.sweep_stages['serialize'], t)
+        return result
+    except Exception as e:
+        return error_response(e)
+
+
+# 蒙特卡洛模拟接口
+async def simulate_risk(request):
+    try:
+        body = await request.body()
+        t = time.perf_counter()
+        try:
+            data = json.loads(body)
+        except ValueError:
+            # 与 Flask 版本一致，不合法的 JSON 由 run_simulate 返回 400
+            data = None
+        backend.record_stage(backend.simulate_stages['parse'], t)
+        response, status = await run_in_pool(model_pool, backend.run_simulate, data)
+        t = time.perf_counter()
+        result = JSONResponse(response, status_code=status)
+        backend.record_stage(backend.simulate_stages['serialize'], t)
+        return result
+    except Exception as e:
+        return error_response(e)
+
+
+# 批量解释接口
+async def explain_batch(request):
+    try:
+        top_k = request.query_params.get('top_k')
+        if top_k is not None:
+            if not top_k.isdigit():
+                return error_response("Invalid top_k, expected a positive integer", 400)
+            top_k = int(top_k)
+        mimetype = request.headers.get('content-type', '').split(';')[0].strip().lower()
+        body = await request.body()
+        response, status = await run_in_pool(model_pool, backend.run_explain_batch, mimetype, body, top_k,
+                                             request.query_params.get('model'))
+        t = time.perf_counter()
+        result = JSONResponse(response, status_code=status)
+        backend.record_stage(backend.explain_stages['serialize'], t)
+        return result
+    except Exception as e:
+        return error_response(e)
+
+
+# 批量评分任务提交接口
+async def submit_job(request):
+    try:
+        mimetype = request.headers.get('content-type', '').split(';')[0].strip().lower()
+        params = request.query_params
+        if mimetype in ('multipart/form-data', 'text/csv'):
+            job_id, input_path = await run_in_pool(io_pool, backend.bulk_jobs.new_job)
+            try:
+                if mimetype == 'text/csv':
+                    source = None
+                    # 请求体按块写入文件，不整体读入内存
+                    with open(input_path, 'wb') as f:
+                        async for chunk in request.stream():
+                            f.write(chunk)
+                else:
+                    try:
+                        form = await request.form()
+                    except AssertionError:
+                        raise JobError("Multipart uploads require python-multipart, send text/csv instead", 415)
+                    upload = form.get('file')
+                    if upload is None or isinstance(upload, str):
+                        raise JobError("Missing 'file' field in multipart upload")
+                    source = upload.filename
+                    await run_in_pool(io_pool, copy_upload, upload.file, input_path)
+            except Exception:
+                backend.bulk_jobs.discard(job_id)
+                raise
+            status = await run_in_pool(io_pool, backend.bulk_jobs.submit, job_id, input_path,
+                                       params.get('model'), params.get('format'), source)
+        else:
+            body = await request.body()
+            data = {**params, **(json.loads(body) if body else {})}
+            if 'path' not in data:
+                raise JobError("Invalid request format, upload a CSV file or pass 'path' under csv_data/")
+            status = await run_in_pool(io_pool, backend.bulk_jobs.submit_path, data['path'],
+                                       data.get('model'), data.get('format'))
+        return JSONResponse(backend.job_urls(status), status_code=202)
+    except JobError as e:
+        return error_response(e, e.status_code)
+    except Exception as e:
+        return error_response(e)
+
+
+def copy_upload(source, path):
+    with open(path, 'wb') as f:
+        shutil.copyfileobj(source, f, 1 << 20)
+
+
+# 批量评分任务状态接口
+async def job_status(request):
+    job_id = request.path_params['job_id']
+    try:
+        if request.method == 'DELETE':
+            await run_in_pool(io_pool, backend.bulk_jobs.delete, job_id)
+            return JSONResponse({"job_id": job_id, "message": "Job deleted"})
+        return JSONResponse(backend.job_urls(await run_in_pool(io_pool, backend.bulk_jobs.status, job_id)))
+    except JobError as e:
+        return error_response(e, e.status_code)
+
+
+# 批量评分结果下载接口
+async def job_result(request):
+    try:
+        path, mimetype, download_name = await run_in_pool(io_pool, backend.bulk_jobs.result,
+                                                          request.path_params['job_id'])
+        return FileResponse(path, media_type=mimetype, filename=download_name)
+    except JobError as e:
+        return error_response(e, e.status_code)
+
+
+# 模型热更新接口
+async def admin_reload(request):
+    if backend.admin_token and request.headers.get('x-admin-token') != backend.admin_token:
+        return JSONResponse({"error": "Forbidden"}, status_code=403)
+    try:
+        version = await run_in_pool(io_pool, backend.reload_model)
+        return JSONResponse({"status": "ok", "model_version": version, "message": "Model reloaded successfully"})
+    except Exception as e:
+        # 首次加载失败时 bundle 仍为 None
+        current = backend.bundle
+        return JSONResponse({"error": str(e), "model_version": current.version if current else None}, status_code=500)
+
+
+# 模型列表接口
+async def get_models(request):
+    # 延迟加载模式下 list_models 会先加载模型，不能在事件循环中执行
+    return JSONResponse(await run_in_pool(model_pool, backend.list_models))
+
+
+# 监控指标接口
+async def get_metrics(request):
+    return Response(backend.render_metrics(), headers={'Content-Type': backend.metrics.content_type})
+
+
+# 预测缓存统计接口
+async def cache_stats(request):
+    if backend.prediction_cache is None:
+        return JSONResponse({"enabled": False})
+    return JSONResponse({"enabled": True, **backend.prediction_cache.stats()})
+
+
+def static_endpoint(name):
+    """生成返回 api_data 文件的接口，支持 ETag/304 与 gzip/br"""
+    async def endpoint(request):
+        try:
+            artifact = backend.artifact_store.peek(name)
+            if artifact is None:
+                artifact = await run_in_pool(io_pool, backend.artifact_store.get, name)
+
+            encodings = parse_accept_header(request.headers.get('accept-encoding'))
+            body, encoding, etag = select_encoding(artifact, encodings)
+            headers = {'ETag': f'"{etag}"', 'Vary': 'Accept-Encoding', 'Cache-Control': 'no-cache'}
+            if parse_etags(request.headers.get('if-none-match')).contains(etag):
+                return Response(status_code=304, headers=headers)
+            if encoding is not None:
+                headers['Content-Encoding'] = encoding
+            return Response(body, media_type='application/json', headers=headers)
+        except Exception as e:
+            return error_response(e)
+    return endpoint
+
+
+class MetricsMiddleware:
+    """记录每个请求的路由、状态码和总耗时，与 Flask 版本共用同一组指标
+
+    路由标签为匹配到的路由模板，写法与 Flask 的 url_rule.rule 相同（如 /jobs/<job_id>），
+    没有匹配的路由（包括方法不允许）时为 unmatched。
+    """
+
+    def __init__(self, app, routes):
+        self.app = app
+        self.routes = [(route, re.sub(r'\{(\w+)(:\w+)?\}', r'<\1>', route.path)) for route in routes]
+
+    def route_label(self, scope):
+        for route, label in self.routes:
+            if route.matches(scope)[0] == Match.FULL:
+                return label
+        return 'unmatched'
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            backend.record_request(self.route_label(scope), scope['method'], status, time.perf_counter() - start)
+
+
+class AdmissionMiddleware:
+    """模型计算接口的准入控制：名额已满时直接返回 429，不进入线程池排队
+
+    先接收完整的请求体再占用名额，慢速上传不会长时间占用名额；已接收的消息再依次交给应用。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'] not in backend.admission_routes:
+            await self.app(scope, receive, send)
+            return
+        messages = []
+        while True:
+            message = await receive()
+            messages.append(message)
+            if message['type'] != 'http.request' or not message.get('more_body', False):
+                break
+        if not backend.admission.try_acquire():
+            backend.rejected_count.labels(scope['path']).inc()
+            body, status, headers = backend.overloaded_error()
+            await JSONResponse(body, status_code=status, headers=headers)(scope, receive, send)
+            return
+
+        async def replay():
+            return messages.pop(0) if messages else await receive()
+
+        try:
+            await self.app(scope, replay, send)
+        finally:
+            backend.admission.release()
+
+
+async def refresh_artifacts():
+    """后台定期检查静态数据文件是否修改"""
+    while True:
+        await asyncio.sleep(artifact_refresh_interval)
+        await run_in_pool(io_pool, backend.artifact_store.refresh)
+
+
+def preload_artifacts():
+    for name in STATIC_ROUTES.values():
+        try:
+            backend.artifact_store.get(name)
+        except (OSError, ValueError) as e:
+            print(f"静态数据加载失败: {name} ({e})")
+
+
+@asynccontextmanager
+async def lifespan(app):
+    await run_in_pool(model_pool, backend.create_app)
+    await run_in_pool(io_pool, preload_artifacts)
+    refresh_task = asyncio.create_task(refresh_artifacts())
+    yield
+    refresh_task.cancel()
+
+
+routes = [
+    Route('/health', health_check, methods=['GET']),
+    Route('/predict', predict, methods=['POST']),
+    Route('/predict/batch', batch_predict, methods=['POST']),
+    Route('/predict/sweep', predict_sweep, methods=['POST']),
+    Route('/simulate', simulate_risk, methods=['POST']),
+    Route('/explain/batch', explain_batch, methods=['POST']),
+    Route('/cache/stats', cache_stats, methods=['GET']),
+    Route('/jobs', submit_job, methods=['POST']),
+    Route('/jobs/{job_id}', job_status, methods=['GET', 'DELETE']),
+    Route('/jobs/{job_id}/result', job_result, methods=['GET']),
+    Route('/admin/reload', admin_reload, methods=['POST']),
+    Route('/models', get_models, methods=['GET']),
+    Route('/metrics', get_metrics, methods=['GET']),
+] + [Route(path, static_endpoint(name), methods=['GET']) for path, name in STATIC_ROUTES.items()]
+
+app = Starlette(
+    routes=routes,
+    middleware=[
+        Middleware(MetricsMiddleware, routes=routes),
+        Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*']),
+        Middleware(AdmissionMiddleware),
+    ],
+    lifespan=lifespan,
+)
@@ -0,0 +1,172 @@
+import io
+import json
+
+import numpy as np
+
+# 支持的批量预测请求格式（按 Content-Type 选择）
+JSON_MIMETYPE = 'application/json'
+NPY_MIMETYPE = 'application/x-npy'
+FLOAT32_MIMETYPE = 'application/octet-stream'
+ARROW_MIMETYPE = 'application/vnd.apache.arrow.stream'
+
+
+class BatchFormatError(ValueError):
+    """批量请求格式错误，status_code 为返回给客户端的 HTTP 状态码"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _check_shape(features_array, n_features):
+    """对整个特征矩阵一次性校验形状"""
+    if features_array.dtype.kind not in 'iuf':
+        raise BatchFormatError(f"Invalid feature dtype {features_array.dtype}, all features must be numeric")
+    if features_array.ndim != 2:
+        raise BatchFormatError(f"Invalid batch shape {features_array.shape}, expected (n_samples, {n_features})")
+    if features_array.shape[1] != n_features:
+        raise BatchFormatError(f"Invalid number of features. Expected {n_features}, got {features_array.shape[1]}")
+    if not len(features_array):
+        raise BatchFormatError("Empty batch, at least one sample is required")
+    return features_array
+
+
+def _from_rows(batch_features, n_features):
+    """行式 JSON：[[...], [...]]"""
+    if not isinstance(batch_features, list):
+        raise BatchFormatError(f"Invalid 'batch_features', expected a list of samples, "
+                               f"got {type(batch_features).__name__}")
+    try:
+        features_array = np.asarray(batch_features, dtype=np.float64)
+    except (ValueError, TypeError):
+        features_array = None
+    if features_array is None or features_array.ndim != 2 or features_array.shape[1] != n_features:
+        # 仅在出错时逐行定位第一个不合法的样本
+        for i, features in enumerate(batch_features):
+            if not isinstance(features, list) or len(features) != n_features:
+                length = len(features) if isinstance(features, list) else 1
+                raise BatchFormatError(f"Invalid number of features at index {i}. Expected {n_features}, got {length}")
+        if features_array is None:
+            raise BatchFormatError("Invalid feature values, all features must be numeric")
+    return _check_shape(features_array, n_features)
+
+
+def parse_row(features, n_features):
+    """单行 JSON 特征（/predict 等接口的 features）：与行式批量请求同样校验，返回 (1, n_features) 的矩阵"""
+    if not isinstance(features, list):
+        raise BatchFormatError(f"Invalid 'features', expected a list of {n_features} numbers, "
+                               f"got {type(features).__name__}")
+    if len(features) != n_features:
+        raise BatchFormatError(f"Invalid number of features. Expected {n_features}, got {len(features)}")
+    return _from_rows([features], n_features)
+
+
+def _from_columns(columns, feature_columns):
+    """列式 JSON：{feature: [values]}"""
+    missing = [name for name in feature_columns if name not in columns]
+    if missing:
+        raise BatchFormatError(f"Missing feature columns: {missing}")
+    try:
+        features_array = np.column_stack([np.asarray(columns[name], dtype=np.float64) for name in feature_columns])
+    except (ValueError, TypeError):
+        raise BatchFormatError("All feature columns must be numeric lists of the same length")
+    return _check_shape(features_array, len(feature_columns))
+
+
+def _from_arrow(body, feature_columns):
+    """Arrow IPC 流格式，每个特征一列"""
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise BatchFormatError("Arrow IPC input requires pyarrow", status_code=415)
+    try:
+        table = pa.ipc.open_stream(body).read_all()
+    except (pa.ArrowException, ValueError, OSError):
+        raise BatchFormatError("Invalid Arrow IPC stream")
+    missing = [name for name in feature_columns if name not in table.column_names]
+    if missing:
+        raise BatchFormatError(f"Missing feature columns: {missing}")
+    invalid = [name for name in feature_columns
+               if not (pa.types.is_integer(table.schema.field(name).type)
+                       or pa.types.is_floating(table.schema.field(name).type))]
+    if invalid:
+        raise BatchFormatError(f"Feature columns must be numeric: {invalid}")
+    features_array = np.empty((table.num_rows, len(feature_columns)), dtype=np.float64)
+    for j, name in enumerate(feature_columns):
+        features_array[:, j] = table.column(name).to_numpy()
+    return _check_shape(features_array, len(feature_columns))
+
+
+def parse_batch(mimetype, body, feature_columns):
+    """根据 Content-Type 解析批量请求体，返回 (特征矩阵, 响应格式)"""
+    n_features = len(feature_columns)
+
+    if mimetype == NPY_MIMETYPE:
+        try:
+            features_array = np.load(io.BytesIO(body), allow_pickle=False)
+        except (ValueError, OSError, EOFError):
+            raise BatchFormatError("Invalid .npy body")
+        if not isinstance(features_array, np.ndarray):
+            # .npz 等归档格式
+            raise BatchFormatError("Invalid .npy body, expected a single array")
+        return _check_shape(features_array, n_features), NPY_MIMETYPE
+
+    if mimetype == FLOAT32_MIMETYPE:
+        if len(body) % (4 * n_features):
+            raise BatchFormatError(f"Body length {len(body)} is not a multiple of {n_features} float32 values")
+        return _check_shape(np.frombuffer(body, dtype='<f4').reshape(-1, n_features), n_features), FLOAT32_MIMETYPE
+
+    if mimetype == ARROW_MIMETYPE:
+        return _from_arrow(body, feature_columns), ARROW_MIMETYPE
+
+    if mimetype != JSON_MIMETYPE:
+        raise BatchFormatError(f"Unsupported Content-Type: {mimetype}", status_code=415)
+
+    try:
+        data = json.loads(body)
+    except ValueError:
+        data = None
+    if isinstance(data, dict) and 'batch_features' in data:
+        return _from_rows(data['batch_features'], n_features), JSON_MIMETYPE
+    if isinstance(data, dict) and data and all(name in data for name in feature_columns):
+        return _from_columns(data, feature_columns), JSON_MIMETYPE
+    raise BatchFormatError("Invalid request format, 'batch_features' key or one column per feature is required")
+
+
+def encode_predictions(predictions, response_format, intervals=None):
+    """按与请求一致的格式编码预测结果，JSON 格式返回 dict，其余返回 bytes
+
+    intervals 可选，为 [(覆盖率, lower, upper)]。.npy 与 float32 格式下此时返回 (N, 1 + 2 × 覆盖率个数) 矩阵，
+    列依次为 prediction、各覆盖率的 lower 和 upper；Arrow 格式增加 lower_<覆盖率>、upper_<覆盖率> 列。
+    """
+    columns = {'prediction': np.asarray(predictions, dtype=np.float64)}
+    for coverage, lower, upper in intervals or []:
+        columns[f'lower_{coverage}'] = lower
+        columns[f'upper_{coverage}'] = upper
+    matrix = columns['prediction'] if not intervals else np.column_stack(list(columns.values()))
+
+    if response_format == NPY_MIMETYPE:
+        buffer = io.BytesIO()
+        np.save(buffer, matrix, allow_pickle=False)
+        return buffer.getvalue()
+
+    if response_format == FLOAT32_MIMETYPE:
+        return np.ascontiguousarray(matrix, dtype='<f4').tobytes()
+
+    if response_format == ARROW_MIMETYPE:
+        import pyarrow as pa
+        table = pa.table(columns)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    response = {
+        "predictions": columns['prediction'].tolist(),
+        "batch_size": len(predictions),
+        "message": "Batch prediction completed successfully"
+    }
+    if intervals:
+        response["intervals"] = {coverage: {"lower": lower.tolist(), "upper": upper.tolist()}
+                                 for coverage, lower, upper in intervals}
+    return response
@@ -0,0 +1,338 @@
+import itertools
+import json
+import os
+import re
+import shutil
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# 任务编号格式（uuid4 十六进制），同时防止通过编号访问任务目录以外的路径
+JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+# 输入 CSV 中可选的样本编号列，存在时原样写入结果文件
+ID_COLUMN = 'id'
+# 结果文件格式：parquet（列式，需要 pyarrow）或 csv
+OUTPUT_FORMATS = {
+    'parquet': ('result.parquet', 'application/vnd.apache.parquet'),
+    'csv': ('result.csv', 'text/csv'),
+}
+UNFINISHED = ('queued', 'running')
+
+# 每个进程的标识：进程重启后即使 pid 相同（如容器中的 1 号进程）也能区分出上一个进程留下的任务
+_process_tokens = {}
+
+
+def _process_token():
+    pid = os.getpid()
+    if pid not in _process_tokens:
+        _process_tokens[pid] = uuid.uuid4().hex
+    return _process_tokens[pid]
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobError(ValueError):
+    """任务请求错误，status_code 为返回给客户端的 HTTP 状态码"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def default_output_format():
+    """安装了 pyarrow 时默认输出 Parquet，否则输出 CSV"""
+    try:
+        import pyarrow.parquet  # noqa: F401
+        return 'parquet'
+    except ImportError:
+        return 'csv'
+
+
+class _ParquetOutput:
+    """逐块写入 Parquet，每个输入块一个 row group"""
+
+    def __init__(self, path, has_id):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._pa = pa
+        fields = [pa.field(ID_COLUMN, pa.int64())] if has_id else []
+        self.schema = pa.schema(fields + [pa.field('prediction', pa.float64())])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, ids, predictions):
+        columns = ([ids] if ids is not None else []) + [predictions]
+        self.writer.write_table(self._pa.Table.from_arrays(columns, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+class _CsvOutput:
+    """逐块追加写入 CSV"""
+
+    def __init__(self, path, has_id):
+        self.file = open(path, 'w', encoding='utf-8', newline='')
+        self.file.write(f"{ID_COLUMN},prediction\n" if has_id else "prediction\n")
+
+    def write(self, ids, predictions):
+        if ids is not None:
+            np.savetxt(self.file, np.column_stack([ids, predictions]), fmt=['%d', '%.17g'], delimiter=',')
+        else:
+            np.savetxt(self.file, predictions, fmt='%.17g')
+
+    def close(self):
+        self.file.close()
+
+
+_OUTPUT_WRITERS = {'parquet': _ParquetOutput, 'csv': _CsvOutput}
+
+
+class BulkJobManager:
+    """异步批量评分任务：输入 CSV 按块流式读取、预测并写入结果文件，内存占用只与块大小有关
+
+    每个任务一个目录（jobs_dir/<job_id>/），包含上传的输入文件、status.json 和结果文件。
+    状态保存在文件中，多进程部署时任意 worker 都能查询进度和下载结果；
+    任务在接收它的进程的线程池中执行，线程池在首次提交时按进程创建（可在 pre-fork 主进程中构造）。
+    get_bundle 返回当前的 ModelBundle，任务提交时取得一次，整个任务使用同一组模型。
+    on_chunk（每块的行数）和 on_finish（最终状态）可选，用于监控。
+
+    status.json 记录执行任务的进程（主机名、pid 和进程标识），cleanup() 把执行进程已退出的未完成任务
+    标记为 failed（进程崩溃或重启时线程池中的任务随之丢失），并删除结束超过 ttl 秒的任务目录。
+    """
+
+    def __init__(self, jobs_dir, csv_dir, get_bundle, workers=1, chunk_rows=100000, on_chunk=None, on_finish=None,
+                 ttl=86400):
+        self.jobs_dir = jobs_dir
+        self.csv_dir = os.path.realpath(csv_dir)
+        self.get_bundle = get_bundle
+        self.workers = workers
+        self.chunk_rows = chunk_rows
+        self.ttl = ttl
+        self.on_chunk = on_chunk
+        self.on_finish = on_finish
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bulk-job')
+                self._pid = os.getpid()
+            return self._executor
+
+    def _job_dir(self, job_id):
+        if not JOB_ID_PATTERN.match(job_id):
+            raise JobError(f"Unknown job '{job_id}'", 404)
+        return os.path.join(self.jobs_dir, job_id)
+
+    def _write_status(self, job_id, status):
+        path = os.path.join(self._job_dir(job_id), 'status.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(status, f)
+        os.replace(path + '.tmp', path)
+
+    def _is_orphaned(self, status):
+        """未完成的任务的执行进程是否已退出（只判断本机的进程，其他主机的任务由其自身处理）"""
+        worker = status.get('worker') or {}
+        if worker.get('host') != socket.gethostname() or worker.get('pid') is None:
+            return False
+        if worker['pid'] == os.getpid():
+            return worker.get('token') != _process_token()
+        return not _pid_alive(worker['pid'])
+
+    def cleanup(self):
+        """把执行进程已退出的未完成任务标记为 failed，删除结束（或上传未完成）超过 ttl 秒的任务目录"""
+        try:
+            job_ids = [name for name in os.listdir(self.jobs_dir) if JOB_ID_PATTERN.match(name)]
+        except FileNotFoundError:
+            return
+        now = time.time()
+        for job_id in job_ids:
+            try:
+                status = self.status(job_id)
+            except JobError:
+                # 没有 status.json：上传中或上传时进程退出，按目录修改时间判断
+                try:
+                    expired = self.ttl and now - os.path.getmtime(self._job_dir(job_id)) > self.ttl
+                except OSError:
+                    continue
+                if expired:
+                    self.discard(job_id)
+                continue
+            except ValueError:
+                continue
+            if status['status'] in UNFINISHED:
+                if self._is_orphaned(status):
+                    status.update(status='failed', error="Worker process exited before the job finished",
+                                  finished_at=now)
+                    self._write_status(job_id, status)
+                    print(f"批量评分任务 {job_id} 的执行进程已退出，标记为 failed")
+                    if self.on_finish is not None:
+                        self.on_finish('failed')
+            elif self.ttl and now - (status.get('finished_at') or now) > self.ttl:
+                self.discard(job_id)
+
+    def new_job(self):
+        """创建任务目录，返回 (job_id, 上传文件的保存路径)；同时清理过期的任务"""
+        self.cleanup()
+        job_id = uuid.uuid4().hex
+        os.makedirs(self._job_dir(job_id))
+        return job_id, os.path.join(self._job_dir(job_id), 'input.csv')
+
+    def discard(self, job_id):
+        shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+
+    def submit_path(self, path, model=None, output_format=None):
+        """提交 csv_dir 下的已有文件（相对路径）"""
+        if not isinstance(path, str):
+            raise JobError("'path' must be a file name under csv_data/")
+        input_path = os.path.realpath(os.path.join(self.csv_dir, path))
+        if os.path.commonpath([input_path, self.csv_dir]) != self.csv_dir:
+            raise JobError("'path' must be a file name under csv_data/")
+        if not os.path.isfile(input_path):
+            raise JobError(f"File not found in csv_data/: {path}", 404)
+        job_id, _ = self.new_job()
+        return self.submit(job_id, input_path, model, output_format, source=path)
+
+    def submit(self, job_id, input_path, model=None, output_format=None, source=None):
+        """校验模型、输出格式和表头后排队执行，返回任务状态；校验失败时删除任务目录并抛出 JobError"""
+        try:
+            current = self.get_bundle()
+            model_name = current.resolve(model)
+            if model_name is None:
+                raise JobError(f"Unknown model '{model}', available: {current.available_models()}")
+            output_format = output_format or default_output_format()
+            if output_format not in OUTPUT_FORMATS:
+                raise JobError(f"Unknown format '{output_format}', expected one of {list(OUTPUT_FORMATS)}")
+            if output_format == 'parquet' and default_output_format() != 'parquet':
+                raise JobError("Parquet output requires pyarrow", 415)
+            columns = self._read_header(input_path, current.feature_columns)
+        except JobError:
+            self.discard(job_id)
+            raise
+
+        status = {
+            "job_id": job_id,
+            "status": "queued",
+            "source": source or os.path.basename(input_path),
+            "model": model_name,
+            "model_version": current.version,
+            "format": output_format,
+            "rows": 0,
+            "bytes_read": 0,
+            "bytes_total": os.path.getsize(input_path),
+            "progress": 0.0,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "rows_per_sec": None,
+            "error": None,
+            "worker": {"host": socket.gethostname(), "pid": os.getpid(), "token": _process_token()},
+        }
+        self._write_status(job_id, status)
+        snapshot = dict(status)
+        try:
+            self._pool().submit(self._run, current, status, input_path, columns)
+        except Exception as e:
+            status.update(status='failed', error=str(e), finished_at=time.time())
+            self._write_status(job_id, status)
+            raise
+        return snapshot
+
+    def _read_header(self, input_path, feature_columns):
+        """读取表头，返回 (样本编号列序号或 None, 特征列序号)"""
+        with open(input_path, 'rb') as f:
+            header = f.readline().decode('utf-8-sig').strip().split(',')
+        missing = [name for name in feature_columns if name not in header]
+        if missing:
+            raise JobError(f"Missing feature columns in CSV header: {missing}")
+        id_index = header.index(ID_COLUMN) if ID_COLUMN in header else None
+        return id_index, [header.index(name) for name in feature_columns]
+
+    def _run(self, current, status, input_path, columns):
+        job_id = status['job_id']
+        id_index, feature_indices = columns
+        usecols = ([id_index] if id_index is not None else []) + feature_indices
+        filename, _ = OUTPUT_FORMATS[status['format']]
+        output_path = os.path.join(self._job_dir(job_id), filename)
+
+        start = time.perf_counter()
+        try:
+            status.update(status='running', started_at=time.time())
+            self._write_status(job_id, status)
+            writer = _OUTPUT_WRITERS[status['format']](output_path + '.tmp', id_index is not None)
+            try:
+                with open(input_path, 'rb') as f:
+                    status['bytes_read'] = len(f.readline())
+                    while True:
+                        lines = list(itertools.islice(f, self.chunk_rows))
+                        if not lines:
+                            break
+                        status['bytes_read'] += sum(len(line) for line in lines)
+                        try:
+                            chunk = np.loadtxt(lines, delimiter=',', usecols=usecols, dtype=np.float64, ndmin=2)
+                        except ValueError as e:
+                            raise JobError(f"Invalid CSV data after row {status['rows']}: {e}")
+                        if len(chunk) == 0:
+                            continue
+                        ids = chunk[:, 0].astype(np.int64) if id_index is not None else None
+                        features_array = chunk[:, 1:] if id_index is not None else chunk
+                        writer.write(ids, current.predict(np.ascontiguousarray(features_array), status['model']))
+
+                        status['rows'] += len(chunk)
+                        status['progress'] = status['bytes_read'] / max(status['bytes_total'], 1)
+                        status['rows_per_sec'] = status['rows'] / (time.perf_counter() - start)
+                        self._write_status(job_id, status)
+                        if self.on_chunk is not None:
+                            self.on_chunk(len(chunk))
+            finally:
+                writer.close()
+            os.replace(output_path + '.tmp', output_path)
+            status.update(status='done', progress=1.0)
+        except Exception as e:
+            status.update(status='failed', error=str(e))
+        status['finished_at'] = time.time()
+        try:
+            self._write_status(job_id, status)
+        except OSError as e:
+            # 任务目录已被删除等情况，状态无法保存
+            print(f"批量评分任务 {job_id} 状态保存失败: {e}")
+        print(f"批量评分任务 {job_id} {status['status']}: {status['rows']} 行, 耗时 {time.perf_counter() - start:.2f} 秒")
+        if self.on_finish is not None:
+            self.on_finish(status['status'])
+
+    def status(self, job_id):
+        """返回任务状态，任务不存在时抛出 JobError(404)"""
+        try:
+            with open(os.path.join(self._job_dir(job_id), 'status.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise JobError(f"Unknown job '{job_id}'", 404)
+
+    def result(self, job_id):
+        """返回 (结果文件路径, MIME 类型, 下载文件名)；任务未完成时抛出 JobError(409)"""
+        status = self.status(job_id)
+        if status['status'] != 'done':
+            raise JobError(f"Job '{job_id}' is {status['status']}, result not available", 409)
+        filename, mimetype = OUTPUT_FORMATS[status['format']]
+        return os.path.join(self._job_dir(job_id), filename), mimetype, f"{job_id}{os.path.splitext(filename)[1]}"
+
+    def delete(self, job_id):
+        """删除已结束的任务及其文件"""
+        status = self.status(job_id)
+        if status['status'] in UNFINISHED:
+            raise JobError(f"Job '{job_id}' is {status['status']}, wait until it finishes", 409)
+        self.discard(job_id)
@@ -0,0 +1,84 @@
+import json
+import os
+
+import numpy as np
+
+# 预先计算分位数的覆盖率网格：0.01 ~ 0.99（步长 0.01）以及 0.995、0.999
+COVERAGE_LEVELS = np.concatenate([np.arange(1, 100) / 100, [0.995, 0.999]])
+
+
+def conformal_path(model_path):
+    """模型文件对应的校准文件路径（与模型保存在同一目录）"""
+    return os.path.splitext(model_path)[0] + '.conformal.json'
+
+
+class ConformalIntervals:
+    """分割共形（split conformal）预测区间：按预测值分桶的残差分位数表
+
+    校准时在验证集上计算 |y - 预测值|，按预测值的分位点分桶，
+    每个桶在每个覆盖率水平上取第 ceil((n + 1) · coverage) 小的残差作为半宽 q。
+    查询时只需对预测值 searchsorted 找到桶、按下标取出 q，区间为 [预测值 - q, 预测值 + q]，
+    裁剪到 bounds 范围内。请求的覆盖率向上取到网格中最近的水平，实际覆盖率不低于请求值。
+    """
+
+    def __init__(self, bucket_edges, levels, quantiles, bounds=(0.0, 1.0), bucket_counts=None):
+        self.bucket_edges = np.asarray(bucket_edges, dtype=np.float64)
+        self.levels = np.asarray(levels, dtype=np.float64)
+        self.quantiles = np.asarray(quantiles, dtype=np.float64)
+        self.bounds = tuple(float(b) for b in bounds)
+        self.bucket_counts = list(bucket_counts) if bucket_counts is not None else None
+
+    @classmethod
+    def calibrate(cls, predictions, y_true, n_buckets=10, levels=COVERAGE_LEVELS, bounds=(0.0, 1.0)):
+        """根据校准集的预测值和真实值计算分位数表，n_buckets 为 1 时不分桶"""
+        predictions = np.asarray(predictions, dtype=np.float64)
+        residuals = np.abs(np.asarray(y_true, dtype=np.float64) - predictions)
+        edges = np.unique(np.quantile(predictions, np.arange(1, n_buckets) / n_buckets))
+        buckets = np.searchsorted(edges, predictions, side='right')
+
+        # 残差超出样本范围（n 太小或覆盖率太高）时取整个取值范围，区间裁剪后覆盖 bounds
+        full_width = bounds[1] - bounds[0]
+        quantiles = np.full((len(edges) + 1, len(levels)), full_width)
+        counts = np.bincount(buckets, minlength=len(edges) + 1)
+        for bucket, n in enumerate(counts):
+            ranked = np.sort(residuals[buckets == bucket])
+            k = np.ceil((n + 1) * np.asarray(levels)).astype(int)
+            valid = k <= n
+            quantiles[bucket, valid] = ranked[k[valid] - 1]
+        return cls(edges, levels, quantiles, bounds, counts.tolist())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['bucket_edges'], data['levels'], data['quantiles'], data['bounds'], data.get('bucket_counts'))
+
+    def save(self, path):
+        data = {
+            "bucket_edges": self.bucket_edges.tolist(),
+            "levels": self.levels.tolist(),
+            "quantiles": self.quantiles.tolist(),
+            "bounds": list(self.bounds),
+            "bucket_counts": self.bucket_counts,
+        }
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(path + '.tmp', path)
+
+    def level_indices(self, coverage):
+        """覆盖率列表对应的网格下标（取不低于请求值的最小水平），超出网格范围时抛出 ValueError"""
+        coverage = np.asarray(coverage, dtype=np.float64)
+        if coverage.ndim != 1 or not np.all((coverage > 0) & (coverage <= self.levels[-1])):
+            raise ValueError(f"Invalid coverage, expected values in (0, {self.levels[-1]:g}]")
+        # 网格值为浮点数，留出一点容差使 0.9 等取值精确对应到网格中的 0.9
+        return np.searchsorted(self.levels, coverage - 1e-9)
+
+    def intervals(self, predictions, level_indices):
+        """返回 (lower, upper)，形状均为 (N, 覆盖率个数)"""
+        predictions = np.asarray(predictions, dtype=np.float64)
+        buckets = np.searchsorted(self.bucket_edges, predictions, side='right')
+        half_width = self.quantiles[buckets[:, None], level_indices]
+        # np.maximum/np.minimum 比 np.clip 的固定开销小，单行查询约 10µs
+        lower = np.maximum(predictions[:, None] - half_width, self.bounds[0])
+        upper = np.minimum(predictions[:, None] + half_width, self.bounds[1])
+        return lower, upper
@@ -0,0 +1,194 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from parallel_csv import ParallelCsvError, read_csv_columns
+
+# 缓存格式版本，格式变化时递增使旧缓存失效
+CACHE_VERSION = 1
+
+
+def count_rows(path, block_size=1 << 24):
+    """按块统计换行符得到数据行数（不含表头），不解析 CSV"""
+    lines = 0
+    last = b'\n'
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            lines += block.count(b'\n')
+            last = block[-1:]
+    # 最后一行没有换行符时也算一行
+    return lines + (last != b'\n') - 1
+
+
+def narrow_int_dtype(low, high):
+    """能容纳 [low, high] 的最小整数类型"""
+    return np.result_type(np.min_scalar_type(low), np.min_scalar_type(high))
+
+
+class CsvCache:
+    """CSV 的列式二进制缓存：每列一个 .npy 文件，按需读取部分列，以只读 mmap 加载
+
+    首次访问时按块把 CSV 转换为 cache_dir/<文件名>/ 下的 .npy 文件（内存占用约为一个块加上一列），
+    整数列收窄为能容纳其取值范围的最小类型（如 0 ~ 16 的特征为 uint8），浮点列保持 float64；
+    整数列在后面的行中出现小数或空值时整列改为 float64（与并行解析的结果相同）。
+    meta.json 记录源文件的大小和修改时间，CSV 变化后自动重新转换。只支持数值列。
+    workers 大于 1 时用多进程按字节范围并行解析（见 parallel_csv.py），文件不支持并行解析时改为按块读取。
+    """
+
+    def __init__(self, csv_path, cache_dir, chunk_rows=100000, workers=1):
+        self.csv_path = csv_path
+        self.cache_path = os.path.join(cache_dir, os.path.splitext(os.path.basename(csv_path))[0])
+        self.chunk_rows = chunk_rows
+        self.workers = workers
+        self._meta = None
+
+    def _source_key(self):
+        stat = os.stat(self.csv_path)
+        return {"version": CACHE_VERSION, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def _read_meta(self):
+        try:
+            with open(os.path.join(self.cache_path, 'meta.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @property
+    def meta(self):
+        """缓存元数据（列名、类型、行数），缓存不存在或已过期时先重新转换"""
+        key = self._source_key()
+        if self._meta is None or self._meta['source'] != key:
+            meta = self._read_meta()
+            if meta is None or meta.get('source') != key:
+                meta = self._build(key)
+            self._meta = meta
+        return self._meta
+
+    @property
+    def columns(self):
+        return [column['name'] for column in self.meta['columns']]
+
+    @property
+    def rows(self):
+        return self.meta['rows']
+
+    def _build(self, key):
+        """把 CSV 转换为 .npy 列文件（先写入临时目录，完成后整体替换）"""
+        print(f"正在生成列式缓存: {self.csv_path} -> {self.cache_path}")
+        build_path = f"{self.cache_path}.tmp{os.getpid()}"
+        shutil.rmtree(build_path, ignore_errors=True)
+        os.makedirs(build_path)
+        try:
+            columns = None
+            if self.workers > 1:
+                try:
+                    columns, rows = self._build_parallel(build_path)
+                except ParallelCsvError as e:
+                    print(f"无法并行解析（{e}），改为按块读取")
+                    shutil.rmtree(build_path, ignore_errors=True)
+                    os.makedirs(build_path)
+            if columns is None:
+                columns, rows = self._build_chunked(build_path)
+
+            meta = {"source": key, "csv": os.path.basename(self.csv_path), "rows": rows, "columns": columns}
+            with open(os.path.join(build_path, 'meta.json'), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False, indent=2)
+            shutil.rmtree(self.cache_path, ignore_errors=True)
+            os.replace(build_path, self.cache_path)
+        except BaseException:
+            # 转换失败时删除临时目录，不留下半成品
+            shutil.rmtree(build_path, ignore_errors=True)
+            raise
+        print(f"列式缓存已生成: {rows} 行, {len(columns)} 列")
+        return meta
+
+    def _build_parallel(self, build_path):
+        """多进程解析到 int64/float64 列文件，整数列再逐列收窄，浮点列直接作为结果文件"""
+        names, arrays = read_csv_columns(self.csv_path, build_path, self.workers)
+        rows = len(arrays[0])
+        columns = []
+        for i, name in enumerate(names):
+            values, arrays[i] = arrays[i], None
+            wide_path = values.filename
+            if values.dtype.kind == 'i':
+                values = values.astype(narrow_int_dtype(int(values.min()), int(values.max())))
+                np.save(os.path.join(build_path, f'{i}.npy'), values)
+                os.remove(wide_path)
+            else:
+                os.replace(wide_path, os.path.join(build_path, f'{i}.npy'))
+            columns.append({"name": name, "file": f'{i}.npy', "dtype": values.dtype.name})
+            del values
+        return columns, rows
+
+    def _build_chunked(self, build_path):
+        """按块把 CSV 逐列追加写入原始二进制文件，再逐列收窄保存为 .npy"""
+        names = pd.read_csv(self.csv_path, nrows=0).columns.tolist()
+        raw_paths = [os.path.join(build_path, f'{i}.raw') for i in range(len(names))]
+
+        dtypes = None
+        lows, highs = [np.inf] * len(names), [-np.inf] * len(names)
+        filled = 0
+        raw_files = [open(path, 'wb') for path in raw_paths]
+        try:
+            for chunk in pd.read_csv(self.csv_path, chunksize=self.chunk_rows):
+                if dtypes is None:
+                    dtypes = []
+                    for name in names:
+                        if pd.api.types.is_integer_dtype(chunk[name]):
+                            dtypes.append(np.dtype(np.int64))
+                        elif pd.api.types.is_float_dtype(chunk[name]):
+                            dtypes.append(np.dtype(np.float64))
+                        else:
+                            raise ValueError(f"Column '{name}' is not numeric, cannot be cached")
+                for i, name in enumerate(names):
+                    values = chunk[name].to_numpy()
+                    if dtypes[i].kind == 'i' and values.dtype.kind == 'f':
+                        # 整数列在后面的块中出现小数或空值（pd.read_csv 读为 float64）：与 parallel_csv 相同改为 float64，
+                        # 已写入的部分就地转换，不重新解析 CSV
+                        raw_files[i].close()
+                        np.fromfile(raw_paths[i], dtype=dtypes[i]).astype(np.float64).tofile(raw_paths[i])
+                        raw_files[i] = open(raw_paths[i], 'ab')
+                        dtypes[i] = np.dtype(np.float64)
+                    elif not np.can_cast(values.dtype, dtypes[i], 'same_kind'):
+                        raise ValueError(f"Column '{name}' changes type after row {filled}")
+                    raw_files[i].write(np.ascontiguousarray(values, dtype=dtypes[i]).tobytes())
+                    if len(values):
+                        lows[i] = min(lows[i], values.min())
+                        highs[i] = max(highs[i], values.max())
+                filled += len(chunk)
+        finally:
+            for f in raw_files:
+                f.close()
+
+        # 整数列逐列收窄，同一时刻只有一列在内存中
+        columns = []
+        for i, name in enumerate(names):
+            values = np.fromfile(raw_paths[i], dtype=dtypes[i]) if dtypes is not None else np.empty(0)
+            if values.dtype.kind == 'i' and filled:
+                values = values.astype(narrow_int_dtype(int(lows[i]), int(highs[i])))
+            np.save(os.path.join(build_path, f'{i}.npy'), values)
+            os.remove(raw_paths[i])
+            columns.append({"name": name, "file": f'{i}.npy', "dtype": values.dtype.name})
+        return columns, filled
+
+    def load(self, columns=None, mmap=True):
+        """返回 {列名: 一维数组}，columns 为 None 时返回全部列；mmap 为 True 时以只读内存映射加载"""
+        meta = self.meta
+        files = {column['name']: column['file'] for column in meta['columns']}
+        columns = list(files) if columns is None else list(columns)
+        missing = [name for name in columns if name not in files]
+        if missing:
+            raise KeyError(f"Columns not found in {meta['csv']}: {missing}")
+        mode = 'r' if mmap else None
+        return {name: np.load(os.path.join(self.cache_path, files[name]), mmap_mode=mode) for name in columns}
+
+    def frame(self, columns=None, nrows=None):
+        """以 DataFrame 返回部分列（复制到内存），nrows 只取前若干行"""
+        arrays = self.load(columns)
+        return pd.DataFrame({name: np.array(values[:nrows]) for name, values in arrays.items()})
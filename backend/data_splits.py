@@ -0,0 +1,60 @@
+import json
+import os
+
+import numpy as np
+
+# 划分的存放顺序：特征矩阵按此顺序重排，每个划分是连续的一段行
+SPLITS = ('train', 'val', 'test')
+
+
+def save_splits(data_dir, X, y, split_rows):
+    """保存一份特征矩阵和目标变量（X.npy、y.npy）以及各划分的行范围（splits.json）
+
+    split_rows 为 {划分名: 原始行号数组}。矩阵按 SPLITS 的顺序重排后写入，每个划分是连续的一段行，
+    读取时直接切片即可得到不复制的视图；各行在原始数据中的行号保存在 row_index.npy。
+    逐个划分写入 .npy 的内存映射，内存占用只与最大的划分有关。
+    """
+    order = [np.asarray(split_rows[name]) for name in SPLITS]
+    n_rows = sum(len(rows) for rows in order)
+    X_out = np.lib.format.open_memmap(os.path.join(data_dir, 'X.npy'), mode='w+', dtype=X.dtype,
+                                      shape=(n_rows,) + X.shape[1:])
+    y_out = np.lib.format.open_memmap(os.path.join(data_dir, 'y.npy'), mode='w+', dtype=y.dtype, shape=(n_rows,))
+    ranges = {}
+    start = 0
+    for name, rows in zip(SPLITS, order):
+        X_out[start:start + len(rows)] = X[rows]
+        y_out[start:start + len(rows)] = y[rows]
+        ranges[name] = [start, start + len(rows)]
+        start += len(rows)
+    X_out.flush()
+    y_out.flush()
+    del X_out, y_out
+    np.save(os.path.join(data_dir, 'row_index.npy'), np.concatenate(order))
+
+    # splits.json 最后写入，读取方看到它时数组文件已经完整
+    path = os.path.join(data_dir, 'splits.json')
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({"rows": n_rows, "order": list(SPLITS), "splits": ranges}, f, indent=2)
+    os.replace(path + '.tmp', path)
+    return ranges
+
+
+def split_ranges(data_dir):
+    """返回 {划分名: [起始行, 结束行)}"""
+    with open(os.path.join(data_dir, 'splits.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)['splits']
+
+
+def load_splits(data_dir, *names):
+    """返回各划分的 [(X, y), ...]（默认依次为 train、val、test），训练、评估和校准脚本共用
+
+    各划分为 X.npy、y.npy 同一份只读内存映射上的视图，只有用到的行才会读入内存。
+    """
+    names = names or SPLITS
+    unknown = [name for name in names if name not in SPLITS]
+    if unknown:
+        raise ValueError(f"Expected split names from {SPLITS}, got {names}")
+    ranges = split_ranges(data_dir)
+    X = np.load(os.path.join(data_dir, 'X.npy'), mmap_mode='r')
+    y = np.load(os.path.join(data_dir, 'y.npy'), mmap_mode='r')
+    return [(X[slice(*ranges[name])], y[slice(*ranges[name])]) for name in names]
@@ -0,0 +1,98 @@
+import numpy as np
+
+
+class NativeContribExplainer:
+    """使用 LightGBM 原生 predict(pred_contrib=True) 计算 TreeSHAP 值
+
+    由 LightGBM 的多线程 C++ 实现计算，结果与 shap.TreeExplainer（tree_path_dependent）一致，
+    输出的最后一列为偏置项（即 expected_value），不需要导入 shap。
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._expected_value = None
+
+    @property
+    def expected_value(self):
+        # 偏置项对所有样本相同，首次使用时用一行数据取得（不在构造时预测，pre-fork 主进程中不能调用 predict）
+        if self._expected_value is None:
+            sample = np.zeros((1, self.model.num_feature()))
+            self._expected_value = float(self.model.predict(sample, pred_contrib=True)[0, -1])
+        return self._expected_value
+
+    def shap_values(self, features_array):
+        contributions = self.model.predict(features_array, pred_contrib=True)
+        return contributions[:, :-1]
+
+
+class ShapTreeExplainer:
+    """shap.TreeExplainer 的封装，shap 只在选择该后端时才导入"""
+
+    def __init__(self, model):
+        import shap
+        self.explainer = shap.TreeExplainer(model)
+        self.expected_value = float(np.ravel(self.explainer.expected_value)[0])
+
+    def shap_values(self, features_array):
+        shap_values = self.explainer.shap_values(features_array)
+        # 对于回归模型，shap_values 返回的是 (samples, features)
+        # 如果是某些版本的 shap，可能会返回一个列表，取第一个
+        if isinstance(shap_values, list):
+            shap_values = shap_values[0]
+        return shap_values
+
+
+class CatBoostShapExplainer:
+    """CatBoost 模型的 SHAP 值，使用 get_feature_importance(type='ShapValues')
+
+    输出的最后一列为 expected_value，与 LightGBM pred_contrib 的布局相同。
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._expected_value = None
+
+    @property
+    def expected_value(self):
+        if self._expected_value is None:
+            sample = np.zeros((1, len(self.model.feature_names_)))
+            self._expected_value = float(self._contributions(sample)[0, -1])
+        return self._expected_value
+
+    def _contributions(self, features_array):
+        from catboost import Pool
+        return self.model.get_feature_importance(Pool(features_array), type='ShapValues')
+
+    def shap_values(self, features_array):
+        return self._contributions(features_array)[:, :-1]
+
+
+EXPLAINER_BACKENDS = {
+    'native': NativeContribExplainer,
+    'shap': ShapTreeExplainer,
+}
+
+
+def load_explainer(backend, model):
+    """根据配置返回解释器：'native' 使用 LightGBM pred_contrib，'shap' 使用 shap.TreeExplainer"""
+    if backend not in EXPLAINER_BACKENDS:
+        raise ValueError(f"未知的解释后端: {backend}")
+    return EXPLAINER_BACKENDS[backend](model)
+
+
+def top_k_contributions(shap_values, k):
+    """按绝对贡献值选出每行前 k 个特征，返回 (indices, values)，均为 (N, k) 数组
+
+    对整个矩阵一次完成：先用 argpartition 取出前 k 个，再只对这 k 列排序，
+    每行按 |贡献| 从大到小排列。
+    """
+    n_features = shap_values.shape[1]
+    magnitude = np.abs(shap_values)
+    if k < n_features:
+        candidates = np.argpartition(-magnitude, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(n_features), shap_values.shape)
+    # 候选列内按 (|贡献| 降序, 特征序号升序) 排序，保证结果确定
+    order = np.lexsort((candidates, -np.take_along_axis(magnitude, candidates, axis=1)), axis=1)
+    indices = np.take_along_axis(candidates, order, axis=1)
+    return indices, np.take_along_axis(shap_values, indices, axis=1)
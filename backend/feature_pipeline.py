@@ -0,0 +1,148 @@
+import json
+import os
+import pickle
+
+import numpy as np
+
+# 可用的逐行统计量（跨全部输入特征），另外 qNN 表示第 NN 百分位数（1 ~ 99）
+ROW_STATS = ('sum', 'mean', 'std', 'min', 'max', 'median')
+# 推荐的派生特征（特征工程默认不添加，通过 FEATURE_TRANSFORMS 启用；启用后 /predict 的 shap_values 包含 row_* 各项）
+RECOMMENDED_TRANSFORMS = ('sum', 'std', 'min', 'max', 'q25', 'median', 'q75')
+# 输出矩阵的类型：训练与服务使用同一类型，派生特征的取值逐位相同
+OUTPUT_DTYPE = np.float32
+# 每块处理的行数，块内的临时数组保持在 CPU 缓存附近
+CHUNK_ROWS = 65536
+
+
+def pipeline_path(models_dir):
+    """特征流水线文件路径（与 feature_columns.pkl 保存在同一目录）"""
+    return os.path.join(models_dir, 'feature_pipeline.json')
+
+
+def transform_splits(models_dir, splits):
+    """按 models_dir 中的特征列和特征流水线对 [(X, y), ...] 的每个 X 追加派生特征
+
+    返回变换后的 [(X, y), ...] 与模型的全部输入列（原始特征之后为派生特征），
+    训练、评估、对比、校准脚本都通过这里得到与后端预测时相同的输入。
+    """
+    with open(os.path.join(models_dir, 'feature_columns.pkl'), 'rb') as f:
+        feature_columns = pickle.load(f)
+    pipeline = FeaturePipeline.load_or_identity(pipeline_path(models_dir), feature_columns)
+    return [(pipeline.transform(X), y) for X, y in splits], pipeline.output_columns
+
+
+def _quantile_position(transform):
+    """median / qNN 对应的分位数，其他统计量返回 None"""
+    if transform == 'median':
+        return 0.5
+    if transform.startswith('q') and transform[1:].isdigit() and 1 <= int(transform[1:]) <= 99:
+        return int(transform[1:]) / 100
+    return None
+
+
+class FeaturePipeline:
+    """训练与服务共用的特征变换：原始特征之后追加跨特征的逐行统计量（row_sum、row_std、row_q25 等）
+
+    变换只定义一次，保存为 models/feature_pipeline.json，特征工程、训练脚本和后端都从该文件加载。
+    transform 按块处理，每块只做一次类型转换、一次按行求和与一次按行排序，所有统计量都由这几步的结果得到：
+    mean = sum / n，std 为总体标准差（两遍法），min/max/分位数直接从排序后的行中取出（分位数为线性插值，
+    与 np.quantile 默认方法相同）。输出为 float32，输入含 NaN 的行派生特征均为 NaN（缺失值）。
+    transforms 为空时 transform 原样返回输入，与不使用流水线时相同。
+    """
+
+    def __init__(self, input_columns, transforms=()):
+        self.input_columns = list(input_columns)
+        self.transforms = tuple(transforms)
+        unknown = [t for t in self.transforms if t not in ROW_STATS and _quantile_position(t) is None]
+        if unknown:
+            raise ValueError(f"Unknown feature transforms: {unknown}, expected {ROW_STATS} or q1 ~ q99")
+        if len(set(self.transforms)) != len(self.transforms):
+            raise ValueError(f"Duplicate feature transforms: {list(self.transforms)}")
+        if self.transforms and not self.input_columns:
+            raise ValueError("Feature transforms need at least one input column")
+        self.output_columns = self.input_columns + [f'row_{t}' for t in self.transforms]
+
+        # 各分位数在排序后的行中的下标和插值权重：第 lo 个与第 lo + 1 个值按 frac 插值
+        n = len(self.input_columns)
+        self._quantiles = []
+        for i, transform in enumerate(self.transforms):
+            q = 1.0 if transform == 'max' else 0.0 if transform == 'min' else _quantile_position(transform)
+            if q is not None:
+                position = q * (n - 1)
+                lo = min(int(np.floor(position)), n - 1)
+                self._quantiles.append((n + i, lo, min(lo + 1, n - 1), position - lo))
+        self._needs_sum = any(t in ('sum', 'mean', 'std') for t in self.transforms)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['input_columns'], data['transforms'])
+
+    @classmethod
+    def load_or_identity(cls, path, input_columns):
+        """流水线文件存在时加载并校验输入列，否则返回不做变换的流水线（兼容没有派生特征的旧模型）"""
+        if not os.path.exists(path):
+            return cls(input_columns)
+        pipeline = cls.load(path)
+        if pipeline.input_columns != list(input_columns):
+            raise ValueError(f"Feature pipeline input columns {pipeline.input_columns} "
+                             f"do not match feature columns {list(input_columns)}")
+        return pipeline
+
+    def save(self, path):
+        data = {
+            "input_columns": self.input_columns,
+            "transforms": list(self.transforms),
+            "output_columns": self.output_columns,
+        }
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(path + '.tmp', path)
+
+    def transform(self, X, chunk_rows=CHUNK_ROWS):
+        """把 (N, 输入特征数) 的矩阵变换为 (N, 输出特征数) 的 float32 矩阵"""
+        if not self.transforms:
+            return X
+        X = np.asarray(X)
+        n = len(self.input_columns)
+        if X.ndim != 2 or X.shape[1] != n:
+            raise ValueError(f"Invalid number of features. Expected {n}, got {X.shape[-1] if X.ndim else 0}")
+        out = np.empty((len(X), len(self.output_columns)), dtype=OUTPUT_DTYPE)
+        block = np.empty((min(chunk_rows, len(X)), n), dtype=OUTPUT_DTYPE)
+        for lo in range(0, len(X), chunk_rows):
+            hi = min(lo + chunk_rows, len(X))
+            self._transform_block(X[lo:hi], out[lo:hi], block[:hi - lo])
+        return out
+
+    def _transform_block(self, x, out, block):
+        n = len(self.input_columns)
+        # 原始特征先转为输出类型，派生特征都由这份副本计算，与输出矩阵中的原始特征一致
+        block[:] = x
+        out[:, :n] = block
+        missing = None
+        if self._needs_sum:
+            total = block.sum(axis=1, dtype=np.float64)
+            missing = np.isnan(total)
+            mean = total / n
+            for i, transform in enumerate(self.transforms, n):
+                if transform == 'sum':
+                    out[:, i] = total
+                elif transform == 'mean':
+                    out[:, i] = mean
+                elif transform == 'std':
+                    deviation = block - mean[:, None]
+                    out[:, i] = np.sqrt(np.einsum('ij,ij->i', deviation, deviation) / n)
+        if self._quantiles:
+            # float32 的按行排序有 SIMD 实现，比整数类型快数倍；NaN 排在最后
+            block.sort(axis=1)
+            for i, lo, hi, frac in self._quantiles:
+                if frac == 0:
+                    out[:, i] = block[:, lo]
+                else:
+                    low = block[:, lo].astype(np.float64)
+                    out[:, i] = low + (block[:, hi] - low) * frac
+            if missing is None:
+                missing = np.isnan(block[:, -1])
+        if missing is not None and missing.any():
+            out[missing, n:] = np.nan
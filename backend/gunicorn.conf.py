@@ -0,0 +1,29 @@
+# gunicorn 多进程部署配置
+# 启动方式：cd backend && gunicorn -c gunicorn.conf.py
+#
+# preload_app 使模型、特征列和 SHAP 解释器只在主进程中加载一次，
+# fork 出的 worker 以写时复制方式共享这些内存页。
+# 注意：主进程中不要执行预测，LightGBM 的 OpenMP 线程池在 fork 之后不可用。
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+wsgi_app = 'app:create_app(start_background=False)'
+preload_app = True
+
+
+def when_ready(server):
+    # 将已加载的对象移出分代回收，避免 worker 中的 GC 写入对象头导致共享页被复制
+    gc.freeze()
+    server.log.info("模型已在主进程加载，开始 fork %s 个 worker", server.cfg.workers)
+
+
+def post_fork(server, worker):
+    # 模型文件监控线程在每个 worker 中单独启动，热更新只替换该 worker 的模型
+    # STARTUP_MODE=background/lazy 时模型不在主进程加载，每个 worker 各自加载一份，不共享内存
+    from app import start_background_tasks
+    start_background_tasks()
@@ -0,0 +1,113 @@
+import os
+import threading
+import queue
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    """将并发到达的单行请求合并为一个批次执行
+
+    后台线程收集时间窗口内（或达到最大批量）到达的请求，按提交时的 key 分组，
+    每组拼接成矩阵后调用一次 batch_fn(rows, *key)，再把每行结果分发给对应的调用方。
+    batch_fn 接收形状为 (N, F) 的矩阵，返回若干个首维长度为 N 的序列。
+    后台线程在首次提交时按进程启动，因此可以在 pre-fork 的主进程中创建。
+    on_batch 可选，每调用一次 batch_fn 以批量大小调用一次（用于监控）。
+    """
+
+    def __init__(self, batch_fn, window_ms=2.0, max_batch_size=64, on_batch=None):
+        self.batch_fn = batch_fn
+        self.on_batch = on_batch
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.batch_count = 0
+        self.request_count = 0
+        self._queue = None
+        self._pid = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        """fork 之后线程不会被继承，在当前进程中重新创建队列和后台线程（调用方持有锁）"""
+        if self._pid != os.getpid():
+            self._queue = queue.Queue()
+            threading.Thread(target=self._run, args=(self._queue,), name='micro-batcher', daemon=True).start()
+            self._pid = os.getpid()
+
+    def submit(self, row, key=()):
+        """提交一行特征，返回 Future，结果为该行对应的各输出；key 相同的请求合并为一批，并作为 batch_fn 的其余参数"""
+        future = Future()
+        with self._lock:
+            if not self._closed:
+                self._ensure_started()
+                self._queue.put((row, key, future))
+                return future
+
+        # 已关闭（模型已被替换）时直接在当前线程中计算
+        try:
+            outputs = self.batch_fn(np.asarray(row).reshape(1, -1), *key)
+            future.set_result(tuple(output[0] for output in outputs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def close(self):
+        """处理完已提交的请求后停止后台线程"""
+        with self._lock:
+            if not self._closed and self._pid == os.getpid():
+                self._queue.put(None)
+            self._closed = True
+
+    def _collect(self, requests):
+        """阻塞等待第一个请求，然后在时间窗口内继续收集，返回 (批次, 是否收到停止信号)"""
+        item = requests.get()
+        if item is None:
+            return [], True
+        batch = [item]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    item = requests.get(timeout=remaining)
+                else:
+                    item = requests.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self, requests):
+        stopped = False
+        while not stopped:
+            batch, stopped = self._collect(requests)
+            groups = {}
+            for row, key, future in batch:
+                groups.setdefault(key, []).append((row, future))
+            for key, group in groups.items():
+                self._run_group(key, group)
+
+    def _run_group(self, key, group):
+        rows = np.vstack([row for row, _ in group])
+        try:
+            outputs = self.batch_fn(rows, *key)
+        except Exception as e:
+            for _, future in group:
+                future.set_exception(e)
+            return
+        finally:
+            self.batch_count += 1
+            self.request_count += len(group)
+            if self.on_batch is not None:
+                self.on_batch(len(group))
+
+        for i, (_, future) in enumerate(group):
+            future.set_result(tuple(output[i] for output in outputs))
+
+    def mean_batch_size(self):
+        """平均批量大小"""
+        return self.request_count / self.batch_count if self.batch_count else 0.0
@@ -0,0 +1,390 @@
+import os
+import pickle
+import threading
+import time
+
+import numpy as np
+
+from tree_engine import load_predictor
+from explanations import load_explainer, CatBoostShapExplainer
+from micro_batcher import MicroBatcher
+from conformal import ConformalIntervals, conformal_path
+from feature_pipeline import FeaturePipeline
+
+
+# 集成模式的模型名：各模型分别对整批数据预测一次，再按权重加权平均
+ENSEMBLE = 'ensemble'
+
+
+def get_file_version(path):
+    """根据文件的修改时间和大小生成版本号"""
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def get_rss_bytes():
+    """当前进程的常驻内存（字节），非 Linux 系统返回 None"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def load_booster(path):
+    """导入 lightgbm 并加载文本模型"""
+    import lightgbm as lgb
+    return lgb.Booster(model_file=path)
+
+
+class ServedModel:
+    """单个已加载的模型：预测器、SHAP 解释器、版本号以及加载耗时和内存占用
+
+    memory_bytes 为加载前后进程 RSS 的差值，是近似值。
+    解释器可以延迟到首次访问 explainer 时再创建（lazy_explainer=True，mmap 引擎总是如此）。
+    conformal 为模型旁边的共形区间校准结果（ConformalIntervals），没有校准文件时为 None。
+    """
+
+    def __init__(self, name, kind, model, predictor, explainer_factory, version,
+                 load_seconds=None, memory_bytes=None, import_seconds=0.0, conformal=None, lazy_explainer=False):
+        self.name = name
+        self.kind = kind
+        self.model = model
+        self.predictor = predictor
+        self.version = version
+        self.load_seconds = load_seconds
+        self.memory_bytes = memory_bytes
+        self.import_seconds = import_seconds
+        self.conformal = conformal
+        self.lazy_explainer = lazy_explainer
+        self.explainer_seconds = None
+        self._explainer = None
+        self._explainer_factory = explainer_factory
+        self._lock = threading.Lock()
+
+    @property
+    def num_features(self):
+        """模型的输入特征数"""
+        if self.kind == 'catboost':
+            return len(self.model.feature_names_)
+        if self.model is not None:
+            return self.model.num_feature()
+        return self.predictor.num_features
+
+    @property
+    def explainer(self):
+        """SHAP 解释器，首次访问时创建"""
+        return self._explainer if self._explainer is not None else self.init_explainer()
+
+    def init_explainer(self):
+        """创建 SHAP 解释器并记录耗时（已创建时直接返回）"""
+        if self._explainer is None:
+            with self._lock:
+                if self._explainer is None:
+                    start = time.perf_counter()
+                    self._explainer = self._explainer_factory(self.model)
+                    self.explainer_seconds = time.perf_counter() - start
+        return self._explainer
+
+    @classmethod
+    def load(cls, name, kind, path, engine='lightgbm', explainer_backend='native', lazy_explainer=False):
+        """加载 LightGBM（.txt）或 CatBoost（.cbm）模型，模型库在此时才导入
+
+        LightGBM 模型使用 mmap 引擎时，预测直接使用映射的二进制模型，
+        Booster 只有 SHAP 解释需要，到创建解释器时才导入 lightgbm 并解析文本模型，
+        因此 mmap 引擎总是延迟创建解释器（否则加载时仍要解析文本模型，load_seconds 也不包含这部分耗时）。
+        """
+        rss_before = get_rss_bytes()
+        start = time.perf_counter()
+        version = get_file_version(path)
+
+        if kind == 'lightgbm' and engine == 'mmap':
+            import_seconds = 0.0
+            model = None
+            predictor = load_predictor(engine, model, path)
+            explainer_factory = lambda _: load_explainer(explainer_backend, load_booster(path))
+            lazy_explainer = True
+        elif kind == 'lightgbm':
+            import lightgbm as lgb
+            import_seconds = time.perf_counter() - start
+            model = lgb.Booster(model_file=path)
+            predictor = load_predictor(engine, model, path)
+            explainer_factory = lambda booster: load_explainer(explainer_backend, booster)
+        elif kind == 'catboost':
+            from catboost import CatBoostRegressor
+            import_seconds = time.perf_counter() - start
+            model = CatBoostRegressor()
+            model.load_model(path)
+            predictor = model
+            explainer_factory = CatBoostShapExplainer
+        else:
+            raise ValueError(f"未知的模型类型: {kind}")
+
+        conformal_file = conformal_path(path)
+        conformal = ConformalIntervals.load(conformal_file) if os.path.exists(conformal_file) else None
+
+        load_seconds = time.perf_counter() - start
+        rss_after = get_rss_bytes()
+        memory_bytes = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+        memory = f", 内存 {memory_bytes / 1024 ** 2:.1f} MB" if memory_bytes is not None else ""
+        print(f"模型加载成功: {name} ({path}), 耗时 {load_seconds:.2f} 秒{memory}")
+        served = cls(name, kind, model, predictor, explainer_factory, version, load_seconds, memory_bytes, import_seconds,
+                     conformal, lazy_explainer)
+        if not lazy_explainer:
+            served.init_explainer()
+        return served
+
+
+class ModelBundle:
+    """一次加载得到的全部模型、特征列、特征流水线和 SHAP 解释器
+
+    加载完成后不再修改。热更新时整体替换为新的实例，
+    请求在开始时取得当前实例，因此进行中的请求始终使用同一组模型完成。
+    predict/explain 的 name 为模型名、'ensemble' 或 None（默认模型）。
+    predict/explain 接收原始特征（feature_columns），先经过特征流水线（集成模式下也只变换一次）再交给模型；
+    SHAP 值按模型的输入特征（model_columns，即原始特征加派生特征）排列。
+    """
+
+    def __init__(self, models, default_model, feature_columns, ensemble_weights=None, on_predict=None, pipeline=None):
+        if default_model not in models:
+            raise ValueError(f"默认模型未加载: {default_model}")
+        self.models = models
+        self.default_model = default_model
+        self.feature_columns = feature_columns
+        self.pipeline = pipeline if pipeline is not None else FeaturePipeline(feature_columns)
+        self.model_columns = self.pipeline.output_columns
+        self.version = ','.join(f"{name}:{model.version}" for name, model in models.items())
+        if self.pipeline.transforms:
+            # 派生特征变化时版本号也变化，预测缓存随之清空
+            self.version += f",pipeline:{'+'.join(self.pipeline.transforms)}"
+        self.ensemble_weights = self._normalize_weights(ensemble_weights)
+        self.on_predict = on_predict
+        self.batcher = None
+
+    def _normalize_weights(self, weights):
+        """只保留已加载、权重为正的模型，并归一化为和为 1"""
+        if weights is None:
+            weights = {name: 1.0 for name in self.models}
+        for name in weights:
+            if name not in self.models:
+                print(f"集成权重中的模型未加载，已忽略: {name}")
+        weights = {name: float(weight) for name, weight in weights.items() if name in self.models and weight > 0}
+        total = sum(weights.values())
+        return {name: weight / total for name, weight in weights.items()} if total > 0 else {}
+
+    @classmethod
+    def load(cls, model_files, feature_columns_path, default_model='lightgbm', engine='lightgbm',
+             explainer_backend='native', ensemble_weights=None, micro_batch_window_ms=0,
+             micro_batch_max_size=64, on_batch=None, on_predict=None, lazy_explainer=False,
+             feature_pipeline_path=None):
+        """从模型文件、特征列文件和特征流水线文件加载
+
+        model_files 为 {模型名: (类型, 文件路径)}；默认模型必须存在，
+        其他模型文件不存在或缺少对应依赖（如 catboost）时跳过。
+        特征流水线文件不存在时不做变换（没有派生特征的模型）。
+        模型的输入特征数与特征流水线的输出不一致（如流水线变化后尚未重新训练）时，默认模型报错，其他模型跳过。
+        """
+        # 加载特征列
+        with open(feature_columns_path, 'rb') as f:
+            feature_columns = pickle.load(f)
+        print(f"特征列加载成功: {feature_columns}")
+        pipeline = FeaturePipeline.load_or_identity(feature_pipeline_path, feature_columns) \
+            if feature_pipeline_path is not None else FeaturePipeline(feature_columns)
+        if pipeline.transforms:
+            print(f"特征流水线加载成功: 派生特征 {pipeline.output_columns[len(feature_columns):]}")
+
+        models = {}
+        for name, (kind, path) in model_files.items():
+            if name != default_model and not os.path.exists(path):
+                print(f"未找到模型文件，跳过: {name} ({path})")
+                continue
+            try:
+                model = ServedModel.load(name, kind, path, engine, explainer_backend, lazy_explainer)
+            except ImportError as e:
+                if name == default_model:
+                    raise
+                print(f"缺少依赖，跳过模型 {name}: {str(e)}")
+                continue
+            if model.num_features != len(pipeline.output_columns):
+                message = (f"模型 {name} 的输入特征数为 {model.num_features}，"
+                           f"与特征流水线的输出特征数 {len(pipeline.output_columns)} 不一致")
+                if name == default_model:
+                    raise ValueError(message)
+                print(f"{message}，跳过")
+                continue
+            models[name] = model
+        print(f"推理引擎: {engine}, SHAP 解释后端: {explainer_backend}")
+
+        bundle = cls(models, default_model, feature_columns, ensemble_weights, on_predict, pipeline)
+        if len(models) > 1:
+            print(f"已加载模型: {list(models)}, 默认模型: {default_model}, 集成权重: {bundle.ensemble_weights}")
+
+        # 初始化微批处理调度器（所有模型共用，按模型和是否计算 SHAP 分组执行）
+        if micro_batch_window_ms > 0:
+            bundle.batcher = MicroBatcher(bundle.predict_rows, micro_batch_window_ms,
+                                          micro_batch_max_size, on_batch)
+            print(f"微批处理已启用: 窗口 {micro_batch_window_ms}ms, 最大批量 {micro_batch_max_size}")
+
+        return bundle
+
+    def resolve(self, name):
+        """返回实际使用的模型名，未知模型返回 None"""
+        if name is None:
+            return self.default_model
+        if name == ENSEMBLE:
+            return name if self.ensemble_weights else None
+        return name if name in self.models else None
+
+    def available_models(self):
+        """可在 model 参数中使用的模型名"""
+        return list(self.models) + ([ENSEMBLE] if self.ensemble_weights else [])
+
+    def _predict_model(self, model, features_array):
+        start = time.perf_counter()
+        predictions = model.predictor.predict(features_array)
+        if self.on_predict is not None:
+            self.on_predict(model.name, time.perf_counter() - start)
+        return predictions
+
+    def predict(self, features_array, name=None):
+        """对整批原始特征矩阵预测；集成模式下每个模型只调用一次，结果按权重加权平均"""
+        return self._predict(self.pipeline.transform(features_array), name)
+
+    def _predict(self, features_array, name):
+        name = name or self.default_model
+        if name != ENSEMBLE:
+            return self._predict_model(self.models[name], features_array)
+        predictions = np.zeros(len(features_array))
+        for model_name, weight in self.ensemble_weights.items():
+            predictions += weight * self._predict_model(self.models[model_name], features_array)
+        return predictions
+
+    def init_explainers(self, name=None):
+        """创建模型（ensemble 时为各成员模型）的 SHAP 解释器，已创建时直接返回"""
+        name = name or self.default_model
+        for member in (self.ensemble_weights if name == ENSEMBLE else [name]):
+            self.models[member].init_explainer()
+
+    def explain(self, features_array, name=None):
+        """计算原始特征矩阵的 SHAP 值，返回形状为 (samples, len(model_columns)) 的数组
+
+        SHAP 值对模型输出是线性的，集成模式下按权重加权求和即为加权平均模型的 SHAP 值。
+        """
+        return self._explain(self.pipeline.transform(features_array), name)
+
+    def _explain(self, features_array, name):
+        name = name or self.default_model
+        if name != ENSEMBLE:
+            return self.models[name].explainer.shap_values(features_array)
+        shap_values = np.zeros(features_array.shape)
+        for model_name, weight in self.ensemble_weights.items():
+            shap_values += weight * self.models[model_name].explainer.shap_values(features_array)
+        return shap_values
+
+    def expected_value(self, name=None):
+        """SHAP 基准值（base_value）"""
+        name = name or self.default_model
+        if name != ENSEMBLE:
+            return self.models[name].explainer.expected_value
+        return sum(weight * self.models[model_name].explainer.expected_value
+                   for model_name, weight in self.ensemble_weights.items())
+
+    def interval_levels(self, coverage, name=None):
+        """校验覆盖率列表，返回区间查表用的下标；模型没有校准结果时抛出 ValueError"""
+        name = name or self.default_model
+        conformal = self.models[name].conformal if name != ENSEMBLE else None
+        if conformal is None:
+            raise ValueError(f"No conformal calibration available for model '{name}'")
+        return conformal.level_indices(coverage)
+
+    def intervals(self, predictions, level_indices, name=None):
+        """预测区间 (lower, upper)，形状均为 (N, 覆盖率个数)，level_indices 由 interval_levels 得到"""
+        return self.models[name or self.default_model].conformal.intervals(predictions, level_indices)
+
+    def predict_with_shap(self, features_array, name=None):
+        """对原始特征矩阵进行预测并计算 SHAP 值，返回 (predictions, shap_values)，特征流水线只执行一次"""
+        features_array = self.pipeline.transform(features_array)
+        return self._predict(features_array, name), self._explain(features_array, name)
+
+    def predict_rows(self, features_array, name=None, explain=True):
+        """微批处理的批量函数：返回 (predictions, shap_values)，explain 为 False 时不计算 SHAP，shap_values 各行为 None"""
+        if explain:
+            return self.predict_with_shap(features_array, name)
+        return self.predict(features_array, name), [None] * len(features_array)
+
+    def warm_up(self, explain=True):
+        """用一条测试数据让每个模型执行预测（和 SHAP 计算），确保模型可用并完成惰性初始化
+
+        延迟创建解释器的模型（lazy_explainer）不做 SHAP 预热，解释器留到首次需要解释时再创建。
+        """
+        sample = np.zeros((1, len(self.feature_columns)))
+        for name in self.available_models():
+            predictions = self.predict(sample, name)
+            if not np.all(np.isfinite(predictions)):
+                raise ValueError(f"模型预热失败：{name} 测试预测结果无效")
+            members = self.ensemble_weights if name == ENSEMBLE else [name]
+            if any(self.models[member].lazy_explainer for member in members):
+                continue
+            if explain and self.explain(sample, name).shape != (1, len(self.model_columns)):
+                raise ValueError(f"模型预热失败：{name} SHAP 值形状无效")
+
+    def startup_profile(self):
+        """各模型的导入、解析和解释器初始化耗时之和（秒），解释器尚未创建时为 None"""
+        explainer_seconds = [model.explainer_seconds for model in self.models.values()]
+        return {
+            "model_import": sum(model.import_seconds for model in self.models.values()),
+            "model_parse": sum(model.load_seconds - model.import_seconds for model in self.models.values()),
+            "explainer_init": sum(explainer_seconds) if None not in explainer_seconds else None,
+        }
+
+    def close(self):
+        """模型被替换后释放后台资源，已提交的请求仍会完成"""
+        if self.batcher is not None:
+            self.batcher.close()
+
+
+class ModelWatcher:
+    """轮询模型文件和特征列文件，发生变化时调用 on_change
+
+    线程在 fork 后不会被继承，start() 按进程启动，可在每个 worker 中调用。
+    """
+
+    def __init__(self, paths, interval, on_change):
+        self.paths = paths
+        self.interval = interval
+        self.on_change = on_change
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _signature(self):
+        signature = []
+        for path in self.paths:
+            try:
+                signature.append(get_file_version(path))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+        threading.Thread(target=self._run, name='model-watcher', daemon=True).start()
+
+    def _run(self):
+        last = self._signature()
+        while True:
+            time.sleep(self.interval)
+            current = self._signature()
+            if current == last:
+                continue
+            # 文件可能仍在写入，等待一个周期确认不再变化
+            time.sleep(self.interval)
+            if self._signature() != current:
+                continue
+            try:
+                self.on_change()
+            except Exception as e:
+                print(f"模型热更新失败，继续使用当前模型: {str(e)}")
+            last = current
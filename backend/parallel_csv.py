@@ -0,0 +1,130 @@
+import io
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# 每个字节范围的最大大小，限制每个进程一次解析的数据量
+MAX_RANGE_BYTES = 64 << 20
+# 推断列类型时读取的行数
+SAMPLE_ROWS = 1000
+
+
+class ParallelCsvError(ValueError):
+    """文件不适合按字节范围并行解析（空文件、空行、非数值列等），调用方可改用 pd.read_csv"""
+
+
+def split_ranges(path, n_ranges):
+    """把表头之后的数据按字节均分为最多 n_ranges 段，起止位置都对齐到行首，返回 [(起始, 结束)]"""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        f.readline()
+        bounds = [f.tell()]
+        for i in range(1, n_ranges):
+            # 从目标位置的前一个字节读到行尾，目标位置恰好是行首时不会跳过这一行
+            f.seek(bounds[0] + (size - bounds[0]) * i // n_ranges - 1)
+            f.readline()
+            position = f.tell()
+            if bounds[-1] < position < size:
+                bounds.append(position)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _read_range(path, start, end):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return f.read(end - start)
+
+
+def _count_rows(path, start, end):
+    """字节范围内的行数（按换行符统计，最后一行可以没有换行符）"""
+    data = _read_range(path, start, end)
+    return data.count(b'\n') + (len(data) > 0 and not data.endswith(b'\n'))
+
+
+def _allocate(path, dtype, n_rows):
+    """创建长度为 n_rows 的 .npy 文件，内容由各进程通过内存映射写入"""
+    np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(n_rows,))
+
+
+def _parse_range(path, names, start, end, row_offset, n_rows, dtypes, column_paths):
+    """解析一个字节范围并写入各列输出数组的 [row_offset, row_offset + n_rows) 段
+
+    返回推断类型无法无损写入计划类型的列序号（如计划为 int64 的列在这一段中出现小数），没有时返回空列表。
+    """
+    frame = pd.read_csv(io.BytesIO(_read_range(path, start, end)), header=None, names=names)
+    if len(frame) != n_rows:
+        raise ParallelCsvError(f"Parsed {len(frame)} rows in bytes {start}-{end}, expected {n_rows} "
+                               "(blank lines or quoted newlines are not supported)")
+    mismatched = [i for i, dtype in enumerate(dtypes) if not np.can_cast(frame.dtypes.iloc[i], dtype, 'safe')]
+    if mismatched:
+        return mismatched
+    # 共享映射的写入对其他进程立即可见，不需要 flush
+    for i, column_path in enumerate(column_paths):
+        out = np.load(column_path, mmap_mode='r+')
+        out[row_offset:row_offset + n_rows] = frame.iloc[:, i].to_numpy()
+        del out
+    return []
+
+
+def plan_dtypes(path):
+    """根据前 SAMPLE_ROWS 行推断各列类型：整数列为 int64，浮点列为 float64，返回 (列名, 类型)"""
+    sample = pd.read_csv(path, nrows=SAMPLE_ROWS)
+    if sample.empty:
+        raise ParallelCsvError(f"No data rows in {path}")
+    dtypes = []
+    for name in sample.columns:
+        if pd.api.types.is_integer_dtype(sample[name]):
+            dtypes.append(np.dtype(np.int64))
+        elif pd.api.types.is_float_dtype(sample[name]):
+            dtypes.append(np.dtype(np.float64))
+        else:
+            raise ParallelCsvError(f"Column '{name}' is not numeric")
+    return sample.columns.tolist(), dtypes
+
+
+def read_csv_columns(path, out_dir, workers=None, max_range_bytes=MAX_RANGE_BYTES):
+    """多进程解析数值 CSV，返回 (列名, [每列一个一维数组])，结果与 pd.read_csv(path) 的各列相同
+
+    文件按行对齐的字节范围切分，先并行统计各段行数得到每段在结果中的起始行，
+    再并行解析各段，直接写入 out_dir/column_<序号>.npy 的共享内存映射中各自的位置，不需要再拼接。
+    out_dir 为 /dev/shm 等内存文件系统时即为共享内存；返回的数组为这些文件的只读 mmap。
+    某段中整数列出现小数时（pd.read_csv 会把整列读为 float64），该列改为 float64 后重新解析。
+    workers 为 1 时在当前进程中依次解析各段。
+    """
+    workers = workers or os.cpu_count() or 1
+    names, dtypes = plan_dtypes(path)
+    n_ranges = max(workers * 4 if workers > 1 else 1, math.ceil(os.path.getsize(path) / max_range_bytes))
+    ranges = split_ranges(path, n_ranges)
+    column_paths = [os.path.join(out_dir, f'column_{i}.npy') for i in range(len(names))]
+    starts, ends = [start for start, _ in ranges], [end for _, end in ranges]
+
+    # 支持 fork 时使用 fork 启动子进程，无需重新导入调用方的主模块
+    context = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else None)
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=context) if workers > 1 else None
+    map_ranges = executor.map if executor is not None else map
+    try:
+        counts = list(map_ranges(_count_rows, [path] * len(ranges), starts, ends))
+        offsets = np.concatenate([[0], np.cumsum(counts)]).tolist()
+        while True:
+            for column_path, dtype in zip(column_paths, dtypes):
+                _allocate(column_path, dtype, offsets[-1])
+            n = len(ranges)
+            results = list(map_ranges(_parse_range, [path] * n, [names] * n, starts, ends, offsets[:-1], counts,
+                                      [dtypes] * n, [column_paths] * n))
+            mismatched = sorted(set().union(*results))
+            if not mismatched:
+                break
+            for i in mismatched:
+                if dtypes[i] != np.float64:
+                    dtypes[i] = np.dtype(np.float64)
+                else:
+                    raise ParallelCsvError(f"Column '{names[i]}' is not numeric")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return names, [np.load(column_path, mmap_mode='r') for column_path in column_paths]
@@ -0,0 +1,66 @@
+import threading
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """以特征向量元组为键的有界 LRU 缓存，保存预测值和 SHAP 值
+
+    条目中的 SHAP 值可以为空（请求 explain=false 时只缓存预测值）。
+    模型版本变化时调用 reset() 清空缓存并重新计数命中、未命中和淘汰次数。
+    """
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self.model_version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, explain=True):
+        """查找缓存，返回 (prediction, shap_row)；需要 SHAP 而条目中没有时视为未命中"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (explain and entry[1] is None):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, prediction, shap_row=None, model_version=None):
+        """写入缓存，超出容量时淘汰最久未使用的条目；来自旧模型版本的结果不写入"""
+        with self._lock:
+            if model_version is not None and model_version != self.model_version:
+                return
+            entry = self._entries.get(key)
+            if entry is not None and shap_row is None:
+                shap_row = entry[1]
+            self._entries[key] = (prediction, shap_row)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def reset(self, model_version):
+        """模型版本变化时清空缓存，统计从新版本开始重新计数"""
+        with self._lock:
+            if model_version != self.model_version:
+                self._entries.clear()
+                self.hits = self.misses = self.evictions = 0
+                self.model_version = model_version
+
+    def stats(self):
+        """返回缓存统计信息"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+                "model_version": self.model_version
+            }
@@ -0,0 +1,72 @@
+import math
+
+import numpy as np
+
+# 默认返回的预测值分位数
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+class FeatureMarginals:
+    """训练集中各特征取值的经验边际分布（feature_marginals.json），按逆 CDF 向量化抽样"""
+
+    def __init__(self, marginals):
+        self.values = {}
+        self.cdf = {}
+        for name, marginal in marginals.items():
+            counts = np.asarray(marginal['counts'], dtype=np.float64)
+            self.values[name] = np.asarray(marginal['values'], dtype=np.float64)
+            # 最后一项为 total / total，恰好为 1.0，random() 的取值 [0, 1) 不会越界
+            self.cdf[name] = np.cumsum(counts) / counts.sum()
+
+    def sample_indices(self, name, rng, n):
+        """抽取 n 个取值在 values[name] 中的下标"""
+        return np.searchsorted(self.cdf[name], rng.random(n), side='right')
+
+
+def simulate(predict, base, columns, marginals, names, n_samples, rng, chunk_rows=65536):
+    """蒙特卡洛模拟：names 中的特征按边际分布独立抽样，其余特征固定为 base，返回 (预测值, 实际调用模型的行数)
+
+    被扰动的特征都是离散取值，联合取值组合数不超过样本数时，只对每种组合预测一次，
+    样本的预测值按组合下标从结果表中取出（与逐个预测结果相同）；否则按 chunk_rows 行一块抽样并预测。
+    两种方式都按块生成，除结果数组外内存占用只与块大小有关。
+    """
+    positions = [columns.index(name) for name in names]
+    shape = tuple(len(marginals.values[name]) for name in names)
+    # 组合数用 Python 整数计算，扰动很多特征时远超 int64 也不会溢出（此时按样本抽样）
+    n_combinations = math.prod(shape)
+    predictions = np.empty(n_samples)
+    chunk = np.empty((min(chunk_rows, max(n_samples, n_combinations)), len(columns)))
+    chunk[:] = base
+
+    if n_combinations <= n_samples:
+        table = np.empty(n_combinations)
+        for lo in range(0, n_combinations, chunk_rows):
+            hi = min(lo + chunk_rows, n_combinations)
+            for name, position, index in zip(names, positions, np.unravel_index(np.arange(lo, hi), shape)):
+                chunk[:hi - lo, position] = marginals.values[name][index]
+            table[lo:hi] = predict(chunk[:hi - lo])
+        for lo in range(0, n_samples, chunk_rows):
+            hi = min(lo + chunk_rows, n_samples)
+            index = [marginals.sample_indices(name, rng, hi - lo) for name in names]
+            predictions[lo:hi] = table[np.ravel_multi_index(index, shape)]
+        return predictions, n_combinations
+
+    for lo in range(0, n_samples, chunk_rows):
+        hi = min(lo + chunk_rows, n_samples)
+        for name, position in zip(names, positions):
+            chunk[:hi - lo, position] = marginals.values[name][marginals.sample_indices(name, rng, hi - lo)]
+        predictions[lo:hi] = predict(chunk[:hi - lo])
+    return predictions, n_samples
+
+
+def summarize(predictions, quantiles=DEFAULT_QUANTILES, bins=20):
+    """预测值分布的摘要：均值、标准差、分位数和直方图"""
+    counts, edges = np.histogram(predictions, bins=bins)
+    return {
+        "mean": float(predictions.mean()),
+        "std": float(predictions.std()),
+        "min": float(predictions.min()),
+        "max": float(predictions.max()),
+        "quantiles": {f"{q:g}": float(value) for q, value in zip(quantiles, np.quantile(predictions, quantiles))},
+        "histogram": {"edges": edges.tolist(), "counts": counts.tolist()},
+    }
@@ -0,0 +1,91 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+from flask import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class _Artifact:
+    """单个 JSON 文件的预序列化、预压缩结果"""
+
+    def __init__(self, path, mtime_ns):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        # 与 jsonify 相同的序列化方式（键排序、紧凑分隔符）
+        self.data = data
+        self.body = json.dumps(data, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        self.gzip_body = gzip.compress(self.body, compresslevel=9, mtime=0)
+        self.br_body = brotli.compress(self.body) if brotli is not None else None
+        self.etag = hashlib.sha1(self.body).hexdigest()
+        self.mtime_ns = mtime_ns
+
+
+def select_encoding(artifact, encodings):
+    """按 Accept-Encoding 选择压缩格式，返回 (body, Content-Encoding, ETag)"""
+    if artifact.br_body is not None and encodings['br']:
+        return artifact.br_body, 'br', f"{artifact.etag}-br"
+    if encodings['gzip']:
+        return artifact.gzip_body, 'gzip', f"{artifact.etag}-gz"
+    return artifact.body, None, artifact.etag
+
+
+class ArtifactStore:
+    """在内存中缓存 api_data 目录下的 JSON 文件
+
+    文件只在首次访问或修改时间变化时重新加载，响应带 ETag，
+    支持 If-None-Match (304) 以及 gzip/br 内容协商。
+    """
+
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        self._artifacts = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        """返回文件对应的缓存，文件修改后自动重新加载"""
+        path = os.path.join(self.data_dir, name)
+        mtime_ns = os.stat(path).st_mtime_ns
+        artifact = self._artifacts.get(name)
+        if artifact is None or artifact.mtime_ns != mtime_ns:
+            with self._lock:
+                artifact = self._artifacts.get(name)
+                if artifact is None or artifact.mtime_ns != mtime_ns:
+                    artifact = _Artifact(path, mtime_ns)
+                    self._artifacts[name] = artifact
+        return artifact
+
+    def peek(self, name):
+        """返回已缓存的数据而不访问文件系统，未加载时返回 None"""
+        return self._artifacts.get(name)
+
+    def refresh(self):
+        """检查所有已加载文件的修改时间，重新加载有变化的文件"""
+        for name in list(self._artifacts):
+            try:
+                self.get(name)
+            except (OSError, ValueError):
+                continue
+
+    def load(self, name):
+        """返回解析后的 JSON 对象（只读，调用方不应修改）"""
+        return self.get(name).data
+
+    def respond(self, name, request):
+        """根据请求头返回 304 或按 Accept-Encoding 压缩的响应"""
+        artifact = self.get(name)
+        body, encoding, etag = select_encoding(artifact, request.accept_encodings)
+
+        response = Response(body, mimetype='application/json')
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = 'no-cache'
+        response.set_etag(etag)
+        return response.make_conditional(request)
@@ -0,0 +1,524 @@
+import json
+import mmap
+import os
+
+import numpy as np
+
+# LightGBM decision_type 位定义（参见 LightGBM include/LightGBM/tree.h）
+_CATEGORICAL_MASK = 1
+_DEFAULT_LEFT_MASK = 2
+_MISSING_TYPE_ZERO = 1
+_MISSING_TYPE_NAN = 2
+_ZERO_THRESHOLD = 1e-35
+
+# 目标函数对应的输出变换
+_OBJECTIVE_TRANSFORMS = {
+    'regression': None,
+    'regression_l1': None,
+    'huber': None,
+    'fair': None,
+    'quantile': None,
+    'mape': None,
+    'poisson': np.exp,
+    'gamma': np.exp,
+    'tweedie': np.exp,
+    'binary': lambda raw: 1.0 / (1.0 + np.exp(-raw)),
+    'cross_entropy': lambda raw: 1.0 / (1.0 + np.exp(-raw)),
+}
+
+
+# 二进制模型文件格式：8 字节魔数 | 8 字节小端头部长度 | JSON 头部 | 按 64 字节对齐的数组数据
+# 头部记录标量参数以及每个数组的 dtype、shape 和偏移量，加载时以只读 mmap 映射文件，
+# 数组直接引用映射的页，同一台机器上的多个进程共享同一份物理内存
+_BINARY_MAGIC = b'FLDTREE2'
+_BINARY_ALIGNMENT = 64
+
+# 二进制文件中保存的数组（包括遍历用的派生数组，加载时不再计算）和标量
+_BINARY_ARRAYS = ('split_feature', 'threshold', 'decision_type', 'left_child', 'right_child', 'leaf_value', 'roots',
+                  '_children', '_roots', '_internal_roots', '_constant_leaves',
+                  '_default_left', '_missing_zero', '_missing_nan',
+                  '_mask_features', '_mask_thresholds', '_mask_zero_features', '_mask_offsets', '_mask_zero_bins',
+                  '_leaf_masks', '_position_value', '_tree_leaf_base')
+_BINARY_SCALARS = ('num_features', 'objective', 'average_output', '_num_internal', '_has_zero_missing',
+                   '_mask_words', '_use_leaf_masks')
+
+# 每个特征的阈值个数不超过该值时，用一次广播比较计算所有特征的分箱下标，否则逐个特征 searchsorted
+_COMPARE_BINS_MAX = 32
+# 每块行数不超过该值时一次取出全部掩码后归约，否则逐个特征按位与（临时数组更小）
+_REDUCE_ROWS_MAX = 16
+_FULL_WORD = (1 << 64) - 1
+
+
+def binary_model_path(model_path):
+    """文本模型对应的二进制模型文件路径（扩展名改为 .bin）"""
+    return os.path.splitext(model_path)[0] + '.bin'
+
+
+def _parse_array(value, dtype):
+    """解析模型文件中以空格分隔的数组"""
+    if not value:
+        return np.empty(0, dtype=dtype)
+    return np.array(value.split(' '), dtype=dtype)
+
+
+def _parse_lightgbm_text(model_path):
+    """解析 LightGBM 文本模型，返回 (头部参数, 树列表)"""
+    header = {}
+    trees = []
+    current = None
+    with open(model_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if line == 'end of trees':
+                break
+            if line.startswith('Tree='):
+                current = {}
+                trees.append(current)
+                continue
+            if '=' not in line:
+                continue
+            key, value = line.split('=', 1)
+            if current is None:
+                header[key] = value
+            else:
+                current[key] = value
+    return header, trees
+
+
+class NumpyTreeEngine:
+    """使用 NumPy 向量化计算 LightGBM 树集成的推理引擎
+
+    模型只在加载时解析一次，所有树被展平为连续的节点数组：分裂特征、阈值、左右子节点以及叶子值。
+
+    预测使用按特征分箱的叶子位掩码（QuickScorer 算法）：每棵树的叶子按从左到右的顺序编号为位，
+    内部节点的掩码清除其左子树的全部叶子位。同一特征的阈值把取值划分为若干箱，落在同一箱的取值在
+    该特征的所有节点上走向相同，因此每个 (特征, 箱) 对应所有树上"向右走"的节点掩码之积，加载时预先算好。
+    预测时每行只需按特征取出掩码并按位与，每棵树剩余的最低位即为落入的叶子，与树的深度无关。
+    缺失值（NaN 与 zero 缺失类型下的 0）各占一个单独的箱，与 LightGBM 的 NumericalDecision 一致。
+    掩码表超过 max_leaf_mask_bytes 等无法使用时，退回对 N 行 × T 棵树同时逐层推进的遍历。
+    """
+
+    # 逐层遍历时单次处理的最大 (行数 × 树数)，用于限制大批量预测时的内存占用
+    max_block_size = 1 << 21
+    # 位掩码预测时每块的最大 (行数 × 树数 × 每棵树的掩码字数)，块内的掩码数组保持在 CPU 缓存附近
+    max_mask_block_size = 1 << 16
+    # 叶子位掩码表的内存上限（字节），超过时使用逐层遍历
+    max_leaf_mask_bytes = 1 << 28
+
+    def __init__(self, split_feature, threshold, decision_type, left_child,
+                 right_child, leaf_value, roots, num_features,
+                 objective='regression', average_output=False):
+        self.split_feature = split_feature
+        self.threshold = threshold
+        self.decision_type = decision_type
+        self.left_child = left_child
+        self.right_child = right_child
+        self.leaf_value = leaf_value
+        self.roots = roots
+        self.num_features = num_features
+        self.objective = objective
+        self.average_output = average_output
+
+        if np.any(decision_type & _CATEGORICAL_MASK):
+            raise ValueError("NumpyTreeEngine 暂不支持类别型分裂")
+        if objective not in _OBJECTIVE_TRANSFORMS:
+            raise ValueError(f"NumpyTreeEngine 不支持的目标函数: {objective}")
+        self._transform = _OBJECTIVE_TRANSFORMS[objective]
+
+        missing_type = (decision_type >> 2) & 3
+        self._default_left = (decision_type & _DEFAULT_LEFT_MASK) != 0
+        self._missing_zero = missing_type == _MISSING_TYPE_ZERO
+        self._missing_nan = missing_type == _MISSING_TYPE_NAN
+        self._has_zero_missing = bool(self._missing_zero.any())
+
+        # 遍历用的紧凑编码：叶子编号为 num_internal + leaf，
+        # 左右子节点交错存放，children[2 * node + go_right] 即下一节点
+        self._num_internal = len(split_feature)
+
+        def encode(child):
+            return np.where(child >= 0, child, self._num_internal + ~child)
+
+        self._children = np.stack([encode(left_child), encode(right_child)], axis=1).ravel().astype(np.int32)
+        self._roots = encode(roots).astype(np.int32)
+        # 只有一个叶子的树与输入无关，其叶子编号预先取出；单行预测只遍历其余的树
+        root_is_leaf = self._roots >= self._num_internal
+        self._internal_roots = self._roots[~root_is_leaf]
+        self._constant_leaves = (self._roots[root_is_leaf] - self._num_internal).astype(np.int32)
+        self._build_leaf_masks()
+
+    def _leaf_order(self):
+        """按中序遍历为每棵树的叶子编号，返回 (各树首个叶子位置, 按位置排列的叶子值,
+        节点所在的树, 节点左子树的叶子位置范围 [lo, hi), 单棵树的最大叶子数)"""
+        num_internal = self._num_internal
+        node_tree = np.zeros(num_internal, dtype=np.int64)
+        node_lo = np.zeros(num_internal, dtype=np.int64)
+        node_hi = np.zeros(num_internal, dtype=np.int64)
+        position_value = np.empty(len(self.leaf_value), dtype=np.float64)
+        tree_leaf_base = np.zeros(len(self.roots), dtype=np.int64)
+        left, right = self.left_child.tolist(), self.right_child.tolist()
+        base = max_leaves = 0
+        for tree, root in enumerate(self.roots.tolist()):
+            tree_leaf_base[tree] = base
+            count = 0
+            stack = [(root, False)]
+            while stack:
+                node, left_done = stack.pop()
+                if node < 0:
+                    position_value[base + count] = self.leaf_value[~node]
+                    count += 1
+                elif left_done:
+                    node_hi[node] = count
+                    stack.append((right[node], False))
+                else:
+                    node_tree[node] = tree
+                    node_lo[node] = count
+                    stack.append((node, True))
+                    stack.append((left[node], False))
+            base += count
+            max_leaves = max(max_leaves, count)
+        return tree_leaf_base, position_value, node_tree, node_lo, node_hi, max_leaves
+
+    def _build_leaf_masks(self):
+        """预先计算每个 (特征, 箱) 的叶子位掩码，见类的说明"""
+        n_trees = len(self.roots)
+        tree_leaf_base, position_value, node_tree, node_lo, node_hi, max_leaves = self._leaf_order()
+        words = max(-(-max_leaves // 64), 1)
+        features = np.unique(self.split_feature).astype(np.int32)
+        thresholds = [np.unique(self.threshold[self.split_feature == f]) for f in features]
+        # 每个特征的箱：阈值划分出的 len(阈值) + 1 个区间，以及 zero 缺失、NaN 两个缺失值箱
+        bin_counts = np.array([len(t) + 3 for t in thresholds], dtype=np.int64)
+
+        self._mask_words = words
+        self._mask_features = features
+        self._mask_thresholds = np.full((len(features), max((len(t) for t in thresholds), default=0)), np.inf)
+        for i, t in enumerate(thresholds):
+            self._mask_thresholds[i, :len(t)] = t
+        self._mask_zero_features = np.array([self._missing_zero[self.split_feature == f].any() for f in features],
+                                            dtype=bool)
+        self._mask_offsets = np.concatenate([[0], np.cumsum(bin_counts)[:-1]]).astype(np.int64)
+        self._mask_zero_bins = self._mask_offsets + bin_counts - 2
+        self._position_value = position_value
+        self._tree_leaf_base = tree_leaf_base
+
+        # zero 缺失箱用 0 代表整个 [-1e-35, 1e-35] 区间，区间内有阈值时同一箱的取值走向不同，不能使用掩码
+        ambiguous = any(np.any((t >= -_ZERO_THRESHOLD) & (t < _ZERO_THRESHOLD))
+                        for t, zero in zip(thresholds, self._mask_zero_features) if zero)
+        table_bytes = int(bin_counts.sum()) * n_trees * words * 8
+        self._use_leaf_masks = bool(not ambiguous and table_bytes <= self.max_leaf_mask_bytes)
+        if not self._use_leaf_masks:
+            self._leaf_masks = np.empty((0, n_trees * words), dtype=np.uint64)
+            return
+
+        # 节点掩码：清除左子树的叶子位，按 64 位拆为 words 个字
+        node_masks = np.empty((self._num_internal, words), dtype=np.uint64)
+        for node, (lo, hi) in enumerate(zip(node_lo.tolist(), node_hi.tolist())):
+            cleared = ((1 << (hi - lo)) - 1) << lo
+            node_masks[node] = [_FULL_WORD ^ ((cleared >> (64 * w)) & _FULL_WORD) for w in range(words)]
+
+        # 缺失值箱中向右走的节点：NaN 在非 NaN 缺失类型的节点上按 0 处理，0 在 zero 缺失类型的节点上走默认方向
+        zero_right = np.where(self._missing_zero, ~self._default_left, 0.0 > self.threshold)
+        nan_right = np.where(self._missing_nan, ~self._default_left, zero_right)
+
+        tables = []
+        for f, t in zip(features.tolist(), thresholds):
+            nodes = np.nonzero(self.split_feature == f)[0]
+            table = np.full((len(t) + 3, n_trees, words), _FULL_WORD, dtype=np.uint64)
+            # 取值大于第 k 个阈值时，阈值不超过它的节点都向右走：先把节点掩码放在第 k + 1 箱，再沿箱累积
+            rank = np.searchsorted(t, self.threshold[nodes])
+            np.bitwise_and.at(table, (rank + 1, node_tree[nodes]), node_masks[nodes])
+            np.bitwise_and.accumulate(table[:len(t) + 1], axis=0, out=table[:len(t) + 1])
+            for row, go_right in ((len(t) + 1, zero_right[nodes]), (len(t) + 2, nan_right[nodes])):
+                np.bitwise_and.at(table[row], node_tree[nodes[go_right]], node_masks[nodes[go_right]])
+            tables.append(table.reshape(len(t) + 3, n_trees * words))
+        self._leaf_masks = np.concatenate(tables) if tables else np.empty((0, n_trees * words), dtype=np.uint64)
+
+    @classmethod
+    def from_model_file(cls, model_path):
+        """从 LightGBM 文本模型文件构建推理引擎"""
+        header, trees = _parse_lightgbm_text(model_path)
+
+        if int(header.get('num_tree_per_iteration', 1)) != 1:
+            raise ValueError("NumpyTreeEngine 仅支持单输出模型")
+        objective = header.get('objective', 'regression').split(' ')[0]
+        average_output = 'average_output' in header
+        num_features = int(header['max_feature_idx']) + 1
+
+        split_feature, threshold, decision_type = [], [], []
+        left_child, right_child, leaf_value, roots = [], [], [], []
+        node_offset = 0
+        leaf_offset = 0
+
+        for tree in trees:
+            if tree.get('is_linear', '0') != '0':
+                raise ValueError("NumpyTreeEngine 不支持线性树模型")
+            num_leaves = int(tree['num_leaves'])
+            leaves = _parse_array(tree['leaf_value'], np.float64)
+
+            if num_leaves == 1:
+                # 只有一个叶子的树：根节点直接编码为叶子
+                roots.append(~leaf_offset)
+            else:
+                left = _parse_array(tree['left_child'], np.int64)
+                right = _parse_array(tree['right_child'], np.int64)
+                # 内部节点加上全局偏移；叶子节点 ~leaf 加上全局叶子偏移
+                left = np.where(left >= 0, left + node_offset, left - leaf_offset)
+                right = np.where(right >= 0, right + node_offset, right - leaf_offset)
+
+                split_feature.append(_parse_array(tree['split_feature'], np.int64))
+                threshold.append(_parse_array(tree['threshold'], np.float64))
+                decision_type.append(_parse_array(tree['decision_type'], np.int64))
+                left_child.append(left)
+                right_child.append(right)
+                roots.append(node_offset)
+                node_offset += num_leaves - 1
+
+            leaf_value.append(leaves)
+            leaf_offset += num_leaves
+
+        def concat(parts, dtype):
+            return np.concatenate(parts).astype(dtype) if parts else np.empty(0, dtype=dtype)
+
+        return cls(
+            split_feature=concat(split_feature, np.int32),
+            threshold=concat(threshold, np.float64),
+            decision_type=concat(decision_type, np.uint8),
+            left_child=concat(left_child, np.int32),
+            right_child=concat(right_child, np.int32),
+            leaf_value=concat(leaf_value, np.float64),
+            roots=np.array(roots, dtype=np.int32),
+            num_features=num_features,
+            objective=objective,
+            average_output=average_output,
+        )
+
+    @classmethod
+    def from_binary_file(cls, binary_path):
+        """以只读 mmap 加载 save_binary 导出的二进制模型，不解析文本、不复制数组"""
+        with open(binary_path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if buffer[:len(_BINARY_MAGIC)] != _BINARY_MAGIC:
+            buffer.close()
+            raise ValueError(f"不是有效的二进制模型文件: {binary_path}")
+        header_start = len(_BINARY_MAGIC) + 8
+        header_size = int.from_bytes(buffer[len(_BINARY_MAGIC):header_start], 'little')
+        header = json.loads(buffer[header_start:header_start + header_size])
+
+        engine = cls.__new__(cls)
+        for name, spec in header['arrays'].items():
+            count = int(np.prod(spec['shape']))
+            array = np.frombuffer(buffer, dtype=spec['dtype'], count=count, offset=spec['offset'])
+            setattr(engine, name, array.reshape(spec['shape']))
+        for name in _BINARY_SCALARS:
+            setattr(engine, name, header['scalars'][name])
+        engine._transform = _OBJECTIVE_TRANSFORMS[engine.objective]
+        # 保持映射在引擎的生命周期内有效
+        engine._buffer = buffer
+        return engine
+
+    def save_binary(self, binary_path):
+        """导出为可直接 mmap 的二进制文件（先写临时文件再原子替换，运行中的服务不会读到半个文件）"""
+        arrays = {name: np.ascontiguousarray(getattr(self, name)) for name in _BINARY_ARRAYS}
+        scalars = {name: getattr(self, name) for name in _BINARY_SCALARS}
+        scalars = {name: value.item() if isinstance(value, np.generic) else value for name, value in scalars.items()}
+
+        # 先按占位偏移计算头部长度，再确定数据起点和各数组的对齐偏移
+        specs = {name: {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': 0}
+                 for name, array in arrays.items()}
+        header_size = len(json.dumps({'arrays': specs, 'scalars': scalars})) + 32 * len(specs)
+        offset = len(_BINARY_MAGIC) + 8 + header_size
+        for name, array in arrays.items():
+            offset = -(-offset // _BINARY_ALIGNMENT) * _BINARY_ALIGNMENT
+            specs[name]['offset'] = offset
+            offset += array.nbytes
+        header = json.dumps({'arrays': specs, 'scalars': scalars}).encode('utf-8').ljust(header_size)
+
+        tmp_path = binary_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(_BINARY_MAGIC)
+            f.write(header_size.to_bytes(8, 'little'))
+            f.write(header)
+            for name, array in arrays.items():
+                f.write(b'\0' * (specs[name]['offset'] - f.tell()))
+                f.write(array.tobytes())
+        os.replace(tmp_path, binary_path)
+        return binary_path
+
+    def num_trees(self):
+        """返回树的数量"""
+        return len(self.roots)
+
+    def _prepare(self, X):
+        """缺失值预处理，与 LightGBM 的 NumericalDecision 保持一致"""
+        nan_mask = np.isnan(X)
+        if nan_mask.any():
+            return np.where(nan_mask, 0.0, X).ravel(), nan_mask.ravel()
+        return X.ravel(), None
+
+    def _step(self, node, index, flat_x, flat_nan):
+        """所有 (行, 树) 同时向下推进一层"""
+        value = flat_x[index]
+        go_right = value > self.threshold[node]
+        if flat_nan is not None or self._has_zero_missing:
+            is_missing = self._missing_zero[node] & (np.abs(value) <= _ZERO_THRESHOLD)
+            if flat_nan is not None:
+                is_missing |= self._missing_nan[node] & flat_nan[index]
+            go_right = np.where(is_missing, ~self._default_left[node], go_right)
+        return self._children[2 * node + go_right]
+
+    def _predict_one(self, x):
+        """单行快速路径：不维护行偏移，到达叶子即记录叶子编号"""
+        flat_x, flat_nan = self._prepare(x)
+        exact_missing = flat_nan is not None or self._has_zero_missing
+        children, split_feature, threshold = self._children, self.split_feature, self.threshold
+        num_internal = self._num_internal
+        leaves = [self._constant_leaves]
+        node = self._internal_roots
+        while node.size:
+            if exact_missing:
+                node = self._step(node, split_feature[node], flat_x, flat_nan)
+            else:
+                node = children[2 * node + (flat_x[split_feature[node]] > threshold[node])]
+            done = node >= num_internal
+            if done.any():
+                leaves.append(node[done] - num_internal)
+                node = node[~done]
+        # 叶子按树的顺序连续编号，排序后即为树的顺序
+        return self._sum_trees(self.leaf_value[np.sort(np.concatenate(leaves))])
+
+    def _mask_bins(self, X):
+        """每行在每个用到的特征上所在的箱，返回掩码表的行下标，形状为 (N, 用到的特征数)"""
+        x = X[:, self._mask_features]
+        if self._mask_thresholds.shape[1] <= _COMPARE_BINS_MAX:
+            bins = (x[:, :, None] > self._mask_thresholds).sum(axis=2)
+        else:
+            # 阈值升序且以 inf 补齐，side='left' 得到小于取值的阈值个数
+            bins = np.column_stack([np.searchsorted(t, x[:, i]) for i, t in enumerate(self._mask_thresholds)])
+        bins += self._mask_offsets
+        if self._has_zero_missing:
+            is_zero = self._mask_zero_features & (np.abs(x) <= _ZERO_THRESHOLD)
+            bins = np.where(is_zero, self._mask_zero_bins, bins)
+        is_nan = np.isnan(x)
+        if is_nan.any():
+            bins = np.where(is_nan, self._mask_zero_bins + 1, bins)
+        return bins
+
+    def _predict_masks(self, X):
+        """位掩码预测：按特征取出掩码按位与，每棵树剩余的最低位即落入的叶子"""
+        n_rows, n_trees, words = X.shape[0], len(self.roots), self._mask_words
+        bins = self._mask_bins(X)
+        if n_rows <= _REDUCE_ROWS_MAX or not bins.shape[1]:
+            # 行数少时一次取出所有特征的掩码再归约，调用次数最少（单行预测走这里）
+            masks = np.bitwise_and.reduce(self._leaf_masks[bins.T], axis=0)
+        else:
+            masks = self._leaf_masks[bins[:, 0]]
+            for j in range(1, bins.shape[1]):
+                np.bitwise_and(masks, self._leaf_masks[bins[:, j]], out=masks)
+        masks = masks.reshape(n_rows, n_trees, words)
+        if words == 1:
+            word_index, masks = 0, masks[:, :, 0]
+        else:
+            word_index = (masks != 0).argmax(axis=2)
+            masks = np.take_along_axis(masks, word_index[:, :, None], axis=2)[:, :, 0]
+        # 最低位 m & -m 是 2 的幂，转为 float64 后由 frexp 的指数得到位序
+        lowest = masks & (~masks + np.uint64(1))
+        position = np.frexp(lowest.astype(np.float64))[1] - 1 + 64 * word_index
+        return self._sum_trees(self._position_value[self._tree_leaf_base + position])
+
+    @staticmethod
+    def _sum_trees(values):
+        """按树的顺序依次累加（与 LightGBM 的累加顺序一致，结果逐位相同），cumsum 是顺序求和"""
+        if values.shape[-1] == 0:
+            return np.zeros(values.shape[:-1]) if values.ndim > 1 else 0.0
+        return np.cumsum(values, axis=-1)[..., -1]
+
+    def _leaf_indices(self, X):
+        """返回每行在每棵树上落入的全局叶子编号，形状为 (N, T)"""
+        n_rows = X.shape[0]
+        n_trees = len(self._roots)
+        flat_x, flat_nan = self._prepare(X)
+
+        leaves = np.empty(n_rows * n_trees, dtype=np.int32)
+        position = np.arange(n_rows * n_trees)
+        row_offset = np.repeat(np.arange(n_rows) * self.num_features, n_trees)
+        node = np.tile(self._roots, n_rows)
+
+        while node.size:
+            done = node >= self._num_internal
+            if done.any():
+                leaves[position[done]] = node[done] - self._num_internal
+                keep = ~done
+                position, row_offset, node = position[keep], row_offset[keep], node[keep]
+                if not node.size:
+                    break
+            node = self._step(node, row_offset + self.split_feature[node], flat_x, flat_nan)
+
+        return leaves.reshape(n_rows, n_trees)
+
+    def predict_raw(self, X):
+        """返回未经目标函数变换的原始分数"""
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.num_features:
+            raise ValueError(f"Invalid number of features. Expected {self.num_features}, got {X.shape[1]}")
+
+        n_trees = max(len(self.roots), 1)
+        if self._use_leaf_masks:
+            block_rows = max(self.max_mask_block_size // (n_trees * self._mask_words), 1)
+            raw = np.empty(X.shape[0], dtype=np.float64)
+            for start in range(0, X.shape[0], block_rows):
+                raw[start:start + block_rows] = self._predict_masks(X[start:start + block_rows])
+            return raw / n_trees if self.average_output else raw
+
+        if X.shape[0] == 1:
+            raw = np.array([self._predict_one(X)])
+            return raw / n_trees if self.average_output else raw
+
+        block_rows = max(self.max_block_size // n_trees, 1)
+        raw = np.empty(X.shape[0], dtype=np.float64)
+        for start in range(0, X.shape[0], block_rows):
+            block = X[start:start + block_rows]
+            raw[start:start + block_rows] = self._sum_trees(self.leaf_value[self._leaf_indices(block)])
+
+        if self.average_output:
+            raw /= n_trees
+        return raw
+
+    def predict(self, X):
+        """与 lgb.Booster.predict 相同的预测接口"""
+        raw = self.predict_raw(X)
+        if self._transform is not None:
+            return self._transform(raw)
+        return raw
+
+
+def export_binary_model(model_path, binary_path=None):
+    """将 LightGBM 文本模型导出为可 mmap 的二进制模型，返回二进制文件路径"""
+    engine = NumpyTreeEngine.from_model_file(model_path)
+    return engine.save_binary(binary_path or binary_model_path(model_path))
+
+
+def load_binary_engine(model_path):
+    """加载文本模型对应的二进制模型；二进制文件不存在、早于文本模型或格式版本不同时从文本解析"""
+    binary_path = binary_model_path(model_path)
+    try:
+        if os.stat(binary_path).st_mtime_ns >= os.stat(model_path).st_mtime_ns:
+            return NumpyTreeEngine.from_binary_file(binary_path)
+        print(f"二进制模型早于文本模型，改为解析文本模型: {binary_path}")
+    except FileNotFoundError:
+        print(f"未找到二进制模型，改为解析文本模型: {binary_path}")
+    except ValueError as e:
+        print(f"{e}，改为解析文本模型（重新运行训练脚本可导出新格式）")
+    return NumpyTreeEngine.from_model_file(model_path)
+
+
+def load_predictor(engine, model, model_path):
+    """根据配置返回预测器：'lightgbm' 使用 Booster，'numpy' 使用 NumpyTreeEngine，
+    'mmap' 使用内存映射的二进制模型（见 export_binary_model）"""
+    if engine == 'numpy':
+        return NumpyTreeEngine.from_model_file(model_path)
+    if engine == 'mmap':
+        return load_binary_engine(model_path)
+    if engine == 'lightgbm':
+        return model
+    raise ValueError(f"未知的推理引擎: {engine}")
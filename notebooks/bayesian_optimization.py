@@ -4,28 +4,27 @@ import lightgbm as lgb
 from sklearn.metrics import mean_squared_error, r2_score
 from bayes_opt import BayesianOptimization
 import pickle
+import sys
 import os
 import time
 
+base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+data_dir = os.path.join(base_path, 'data')
+sys.path.insert(0, os.path.join(base_path, 'backend'))
+from tree_engine import export_binary_model
+from data_splits import load_splits
+from feature_pipeline import transform_splits
+
 # 加载预处理后的数据
 def load_preprocessed_data():
     """加载预处理后的数据"""
     print("正在加载预处理后的数据...")
     
-    base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    data_dir = os.path.join(base_path, 'data')
     models_dir = os.path.join(base_path, 'models')
     
-    X_train = np.load(os.path.join(data_dir, 'X_train.npy'))
-    y_train = np.load(os.path.join(data_dir, 'y_train.npy'))
-    X_val = np.load(os.path.join(data_dir, 'X_val.npy'))
-    y_val = np.load(os.path.join(data_dir, 'y_val.npy'))
-    X_test = np.load(os.path.join(data_dir, 'X_test.npy'))
-    y_test = np.load(os.path.join(data_dir, 'y_test.npy'))
-    
-    # 加载特征列
-    with open(os.path.join(models_dir, 'feature_columns.pkl'), 'rb') as f:
-        feature_columns = pickle.load(f)
+    # 按特征工程保存的特征流水线追加派生特征（与后端预测时的变换相同），特征名为变换后的全部列
+    ((X_train, y_train), (X_val, y_val), (X_test, y_test)), feature_columns = transform_splits(
+        models_dir, load_splits(data_dir))
     
     print(f"数据加载完成：")
     print(f"X_train: {X_train.shape}, y_train: {y_train.shape}")
@@ -125,8 +124,8 @@ def train_final_model(X_train, y_train, X_val, y_val, X_test, y_test, best_param
     """使用最佳参数训练最终模型"""
     print("\n=== 使用最佳参数训练最终模型 ===")
     
-    # 合并训练集和验证集
-    X_train_val = np.vstack([X_train, X_val])
+    # 合并训练集和验证集：X_train、X_val 已经过特征流水线，按顺序拼接
+    X_train_val = np.concatenate([X_train, X_val])
     y_train_val = np.concatenate([y_train, y_val])
     
     # 创建数据集
@@ -182,6 +181,10 @@ def save_optimization_results(model, best_params, training_time, mse, rmse, r2):
     model_path = os.path.join(models_dir, 'lightgbm_model_optimized.txt')
     model.save_model(model_path)
     print(f"优化后的模型已保存: {model_path}")
+
+    # 导出内存映射二进制模型（后端 PREDICT_ENGINE=mmap 时使用）
+    binary_path = export_binary_model(model_path)
+    print(f"二进制模型已保存: {binary_path}")
     
     # 保存优化信息
     optimization_info = {
@@ -0,0 +1,83 @@
+import numpy as np
+import lightgbm as lgb
+import sys
+import os
+base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+data_dir = os.path.join(base_path, 'data')
+models_dir = os.path.join(base_path, 'models')
+sys.path.insert(0, os.path.join(base_path, 'backend'))
+from conformal import ConformalIntervals, conformal_path
+from data_splits import load_splits
+from feature_pipeline import transform_splits
+
+# 共形预测区间校准：在验证集上计算各模型按预测值分桶的残差分位数，
+# 保存为模型旁边的 <模型名>.conformal.json，后端 /predict 与 /predict/batch 据此返回预测区间
+# 使用方法：python notebooks/conformal_calibration.py（在模型训练之后运行）
+# 可选环境变量：CONFORMAL_BUCKETS（按预测值分桶的桶数，默认 10，1 为不分桶）
+
+model_files = {
+    'lightgbm': os.path.join(models_dir, 'lightgbm_model.txt'),
+    'lightgbm_optimized': os.path.join(models_dir, 'lightgbm_model_optimized.txt'),
+    'catboost': os.path.join(models_dir, 'catboost_model.cbm'),
+}
+
+# 在测试集上检查实际覆盖率的水平
+check_levels = [0.8, 0.9, 0.95, 0.99]
+
+
+# 加载校准集和测试集
+def load_calibration_data():
+    """加载验证集（用于校准）和测试集（用于检查覆盖率）"""
+    print("正在加载验证集和测试集...")
+    # 只映射验证集和测试集所在的行，不读取训练集；按特征流水线追加派生特征（与训练时相同）
+    ((X_val, y_val), (X_test, y_test)), _ = transform_splits(models_dir, load_splits(data_dir, 'val', 'test'))
+    print(f"X_val: {X_val.shape}, X_test: {X_test.shape}")
+    return X_val, y_val, X_test, y_test
+
+
+# 加载模型
+def load_model(name, path):
+    """加载 LightGBM 或 CatBoost 模型，返回预测函数"""
+    if name == 'catboost':
+        from catboost import CatBoostRegressor
+        model = CatBoostRegressor()
+        model.load_model(path)
+        return model.predict
+    return lgb.Booster(model_file=path).predict
+
+
+# 校准单个模型
+def calibrate_model(name, predict, X_val, y_val, X_test, y_test, n_buckets):
+    """校准并保存分位数表，打印测试集上的实际覆盖率和平均区间宽度"""
+    print(f"\n=== 校准模型: {name} ===")
+    intervals = ConformalIntervals.calibrate(predict(X_val), y_val, n_buckets)
+    print(f"分桶数: {len(intervals.bucket_counts)}，每桶样本数: {intervals.bucket_counts}")
+
+    y_pred = predict(X_test)
+    lower, upper = intervals.intervals(y_pred, intervals.level_indices(check_levels))
+    for i, level in enumerate(check_levels):
+        covered = np.mean((y_test >= lower[:, i]) & (y_test <= upper[:, i]))
+        width = np.mean(upper[:, i] - lower[:, i])
+        print(f"覆盖率 {level:.2f}: 测试集实际覆盖率 {covered:.4f}，平均区间宽度 {width:.4f}")
+    return intervals
+
+
+if __name__ == "__main__":
+    n_buckets = int(os.environ.get('CONFORMAL_BUCKETS', 10))
+    X_val, y_val, X_test, y_test = load_calibration_data()
+
+    for name, path in model_files.items():
+        if not os.path.exists(path):
+            print(f"\n模型文件不存在，跳过: {path}")
+            continue
+        try:
+            predict = load_model(name, path)
+        except ImportError as e:
+            print(f"\n缺少依赖，跳过 {name}: {e}")
+            continue
+        intervals = calibrate_model(name, predict, X_val, y_val, X_test, y_test, n_buckets)
+        output_path = conformal_path(path)
+        intervals.save(output_path)
+        print(f"校准结果已保存: {output_path}")
+
+    print("\n=== 共形预测区间校准完成 ===")
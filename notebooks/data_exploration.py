@@ -1,21 +1,23 @@
-import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
+import sys
 import os
 base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 csv_dir = os.path.join(base_path, 'csv_data')
+data_dir = os.path.join(base_path, 'data')
 analysis_dir = os.path.join(base_path, 'analysis_data')
+sys.path.insert(0, os.path.join(base_path, 'backend'))
+from csv_cache import CsvCache
 
 # 设置中文字体
 plt.rcParams['font.sans-serif'] = ['SimHei']
 plt.rcParams['axes.unicode_minus'] = False
 
-# 加载数据（分批加载，避免内存溢出）
+# 加载数据（从列式缓存读取，避免重复解析 CSV）
 def load_data(file_path, nrows=100000):
     """加载数据，默认只加载前10万行进行分析"""
     print(f"正在加载数据: {file_path}")
-    df = pd.read_csv(file_path, nrows=nrows)
+    df = CsvCache(file_path, os.path.join(data_dir, 'csv_cache')).frame(nrows=nrows)
     print(f"数据加载完成，形状: {df.shape}")
     return df
 
@@ -1,69 +1,132 @@
-import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 import pickle
+import sys
 import os
 base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 csv_dir = os.path.join(base_path, 'csv_data')
 data_dir = os.path.join(base_path, 'data')
 models_dir = os.path.join(base_path, 'models')
+sys.path.insert(0, os.path.join(base_path, 'backend'))
+from csv_cache import CsvCache
+from data_splits import save_splits
+from feature_pipeline import FeaturePipeline, pipeline_path
 
-print("开始特征工程与数据预处理...")
-
-# 加载数据
-print("加载数据...")
-chunks = pd.read_csv(os.path.join(csv_dir, 'train.csv'), chunksize=100000)
-df_list = []
-for chunk in chunks:
-    df_list.append(chunk)
-df = pd.concat(df_list, axis=0)
-print(f"数据加载完成，共{len(df)}行")
-
-# 特征工程
-print("\n特征工程...")
-
-# 1. 移除ID列（不参与建模）
-X = df.drop(['id', 'FloodProbability'], axis=1)
-y = df['FloodProbability']
-
-print(f"特征维度：{X.shape}")
-print(f"目标变量维度：{y.shape}")
-
-# 2. 查看特征列
-print("\n特征列：")
-print(X.columns.tolist())
-
-# 3. 数据划分
-print("\n数据划分...")
-# 先划分为训练集和测试集（90%训练，10%测试）
-X_train_val, X_test, y_train_val, y_test = train_test_split(
-    X, y, test_size=0.1, random_state=42
-)
-
-# 再将训练集划分为训练集和验证集（80%训练，10%验证）
-X_train, X_val, y_train, y_val = train_test_split(
-    X_train_val, y_train_val, test_size=0.1111, random_state=42  # 0.1111 * 0.9 = 0.1
-)
-
-print(f"训练集大小：{len(X_train)} ({len(X_train)/len(df)*100:.1f}%)")
-print(f"验证集大小：{len(X_val)} ({len(X_val)/len(df)*100:.1f}%)")
-print(f"测试集大小：{len(X_test)} ({len(X_test)/len(df)*100:.1f}%)")
-
-# 4. 保存预处理后的数据
-print("\n保存预处理后的数据...")
-
-# 保存特征列
-with open(os.path.join(models_dir, 'feature_columns.pkl'), 'wb') as f:
-    pickle.dump(X.columns.tolist(), f)
-print("已保存特征列")
-
-# 保存数据划分结果
-np.save(os.path.join(data_dir, 'X_train.npy'), X_train.values)
-np.save(os.path.join(data_dir, 'y_train.npy'), y_train.values)
-np.save(os.path.join(data_dir, 'X_val.npy'), X_val.values)
-np.save(os.path.join(data_dir, 'y_val.npy'), y_val.values)
-np.save(os.path.join(data_dir, 'X_test.npy'), X_test.values)
-np.save(os.path.join(data_dir, 'y_test.npy'), y_test.values)
-print("已保存数据划分结果")
-
-print("\n特征工程与数据预处理完成！")
+# 首次生成列式缓存时每次读取的 CSV 行数，内存峰值约为一个块
+chunk_rows = int(os.environ.get('CSV_CHUNK_ROWS', 100000))
+# 首次生成列式缓存时并行解析 CSV 的进程数，默认为 CPU 核数，为 1 时按块读取
+parse_workers = int(os.environ.get('CSV_PARSE_WORKERS', os.cpu_count() or 1))
+# 派生特征（逗号分隔的逐行统计量，如 sum,std,max,q25，推荐值见 backend/feature_pipeline.py 的 RECOMMENDED_TRANSFORMS），
+# 默认不添加：启用后模型的输入列和 /predict 返回的 shap_values 会多出 row_* 各项，前端需要同步调整
+feature_transforms = [t for t in os.environ.get('FEATURE_TRANSFORMS', '').split(',') if t]
+# 打印派生特征与目标变量相关系数时使用的训练集行数
+pipeline_sample_rows = 100000
+
+# 紧凑的数据类型：20 个特征均为 0 ~ 255 以内的整数，目标变量为概率
+id_column = 'id'
+target_column = 'FloodProbability'
+feature_dtype = np.uint8
+target_dtype = np.float32
+
+
+def get_peak_rss_bytes():
+    """当前进程的内存峰值（VmHWM，字节），非 Linux 系统返回 None"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def print_peak_rss(stage):
+    peak = get_peak_rss_bytes()
+    print(f"内存峰值（{stage}）：{peak / 1024 / 1024:.1f} MB" if peak is not None else f"内存峰值（{stage}）：不可用")
+
+
+def load_train_data(cache):
+    """从列式缓存读取特征和目标变量，写入预先分配的 uint8 特征矩阵和 float32 目标数组，返回 (X, y, 特征列)
+
+    缓存以只读 mmap 加载、逐列复制，不经过 DataFrame，内存峰值约为结果数组（每行 24 字节）。
+    缓存中的特征列无法无损转换为 uint8 时报错，不会被静默截断。
+    """
+    feature_columns = [name for name in cache.columns if name not in (id_column, target_column)]
+    columns = cache.load(feature_columns + [target_column])
+    X = np.empty((cache.rows, len(feature_columns)), dtype=feature_dtype)
+    for i, name in enumerate(feature_columns):
+        if not np.can_cast(columns[name].dtype, feature_dtype):
+            raise ValueError(f"特征 {name} 的类型 {columns[name].dtype} 无法无损转换为 {np.dtype(feature_dtype).name}")
+        X[:, i] = columns[name]
+    y = columns[target_column].astype(target_dtype)
+    return X, y, feature_columns
+
+
+# 并行解析 CSV 时子进程可能重新导入本模块，主流程放在 __main__ 中
+if __name__ == "__main__":
+    print("开始特征工程与数据预处理...")
+
+    # 加载数据
+    print("加载数据...")
+    train_cache = CsvCache(os.path.join(csv_dir, 'train.csv'), os.path.join(data_dir, 'csv_cache'), chunk_rows, parse_workers)
+    X, y, feature_columns = load_train_data(train_cache)
+    print(f"数据加载完成，共{len(X)}行")
+    print_peak_rss("加载数据后")
+
+    # 特征工程
+    print("\n特征工程...")
+
+    # 1. 移除ID列（不参与建模，读取时已跳过）
+    print(f"特征维度：{X.shape}，类型 {X.dtype}，{X.nbytes / 1024 / 1024:.1f} MB")
+    print(f"目标变量维度：{y.shape}，类型 {y.dtype}")
+
+    # 2. 查看特征列
+    print("\n特征列：")
+    print(feature_columns)
+
+    # 3. 派生特征：跨 20 个风险因素的逐行统计量，定义保存为特征流水线，训练脚本和后端加载同一份定义
+    pipeline = FeaturePipeline(feature_columns, feature_transforms)
+    print(f"\n派生特征：{pipeline.output_columns[len(feature_columns):]}")
+
+    # 4. 数据划分
+    print("\n数据划分...")
+    # 只划分行号，不复制数据；划分结果与直接对 X、y 调用 train_test_split 相同
+    rows = np.arange(len(X))
+    # 先划分为训练集和测试集（90%训练，10%测试）
+    train_val_rows, test_rows = train_test_split(rows, test_size=0.1, random_state=42)
+
+    # 再将训练集划分为训练集和验证集（80%训练，10%验证）
+    train_rows, val_rows = train_test_split(
+        train_val_rows, test_size=0.1111, random_state=42  # 0.1111 * 0.9 = 0.1
+    )
+
+    print(f"训练集大小：{len(train_rows)} ({len(train_rows)/len(X)*100:.1f}%)")
+    print(f"验证集大小：{len(val_rows)} ({len(val_rows)/len(X)*100:.1f}%)")
+    print(f"测试集大小：{len(test_rows)} ({len(test_rows)/len(X)*100:.1f}%)")
+
+    # 派生特征在部分训练数据上与目标变量的相关系数（X.npy 只保存原始特征，派生特征在训练和预测时由流水线计算）
+    if pipeline.transforms:
+        sample_rows = np.sort(train_rows[:pipeline_sample_rows])
+        derived = pipeline.transform(X[sample_rows])[:, len(feature_columns):]
+        for name, values in zip(pipeline.output_columns[len(feature_columns):], derived.T):
+            print(f"{name} 与目标变量的相关系数：{np.corrcoef(values, y[sample_rows])[0, 1]:.4f}")
+
+    # 5. 保存预处理后的数据
+    print("\n保存预处理后的数据...")
+
+    # 保存特征列
+    with open(os.path.join(models_dir, 'feature_columns.pkl'), 'wb') as f:
+        pickle.dump(feature_columns, f)
+    print("已保存特征列")
+
+    # 保存特征流水线（与特征列保存在同一目录）
+    pipeline.save(pipeline_path(models_dir))
+    print(f"已保存特征流水线：{pipeline_path(models_dir)}")
+
+    # 保存数据划分结果：一份按 训练/验证/测试 顺序重排的 X.npy、y.npy，以及各划分的行范围和原始行号
+    ranges = save_splits(data_dir, X, y, {'train': train_rows, 'val': val_rows, 'test': test_rows})
+    print(f"已保存数据划分结果：{ranges}")
+
+    print_peak_rss("全部完成")
+    print("\n特征工程与数据预处理完成！")
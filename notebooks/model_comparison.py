@@ -7,11 +7,15 @@ import os
 import json
 import matplotlib.pyplot as plt
 import seaborn as sns
+import sys
 
 base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 data_dir = os.path.join(base_path, 'data')
 models_dir = os.path.join(base_path, 'models')
 evaluation_dir = os.path.join(base_path, 'evaluation_data')
+sys.path.insert(0, os.path.join(base_path, 'backend'))
+from data_splits import load_splits
+from feature_pipeline import transform_splits
 
 # 设置中文字体
 plt.rcParams['font.sans-serif'] = ['SimHei']
@@ -21,12 +25,9 @@ def load_preprocessed_data():
     """加载预处理后的数据"""
     print("正在加载预处理后的数据...")
     
-    X_test = np.load(os.path.join(data_dir, 'X_test.npy'))
-    y_test = np.load(os.path.join(data_dir, 'y_test.npy'))
-    
-    # 加载特征列
-    with open(os.path.join(models_dir, 'feature_columns.pkl'), 'rb') as f:
-        feature_columns = pickle.load(f)
+    # 只映射测试集所在的行，训练集和验证集的页不会被读取
+    # 按特征流水线追加派生特征（与训练时相同）
+    [(X_test, y_test)], feature_columns = transform_splits(models_dir, load_splits(data_dir, 'test'))
     
     print(f"测试集: {X_test.shape}")
     
@@ -0,0 +1,106 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+
+# 压测脚本共用的服务启动、请求、负载生成与延迟统计（benchmark_api.py、benchmark_asgi.py、benchmark_cold_start.py）
+
+base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_dir = os.path.join(base_path, 'backend')
+
+host = '127.0.0.1'
+port = 5000
+
+servers = {
+    'flask': [sys.executable, 'app.py'],
+    'asgi': [sys.executable, '-m', 'uvicorn', 'asgi_app:app', '--host', host, '--port', str(port), '--log-level', 'warning'],
+    'gunicorn': [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'{host}:{port}'],
+}
+
+
+def request_json(path, body=None, timeout=300):
+    """发送一次 JSON 请求（body 为 None 时为 GET），返回解析后的响应"""
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(f'http://{host}:{port}{path}', data=data,
+                                 headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(req, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def start_server(command, timeout=300, env=None, wait_model=True):
+    """启动服务并等待 /health 可用；wait_model 为 True 时等到模型加载完成（/health 返回 model_ready）"""
+    process = subprocess.Popen(command, cwd=backend_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"服务启动失败: {' '.join(command)}")
+        try:
+            if request_json('/health', timeout=1).get('model_ready', True) or not wait_model:
+                return process
+        except OSError:
+            pass
+        time.sleep(0.02)
+    process.terminate()
+    raise RuntimeError(f"服务启动超时: {' '.join(command)}")
+
+
+async def send_request(method, path, body, content_type='application/json'):
+    """发送一次 HTTP/1.1 请求（短连接），返回状态码"""
+    reader, writer = await asyncio.open_connection(host, port, limit=1 << 24)
+    head = (f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n"
+            f"Accept-Encoding: gzip\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n\r\n")
+    writer.write(head.encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return int(response.split(b' ', 2)[1])
+
+
+async def run_load(requests, concurrency, duration):
+    """以固定并发持续发送请求（每个连接至少一次），requests 为 [(method, path, body, content_type)]，
+    返回每个请求的延迟（秒）、错误数与实际耗时"""
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def client(i):
+        nonlocal errors
+        n = i
+        while True:
+            method, path, body, content_type = requests[n % len(requests)]
+            start = time.perf_counter()
+            try:
+                if await send_request(method, path, body, content_type) >= 400:
+                    errors += 1
+            except (OSError, IndexError, ValueError):
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+            n += concurrency
+            if time.perf_counter() >= deadline:
+                break
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    return np.array(latencies), errors, time.perf_counter() - start
+
+
+def summarize(latencies, errors, elapsed, rows_per_request=1):
+    """吞吐量与 p50/p95/p99/最大延迟（毫秒）"""
+    def percentile(q):
+        return float(np.percentile(latencies, q) * 1000) if len(latencies) else None
+
+    return {
+        "requests": int(len(latencies)),
+        "errors": errors,
+        "rps": float(len(latencies) / elapsed),
+        "rows_per_sec": float(len(latencies) * rows_per_request / elapsed),
+        "p50_ms": percentile(50),
+        "p95_ms": percentile(95),
+        "p99_ms": percentile(99),
+        "max_ms": float(latencies.max() * 1000) if len(latencies) else None,
+    }
@@ -0,0 +1,164 @@
+import asyncio
+import io
+import json
+import os
+import pickle
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from bench_common import run_load, servers, start_server, summarize
+
+# 预测 API 压测：在本地启动服务，按配置的并发驱动 /predict、/predict/batch（批量 1 ~ 100000 行）
+# 和静态数据接口，记录吞吐量与 p50/p95/p99 延迟，结果写入 JSON 便于在不同提交之间比较
+# 使用方法：python scripts/benchmark_api.py
+# 可选环境变量：
+#   BENCH_SERVER           服务类型：flask（默认，python app.py）、asgi（uvicorn）、gunicorn
+#   BENCH_CONCURRENCY      /predict 与静态接口的并发连接数（默认 32）
+#   BENCH_BATCH_CONCURRENCY /predict/batch 的并发连接数（默认 4）
+#   BENCH_DURATION         每个场景的持续秒数（默认 10）
+#   BENCH_BATCH_SIZES      逗号分隔的批量大小（默认 1,10,100,1000,10000,100000）
+#   BENCH_BATCH_FORMAT     批量请求格式：json（默认）或 npy
+#   BENCH_SCENARIOS        逗号分隔的场景类型：predict,batch,static（默认全部）
+#   BENCH_OUTPUT           结果 JSON 路径（默认 benchmark_api.json）
+#   BENCH_BASELINE         基准结果 JSON 路径，设置后与之比较，吞吐或 p99 退化超过 BENCH_TOLERANCE 时返回非零退出码
+#   BENCH_TOLERANCE        允许的退化比例（默认 0.1）
+# 服务自身的配置（PREDICT_ENGINE、PREDICTION_CACHE_SIZE 等）从当前环境变量传入。
+
+base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+api_data_dir = os.path.join(base_path, 'api_data')
+models_dir = os.path.join(base_path, 'models')
+
+static_paths = ['/info', '/stats', '/evaluation', '/distribution', '/correlation', '/predictions-comparison',
+                '/error-distribution', '/model-params', '/training-info', '/csv-info', '/training-curve']
+
+
+class FeatureSampler:
+    """按 stats.json 中各特征的取值范围生成合成特征向量（整数均匀分布）"""
+
+    def __init__(self, seed=42):
+        with open(os.path.join(api_data_dir, 'stats.json'), 'r', encoding='utf-8') as f:
+            feature_stats = json.load(f)['feature_stats']
+        with open(os.path.join(models_dir, 'feature_columns.pkl'), 'rb') as f:
+            self.feature_columns = pickle.load(f)
+        self.low = np.array([feature_stats[name]['min'] for name in self.feature_columns])
+        self.high = np.array([feature_stats[name]['max'] for name in self.feature_columns])
+        self.rng = np.random.default_rng(seed)
+
+    def sample(self, n_rows):
+        return self.rng.integers(self.low, self.high + 1, size=(n_rows, len(self.feature_columns))).astype(np.float64)
+
+
+def encode_batch(rows, batch_format):
+    """按批量请求格式编码，返回 (body, Content-Type)"""
+    if batch_format == 'npy':
+        buffer = io.BytesIO()
+        np.save(buffer, rows, allow_pickle=False)
+        return buffer.getvalue(), 'application/x-npy'
+    return json.dumps({"batch_features": rows.astype(int).tolist()}).encode(), 'application/json'
+
+
+def build_scenarios(sampler, kinds, batch_sizes, batch_format, concurrency, batch_concurrency):
+    """返回 [(场景名, 请求列表, 并发数, 每个请求的行数)]"""
+    scenarios = []
+    if 'predict' in kinds:
+        rows = sampler.sample(20000).astype(int).tolist()
+        for explain in (True, False):
+            requests = [('POST', '/predict', json.dumps({"features": row, "explain": explain}).encode(), 'application/json')
+                        for row in rows]
+            scenarios.append((f'POST /predict explain={str(explain).lower()}', requests, concurrency, 1))
+    if 'batch' in kinds:
+        for batch_size in batch_sizes:
+            # 每个场景准备少量不同的批次轮流发送，避免大批量占用过多内存
+            requests = [('POST', '/predict/batch', *encode_batch(sampler.sample(batch_size), batch_format))
+                        for _ in range(max(1, min(batch_concurrency * 2, 100000 // batch_size)))]
+            scenarios.append((f'POST /predict/batch n={batch_size} {batch_format}', requests,
+                              min(batch_concurrency, len(requests)), batch_size))
+    if 'static' in kinds:
+        requests = [('GET', path, b'', 'application/json') for path in static_paths]
+        scenarios.append(('GET static', requests, concurrency, 1))
+    return scenarios
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=base_path,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """与基准结果比较，返回退化项列表"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if previous is None:
+            continue
+        if current['rps'] < previous['rps'] * (1 - tolerance):
+            regressions.append(f"{name}: 吞吐 {previous['rps']:.1f} -> {current['rps']:.1f} req/s")
+        if current['p99_ms'] > previous['p99_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p99 {previous['p99_ms']:.1f} -> {current['p99_ms']:.1f} ms")
+    return regressions
+
+
+if __name__ == "__main__":
+    server = os.environ.get('BENCH_SERVER', 'flask')
+    concurrency = int(os.environ.get('BENCH_CONCURRENCY', 32))
+    batch_concurrency = int(os.environ.get('BENCH_BATCH_CONCURRENCY', 4))
+    duration = float(os.environ.get('BENCH_DURATION', 10))
+    batch_sizes = [int(n) for n in os.environ.get('BENCH_BATCH_SIZES', '1,10,100,1000,10000,100000').split(',')]
+    batch_format = os.environ.get('BENCH_BATCH_FORMAT', 'json')
+    kinds = os.environ.get('BENCH_SCENARIOS', 'predict,batch,static').split(',')
+    output_path = os.environ.get('BENCH_OUTPUT', 'benchmark_api.json')
+    baseline_path = os.environ.get('BENCH_BASELINE')
+    tolerance = float(os.environ.get('BENCH_TOLERANCE', 0.1))
+
+    print(f"=== 预测 API 压测（{server}，并发 {concurrency}/{batch_concurrency}，每项 {duration:.0f} 秒）===\n")
+    sampler = FeatureSampler()
+    scenarios = build_scenarios(sampler, kinds, batch_sizes, batch_format, concurrency, batch_concurrency)
+
+    results = {}
+    process = start_server(servers[server])
+    try:
+        for name, requests, scenario_concurrency, rows in scenarios:
+            latencies, errors, elapsed = asyncio.run(run_load(requests, scenario_concurrency, duration))
+            summary = summarize(latencies, errors, elapsed, rows)
+            results[name] = summary
+            print(f"{name:<40} {summary['rps']:>9.1f} req/s {summary['rows_per_sec']:>11,.0f} 行/秒  "
+                  f"p50 {summary['p50_ms']:>8.1f}  p95 {summary['p95_ms']:>8.1f}  p99 {summary['p99_ms']:>8.1f} ms  "
+                  f"errors {errors}")
+    finally:
+        process.terminate()
+        process.wait()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "server": server,
+            "concurrency": concurrency,
+            "batch_concurrency": batch_concurrency,
+            "duration": duration,
+            "batch_format": batch_format,
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n结果已保存: {output_path}")
+
+    if baseline_path:
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), tolerance)
+        if regressions:
+            print(f"\n相对 {baseline_path} 的性能退化（容差 {tolerance:.0%}）：")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\n相对 {baseline_path} 无性能退化（容差 {tolerance:.0%}）")
@@ -0,0 +1,40 @@
+import asyncio
+import json
+import os
+
+import numpy as np
+
+from bench_common import run_load, servers, start_server, summarize
+
+# 对比 Flask（app.py）与 ASGI（asgi_app.py）前端的吞吐量与尾延迟
+# 使用方法：python benchmark_asgi.py
+# 可选环境变量：BENCH_CONCURRENCY（并发连接数，默认 256）、BENCH_DURATION（每项测试秒数，默认 10）
+
+if __name__ == "__main__":
+    concurrency = int(os.environ.get('BENCH_CONCURRENCY', 256))
+    duration = float(os.environ.get('BENCH_DURATION', 10))
+
+    rng = np.random.default_rng(42)
+    predict_requests = [('POST', '/predict', json.dumps({"features": row, "explain": False}).encode(), 'application/json')
+                        for row in rng.integers(0, 17, size=(1000, 20)).tolist()]
+    scenarios = [
+        ('POST /predict', predict_requests),
+        ('GET /stats', [('GET', '/stats', b'', 'application/json')]),
+    ]
+
+    print(f"=== Flask vs ASGI 基准测试（并发 {concurrency}，每项 {duration:.0f} 秒）===\n")
+    results = {}
+    for name in ('flask', 'asgi'):
+        process = start_server(servers[name])
+        try:
+            for label, requests in scenarios:
+                latencies, errors, elapsed = asyncio.run(run_load(requests, concurrency, duration))
+                summary = summarize(latencies, errors, elapsed)
+                results.setdefault(label, {})[name] = summary
+                print(f"{name:<6} {label:<15} {summary['rps']:>9.1f} req/s  "
+                      f"p50 {summary['p50_ms']:>8.1f} ms  p99 {summary['p99_ms']:>8.1f} ms  errors {errors}")
+        finally:
+            process.terminate()
+            process.wait()
+
+    print("\n" + json.dumps(results, indent=2))
@@ -0,0 +1,40 @@
+import json
+import os
+import time
+
+from bench_common import request_json, servers, start_server
+
+# 对比各启动模式（STARTUP_MODE）的冷启动耗时：进程启动到 /health 可用、到首个 /predict 返回，以及启动耗时分解
+# 使用方法：python scripts/benchmark_cold_start.py
+# 可选环境变量：BENCH_STARTUP_MODES（逗号分隔，默认 eager,background,lazy）
+
+
+def measure(mode, timeout=300):
+    """启动服务，返回 (到 /health 可用的秒数, 到首个 /predict 返回的秒数, 启动耗时分解)"""
+    env = dict(os.environ, STARTUP_MODE=mode, MODEL_WATCH_INTERVAL='0')
+    start = time.perf_counter()
+    process = start_server(servers['flask'], timeout, env=env, wait_model=False)
+    try:
+        health_seconds = time.perf_counter() - start
+
+        request_json('/predict', {"features": [5] * 20})
+        predict_seconds = time.perf_counter() - start
+        return health_seconds, predict_seconds, request_json('/models')['startup']
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    modes = os.environ.get('BENCH_STARTUP_MODES', 'eager,background,lazy').split(',')
+
+    print("=== 冷启动基准测试 ===\n")
+    results = {}
+    for mode in modes:
+        health_seconds, predict_seconds, profile = measure(mode)
+        results[mode] = {"health_seconds": health_seconds, "first_predict_seconds": predict_seconds, "startup": profile}
+        breakdown = ", ".join(f"{phase} {seconds:.3f}s" for phase, seconds in profile.items() if seconds is not None)
+        print(f"{mode:<11} /health 可用: {health_seconds:6.3f} 秒  首个 /predict: {predict_seconds:6.3f} 秒")
+        print(f"{'':<11} 分解: {breakdown}")
+
+    print("\n" + json.dumps(results, indent=2))
@@ -0,0 +1,108 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# 并行 CSV 解析的扩展性测试：对比 pd.read_csv 与 parallel_csv.read_csv_columns 在 1 ~ N 个进程下的耗时，
+# 并逐列检查结果与 pd.read_csv 逐位相同
+# 使用方法：python scripts/benchmark_csv_parser.py
+# 可选环境变量：
+#   BENCH_CSV       CSV 路径（默认 csv_data/train.csv）
+#   BENCH_REPEAT    把数据行重复若干次生成更大的测试文件（默认 1，即直接使用原文件）
+#   BENCH_WORKERS   逗号分隔的进程数（默认 1、2、4 ... 直到 CPU 核数）
+#   BENCH_REPEATS   每种配置重复次数，取最快一次（默认 3）
+
+base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(base_path, 'backend'))
+
+from parallel_csv import read_csv_columns
+
+# 输出缓冲区放在内存文件系统中（即共享内存），没有时使用临时目录
+shm_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+
+def make_input(csv_path, repeat):
+    """repeat 大于 1 时把数据行重复 repeat 次写入临时文件，返回文件路径"""
+    if repeat <= 1:
+        return csv_path
+    fd, path = tempfile.mkstemp(suffix='.csv')
+    with open(csv_path, 'rb') as src, os.fdopen(fd, 'wb') as dst:
+        dst.write(src.readline())
+        body = src.read()
+        if not body.endswith(b'\n'):
+            body += b'\n'
+        for _ in range(repeat):
+            dst.write(body)
+    return path
+
+
+def default_workers():
+    cpu_count = os.cpu_count() or 1
+    workers = [1]
+    while workers[-1] * 2 < cpu_count:
+        workers.append(workers[-1] * 2)
+    if workers[-1] != cpu_count:
+        workers.append(cpu_count)
+    return workers
+
+
+def best_time(fn, repeats):
+    times = []
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def check_identical(reference, names, arrays):
+    """逐列比较列名、类型和逐位取值"""
+    if names != reference.columns.tolist():
+        return False
+    return all(values.dtype == reference[name].dtype
+               and np.asarray(values).tobytes() == reference[name].to_numpy().tobytes()
+               for name, values in zip(names, arrays))
+
+
+if __name__ == "__main__":
+    csv_path = os.environ.get('BENCH_CSV', os.path.join(base_path, 'csv_data', 'train.csv'))
+    repeat = int(os.environ.get('BENCH_REPEAT', 1))
+    workers_list = [int(n) for n in os.environ['BENCH_WORKERS'].split(',')] if os.environ.get('BENCH_WORKERS') \
+        else default_workers()
+    repeats = int(os.environ.get('BENCH_REPEATS', 3))
+
+    path = make_input(csv_path, repeat)
+    try:
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        print(f"=== CSV 并行解析扩展性测试（{size_mb:.1f} MB，CPU 核数 {os.cpu_count()}）===\n")
+
+        baseline, reference = best_time(lambda: pd.read_csv(path), repeats)
+        print(f"pd.read_csv                 {baseline:8.3f} 秒  {len(reference) / baseline:>12,.0f} 行/秒  ({len(reference):,} 行)")
+
+        single = None
+        all_identical = True
+        for workers in workers_list:
+            out_dir = tempfile.mkdtemp(dir=shm_dir)
+            try:
+                elapsed, (names, arrays) = best_time(lambda: read_csv_columns(path, out_dir, workers), repeats)
+                identical = check_identical(reference, names, arrays)
+                del arrays
+            finally:
+                shutil.rmtree(out_dir, ignore_errors=True)
+            single = single or elapsed
+            all_identical = all_identical and identical
+            print(f"read_csv_columns {workers:>2} 进程   {elapsed:8.3f} 秒  {len(reference) / elapsed:>12,.0f} 行/秒  "
+                  f"相对 1 进程 {single / elapsed:5.2f}x  相对 pandas {baseline / elapsed:5.2f}x  "
+                  f"{'结果一致' if identical else '结果不一致'}")
+    finally:
+        if path != csv_path:
+            os.remove(path)
+
+    print(f"\n=== 基准测试完成：{'所有结果与 pd.read_csv 逐位相同' if all_identical else '存在与 pd.read_csv 不一致的结果'} ===")
+    if not all_identical:
+        sys.exit(1)
@@ -0,0 +1,90 @@
+import numpy as np
+import lightgbm as lgb
+import time
+import sys
+import os
+
+# 对比 SHAP 解释后端：LightGBM 原生 pred_contrib（native）与 shap.TreeExplainer（shap）
+# 使用方法：python scripts/benchmark_explainers.py
+# 可选环境变量：BENCH_EXPLAIN_SIZES（逗号分隔的行数，默认 1,100,10000）、
+#              BENCH_CHECK_ROWS（一致性检查行数，默认 1000）
+
+base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+data_dir = os.path.join(base_path, 'data')
+models_dir = os.path.join(base_path, 'models')
+sys.path.insert(0, os.path.join(base_path, 'backend'))
+
+from explanations import load_explainer, EXPLAINER_BACKENDS
+from data_splits import load_splits
+from feature_pipeline import FeaturePipeline, pipeline_path
+
+model_path = os.path.join(models_dir, 'lightgbm_model.txt')
+
+
+def load_samples(n_rows):
+    """加载测试集样本，不足时按特征范围随机补齐；有特征流水线时追加派生特征，与模型的输入一致"""
+    X = None
+    if os.path.exists(os.path.join(data_dir, 'splits.json')):
+        [(X, _)] = load_splits(data_dir, 'test')
+        X = np.asarray(X[:n_rows], dtype=np.float64)
+    if X is None or len(X) != n_rows:
+        rng = np.random.default_rng(42)
+        X = rng.integers(0, 17, size=(n_rows, 20)).astype(np.float64)
+    if os.path.exists(pipeline_path(models_dir)):
+        X = np.asarray(FeaturePipeline.load(pipeline_path(models_dir)).transform(X), dtype=np.float64)
+    return X
+
+
+def time_explain(explainer, X, repeats):
+    """多次计算 SHAP 值，返回每次耗时（毫秒）"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        explainer.shap_values(X)
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.array(timings)
+
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in os.environ.get('BENCH_EXPLAIN_SIZES', '1,100,10000').split(',')]
+    check_rows = int(os.environ.get('BENCH_CHECK_ROWS', 1000))
+
+    print("=== SHAP 解释后端基准测试 ===\n")
+    model = lgb.Booster(model_file=model_path)
+    print(f"树数量: {model.num_trees()}")
+
+    explainers = {}
+    for name in EXPLAINER_BACKENDS:
+        start = time.perf_counter()
+        explainers[name] = load_explainer(name, model)
+        print(f"{name} 解释器初始化耗时（含导入）: {time.perf_counter() - start:.3f} 秒")
+
+    X = load_samples(max(sizes + [check_rows]))
+
+    print(f"\n1. 一致性检查 ({check_rows} 行)...")
+    native_values = explainers['native'].shap_values(X[:check_rows])
+    shap_values = explainers['shap'].shap_values(X[:check_rows])
+    max_diff = float(np.max(np.abs(native_values - shap_values)))
+    base_diff = abs(explainers['native'].expected_value - explainers['shap'].expected_value)
+    print(f"   SHAP 值最大绝对误差: {max_diff:.3e}")
+    print(f"   base_value 绝对误差: {base_diff:.3e}")
+    # 可加性：base_value + SHAP 值之和等于原始预测值
+    additivity = float(np.max(np.abs(explainers['native'].expected_value + native_values.sum(axis=1)
+                                      - model.predict(X[:check_rows], raw_score=True))))
+    print(f"   native 可加性误差: {additivity:.3e}")
+    if not (np.allclose(native_values, shap_values, rtol=1e-6, atol=1e-9)
+            and np.isclose(explainers['native'].expected_value, explainers['shap'].expected_value, rtol=1e-6, atol=1e-9)):
+        print("   两个后端结果不一致！")
+        sys.exit(1)
+    print("   两个后端结果一致\n")
+
+    print("2. 计算延迟...")
+    for n_rows in sizes:
+        repeats = 1 if n_rows >= 10000 else 20 if n_rows >= 100 else 200
+        for name, explainer in explainers.items():
+            explainer.shap_values(X[:n_rows][:1])
+            timings = time_explain(explainer, X[:n_rows], repeats)
+            print(f"   {n_rows:>6} 行  {name:<7} p50: {np.percentile(timings, 50):10.2f} ms  "
+                  f"p99: {np.percentile(timings, 99):10.2f} ms  ({n_rows / np.median(timings) * 1000:,.0f} 行/秒)")
+
+    print("\n=== 基准测试完成 ===")
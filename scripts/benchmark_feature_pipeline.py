@@ -0,0 +1,106 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+# 特征流水线吞吐量测试：对不同批量的原始特征执行 FeaturePipeline.transform，记录每秒处理行数，
+# 并检查派生特征与逐个调用 np.sum / np.std / np.quantile 等计算的结果（转为 float32 后）逐位相同
+# 使用方法：python scripts/benchmark_feature_pipeline.py
+# 可选环境变量：
+#   BENCH_ROWS        逗号分隔的批量行数（默认 1,100,10000,1000000）
+#   BENCH_TRANSFORMS  逗号分隔的派生特征（默认使用 models/feature_pipeline.json，不存在或没有派生特征时为 RECOMMENDED_TRANSFORMS）
+#   BENCH_REPEATS     每种批量重复次数，取最快一次（默认 5）
+#   BENCH_MIN_RATE    最大批量的吞吐量下限（行/秒，默认 1000000），低于下限时返回非零退出码
+
+base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+data_dir = os.path.join(base_path, 'data')
+models_dir = os.path.join(base_path, 'models')
+sys.path.insert(0, os.path.join(base_path, 'backend'))
+
+from data_splits import load_splits
+from feature_pipeline import RECOMMENDED_TRANSFORMS, FeaturePipeline, pipeline_path
+
+
+def load_pipeline():
+    """按 BENCH_TRANSFORMS 或已保存的特征流水线创建，输入列为 20 个特征"""
+    input_columns, transforms = [f'feature_{i}' for i in range(20)], ()
+    if os.path.exists(pipeline_path(models_dir)):
+        saved = FeaturePipeline.load(pipeline_path(models_dir))
+        input_columns, transforms = saved.input_columns, saved.transforms
+    # 特征工程默认不添加派生特征，此时按推荐的派生特征测试
+    transforms = transforms or RECOMMENDED_TRANSFORMS
+    if os.environ.get('BENCH_TRANSFORMS'):
+        transforms = os.environ['BENCH_TRANSFORMS'].split(',')
+    return FeaturePipeline(input_columns, transforms)
+
+
+def load_samples(n_rows, n_features):
+    """取训练集的前 n_rows 行（uint8），不足时按特征范围随机生成"""
+    if os.path.exists(os.path.join(data_dir, 'splits.json')):
+        [(X, _)] = load_splits(data_dir, 'train')
+        X = np.asarray(X[:n_rows])
+        if len(X) == n_rows:
+            return X
+    rng = np.random.default_rng(42)
+    return rng.integers(0, 17, size=(n_rows, n_features)).astype(np.uint8)
+
+
+def reference_transform(X, transforms):
+    """逐个统计量直接调用 NumPy 函数计算（float64），作为对照"""
+    X = X.astype(np.float64)
+    columns = [X]
+    for transform in transforms:
+        if transform == 'sum':
+            columns.append(X.sum(axis=1))
+        elif transform == 'mean':
+            columns.append(X.mean(axis=1))
+        elif transform == 'std':
+            columns.append(X.std(axis=1))
+        elif transform == 'min':
+            columns.append(X.min(axis=1))
+        elif transform == 'max':
+            columns.append(X.max(axis=1))
+        elif transform == 'median':
+            columns.append(np.median(X, axis=1))
+        else:
+            columns.append(np.quantile(X, int(transform[1:]) / 100, axis=1))
+    return np.column_stack(columns).astype(np.float32)
+
+
+def best_time(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in os.environ.get('BENCH_ROWS', '1,100,10000,1000000').split(',')]
+    repeats = int(os.environ.get('BENCH_REPEATS', 5))
+    min_rate = float(os.environ.get('BENCH_MIN_RATE', 1e6))
+
+    pipeline = load_pipeline()
+    X = load_samples(max(sizes), len(pipeline.input_columns))
+    print(f"=== 特征流水线吞吐量测试（{len(pipeline.input_columns)} 个输入特征，"
+          f"派生特征 {list(pipeline.transforms)}，CPU 核数 {os.cpu_count()}）===\n")
+
+    check_rows = min(len(X), 100000)
+    identical = np.array_equal(pipeline.transform(X[:check_rows]),
+                               reference_transform(X[:check_rows], pipeline.transforms), equal_nan=True)
+    print(f"与 NumPy 逐项计算对比（{check_rows:,} 行）：{'逐位相同' if identical else '不一致'}\n")
+
+    rate = None
+    for n_rows in sizes:
+        batch = X[:n_rows]
+        elapsed = best_time(lambda: pipeline.transform(batch), repeats)
+        rate = n_rows / elapsed
+        print(f"批量 {n_rows:>9,} 行  {elapsed * 1000:10.3f} ms  {rate:>14,.0f} 行/秒")
+
+    fast_enough = rate >= min_rate
+    print(f"\n=== 基准测试完成：最大批量 {rate:,.0f} 行/秒，"
+          f"{'达到' if fast_enough else '未达到'}下限 {min_rate:,.0f} 行/秒 ===")
+    if not identical or not fast_enough:
+        sys.exit(1)
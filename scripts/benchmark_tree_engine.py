@@ -0,0 +1,100 @@
+import tempfile
+import numpy as np
+import lightgbm as lgb
+import time
+import sys
+import os
+
+base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+data_dir = os.path.join(base_path, 'data')
+models_dir = os.path.join(base_path, 'models')
+sys.path.insert(0, os.path.join(base_path, 'backend'))
+
+from tree_engine import NumpyTreeEngine, export_binary_model
+from data_splits import load_splits
+from feature_pipeline import FeaturePipeline, pipeline_path
+
+model_path = os.path.join(models_dir, 'lightgbm_model.txt')
+
+
+def load_samples(n_rows):
+    """加载测试集样本，若不存在则按特征范围随机生成；有特征流水线时追加派生特征，与模型的输入一致"""
+    if os.path.exists(os.path.join(data_dir, 'splits.json')):
+        [(X, _)] = load_splits(data_dir, 'test')
+        X = np.asarray(X[:n_rows], dtype=np.float64)
+    else:
+        rng = np.random.default_rng(42)
+        X = rng.integers(0, 17, size=(n_rows, 20)).astype(np.float64)
+    if os.path.exists(pipeline_path(models_dir)):
+        X = np.asarray(FeaturePipeline.load(pipeline_path(models_dir)).transform(X), dtype=np.float64)
+    return X
+
+
+def time_single_row(predict_fn, X, repeats):
+    """逐行调用预测函数，返回每次调用耗时（微秒）"""
+    predict_fn(X[:1])
+    timings = []
+    for i in range(repeats):
+        row = X[i % len(X)].reshape(1, -1)
+        start = time.perf_counter()
+        predict_fn(row)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return np.array(timings)
+
+
+def time_batch(predict_fn, X):
+    """批量预测耗时（秒）"""
+    start = time.perf_counter()
+    predict_fn(X)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    repeats = int(os.environ.get('BENCH_REPEATS', 500))
+    batch_size = int(os.environ.get('BENCH_BATCH_SIZE', 1000))
+
+    print("=== 推理引擎基准测试 ===\n")
+
+    start = time.perf_counter()
+    booster = lgb.Booster(model_file=model_path)
+    print(f"lightgbm 模型加载耗时: {time.perf_counter() - start:.3f} 秒")
+
+    start = time.perf_counter()
+    engine = NumpyTreeEngine.from_model_file(model_path)
+    print(f"numpy 引擎加载耗时: {time.perf_counter() - start:.3f} 秒")
+
+    # 二进制模型导出到临时目录，不影响 models/ 下的文件
+    binary_path = export_binary_model(model_path, os.path.join(tempfile.mkdtemp(), 'model.bin'))
+    start = time.perf_counter()
+    mmap_engine = NumpyTreeEngine.from_binary_file(binary_path)
+    print(f"mmap 引擎加载耗时: {time.perf_counter() - start:.4f} 秒 (文件 {os.path.getsize(binary_path) / 1024 ** 2:.1f} MB)")
+    print(f"树数量: {engine.num_trees()}\n")
+
+    X = load_samples(max(batch_size, repeats))
+    engines = [('lightgbm', booster.predict), ('numpy', engine.predict), ('mmap', mmap_engine.predict)]
+
+    print("1. 预测一致性检查（要求逐位相同）...")
+    expected = booster.predict(X[:batch_size])
+    single_rows = min(batch_size, 200)
+    for name, predict_fn in engines[1:]:
+        actual = predict_fn(X[:batch_size])
+        single = np.array([predict_fn(X[i:i + 1])[0] for i in range(single_rows)])
+        max_diff = float(np.max(np.abs(expected - actual)))
+        print(f"   {name:<9} 最大绝对误差: {max_diff:.3e}")
+        if not (np.array_equal(expected, actual) and np.array_equal(expected[:single_rows], single)):
+            print("   预测结果不一致！")
+            sys.exit(1)
+    print("   预测结果一致\n")
+
+    print("2. 单行预测延迟...")
+    for name, predict_fn in engines:
+        timings = time_single_row(predict_fn, X, repeats)
+        print(f"   {name:<9} p50: {np.percentile(timings, 50):8.1f} us  "
+              f"p99: {np.percentile(timings, 99):8.1f} us  mean: {timings.mean():8.1f} us")
+
+    print(f"\n3. 批量预测 ({batch_size} 行)...")
+    for name, predict_fn in engines:
+        elapsed = time_batch(predict_fn, X[:batch_size])
+        print(f"   {name:<9} {elapsed:.3f} 秒  ({batch_size / elapsed:,.0f} 行/秒)")
+
+    print("\n=== 基准测试完成 ===")
@@ -1,8 +1,8 @@
 import numpy as np
-import pandas as pd
 import lightgbm as lgb
 import pickle
 import json
+import sys
 import os
 from pathlib import Path
 from sklearn.metrics import mean_squared_error, r2_score
@@ -12,20 +12,26 @@ data_dir = os.path.join(base_path, 'data')
 models_dir = os.path.join(base_path, 'models')
 csv_dir = os.path.join(base_path, 'csv_data')
 output_dir = os.path.join(base_path, 'api_data')
+sys.path.insert(0, os.path.join(base_path, 'backend'))
+from csv_cache import CsvCache, count_rows
+from data_splits import load_splits
+from feature_pipeline import transform_splits
 
 os.makedirs(output_dir, exist_ok=True)
 
 print("=== 开始生成前端API所需数据 ===\n")
 
-print("1. 加载训练数据...")
-train_data = pd.read_csv(os.path.join(csv_dir, 'train.csv'))
-print(f"   训练数据加载完成: {len(train_data)} 行\n")
-
-print("2. 加载特征列...")
+print("1. 加载特征列...")
 with open(os.path.join(models_dir, 'feature_columns.pkl'), 'rb') as f:
     feature_columns = pickle.load(f)
 print(f"   特征列加载完成: {len(feature_columns)} 个特征\n")
 
+print("2. 加载训练数据...")
+# 从列式缓存只读取特征列和目标变量（不含 id），CSV 只在缓存不存在或已变化时解析一次
+train_cache = CsvCache(os.path.join(csv_dir, 'train.csv'), os.path.join(data_dir, 'csv_cache'))
+train_data = train_cache.frame(feature_columns + ['FloodProbability'])
+print(f"   训练数据加载完成: {len(train_data)} 行\n")
+
 print("3. 加载模型...")
 model = lgb.Booster(model_file=os.path.join(models_dir, 'lightgbm_model.txt'))
 print("   模型加载完成\n")
@@ -45,12 +51,10 @@ except FileNotFoundError:
     print("   训练信息文件未找到，使用默认值\n")
 
 print("5. 加载预处理数据...")
-X_train = np.load(os.path.join(data_dir, 'X_train.npy'))
-y_train = np.load(os.path.join(data_dir, 'y_train.npy'))
-X_val = np.load(os.path.join(data_dir, 'X_val.npy'))
-y_val = np.load(os.path.join(data_dir, 'y_val.npy'))
-X_test = np.load(os.path.join(data_dir, 'X_test.npy'))
-y_test = np.load(os.path.join(data_dir, 'y_test.npy'))
+# 按特征流水线追加派生特征：模型的输入列为原始特征加派生特征
+((X_train, y_train), (X_val, y_val), (X_test, y_test)), model_columns = transform_splits(
+    models_dir, load_splits(data_dir))
+print(f"   派生特征: {len(model_columns) - len(feature_columns)} 个")
 print(f"   训练集: {len(X_train)} 行")
 print(f"   验证集: {len(X_val)} 行")
 print(f"   测试集: {len(X_test)} 行\n")
@@ -220,12 +224,13 @@ print("   预测误差分布已保存: error_distribution.json\n")
 print("12. 生成模型信息...")
 importance = model.feature_importance(importance_type='split')
 feature_importance_dict = {}
-for feature, imp in zip(feature_columns, importance):
+for feature, imp in zip(model_columns, importance):
     feature_importance_dict[feature] = int(imp)
 
 model_info = {
     "model": "LightGBM Regressor",
     "features": feature_columns,
+    "derived_features": model_columns[len(feature_columns):],
     "feature_importance": feature_importance_dict,
     "message": "Model information retrieved successfully"
 }
@@ -286,8 +291,11 @@ csv_info = []
 # 遍历所有 .csv 文件
 for csv_file in csv_folder.glob("*.csv"):
         size_bytes = csv_file.stat().st_size
-        # 只读第一列加速，避免加载整个大文件
-        row_count = len(pd.read_csv(csv_file, usecols=[0], dtype=str))
+        # 训练集行数取自列式缓存，其他文件只统计换行符，不解析 CSV
+        if csv_file.name == 'train.csv':
+            row_count = train_cache.rows
+        else:
+            row_count = count_rows(csv_file)
 
         csv_info.append({
             "name": csv_file.name,
@@ -336,6 +344,20 @@ with open(os.path.join(output_dir, 'training_curve.json'), 'w', encoding='utf-8'
     json.dump(training_curve_data, f, ensure_ascii=False, indent=2)
 print(f"   训练曲线数据已保存: training_curve.json (共 {len(training_curve_data['iterations'])} 个迭代点)\n")
 
+print("17. 生成特征边际分布...")
+# 各特征在训练集中的取值及出现次数，供 /simulate 按边际分布抽样
+feature_marginals = {}
+for feature in feature_columns:
+    counts = train_data[feature].value_counts().sort_index()
+    feature_marginals[feature] = {
+        "values": [int(value) for value in counts.index],
+        "counts": [int(count) for count in counts.values]
+    }
+
+with open(os.path.join(output_dir, 'feature_marginals.json'), 'w', encoding='utf-8') as f:
+    json.dump(feature_marginals, f, ensure_ascii=False, indent=2)
+print("   特征边际分布已保存: feature_marginals.json\n")
+
 print("=== 所有前端API数据生成完成 ===")
 print(f"数据保存位置: {output_dir}")
 print("\n生成的文件:")
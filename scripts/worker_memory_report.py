@@ -0,0 +1,82 @@
+import os
+import sys
+
+# 统计 gunicorn 主进程及各 worker 的内存占用（读取 Linux /proc）
+# 使用方法：python worker_memory_report.py [主进程PID]
+# RSS 包含与其他进程共享的页，PSS 按共享进程数均摊，
+# 所有进程的 PSS 之和才是实际占用的物理内存。
+
+
+def read_smaps_rollup(pid):
+    """读取进程的 RSS/PSS/共享/私有内存（KB）"""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup', 'r') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'shared': fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0),
+        'private': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+    }
+
+
+def is_gunicorn(pid):
+    """argv[0] 或 argv[1]（通过 python 启动时）为 gunicorn"""
+    with open(f'/proc/{pid}/cmdline', 'rb') as f:
+        argv = f.read().decode(errors='replace').split('\0')
+    return any('gunicorn' in os.path.basename(arg) for arg in argv[:2])
+
+
+def read_ppid(pid):
+    with open(f'/proc/{pid}/stat', 'r') as f:
+        return int(f.read().rsplit(')', 1)[1].split()[1])
+
+
+def list_pids():
+    return [int(name) for name in os.listdir('/proc') if name.isdigit()]
+
+
+def find_master():
+    """查找父进程不是 gunicorn 的 gunicorn 进程"""
+    gunicorn_pids = set()
+    for pid in list_pids():
+        try:
+            if is_gunicorn(pid):
+                gunicorn_pids.add(pid)
+        except OSError:
+            continue
+    masters = [pid for pid in gunicorn_pids if read_ppid(pid) not in gunicorn_pids]
+    return masters[0] if masters else None
+
+
+def find_workers(master_pid):
+    workers = []
+    for pid in list_pids():
+        try:
+            if read_ppid(pid) == master_pid:
+                workers.append(pid)
+        except OSError:
+            continue
+    return sorted(workers)
+
+
+if __name__ == "__main__":
+    master_pid = int(sys.argv[1]) if len(sys.argv) > 1 else find_master()
+    if master_pid is None:
+        print("未找到 gunicorn 主进程，请传入主进程 PID")
+        sys.exit(1)
+
+    print("=== worker 内存报告 ===\n")
+    print(f"{'进程':<10}{'PID':>8}{'RSS(MB)':>12}{'PSS(MB)':>12}{'共享(MB)':>12}{'私有(MB)':>12}")
+
+    total_pss = 0
+    for role, pid in [('master', master_pid)] + [('worker', pid) for pid in find_workers(master_pid)]:
+        mem = read_smaps_rollup(pid)
+        total_pss += mem['pss']
+        print(f"{role:<10}{pid:>8}{mem['rss'] / 1024:>12.1f}{mem['pss'] / 1024:>12.1f}"
+              f"{mem['shared'] / 1024:>12.1f}{mem['private'] / 1024:>12.1f}")
+
+    print(f"\n实际物理内存占用（PSS 合计）：{total_pss / 1024:.1f} MB")
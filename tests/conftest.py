@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 测试与脚本相同，直接导入 backend 下的模块
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
@@ -0,0 +1,128 @@
+import asyncio
+import time
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+import app as backend
+import asgi_app
+from admission import AdmissionController, CostEstimator, Deadline
+
+
+class FakeBundle:
+    """只提供 run_predict 用到的接口；解释器首次创建耗时 init_seconds"""
+
+    feature_columns = model_columns = ['a', 'b']
+    default_model = 'm'
+    version = 'v1'
+
+    def __init__(self, init_seconds=0.0, batcher=None):
+        self.init_seconds = init_seconds
+        self.batcher = batcher
+
+    def resolve(self, name):
+        return name or self.default_model
+
+    def predict(self, features_array, name=None):
+        return np.zeros(len(features_array))
+
+    def init_explainers(self, name=None):
+        time.sleep(self.init_seconds)
+        self.init_seconds = 0.0
+
+    def explain(self, features_array, name=None):
+        return np.zeros(features_array.shape)
+
+    def expected_value(self, name=None):
+        return 0.0
+
+
+class FakeBatcher:
+    def submit(self, row, key=()):
+        name, explain = key
+        future = Future()
+        future.set_result((0.0, np.zeros(len(row)) if explain else None))
+        return future
+
+
+@pytest.fixture
+def shap_cost(monkeypatch):
+    estimator = CostEstimator()
+    monkeypatch.setattr(backend, 'shap_cost', estimator)
+    monkeypatch.setattr(backend, 'prediction_cache', None)
+    return estimator
+
+
+def predict(budget_seconds=None):
+    deadline = Deadline(time.perf_counter(), budget_seconds)
+    response, status = backend.run_predict({"features": [1, 2]}, deadline=deadline)
+    assert status == 200
+    return response
+
+
+def test_estimate_recovers_after_slow_observation():
+    estimator = CostEstimator()
+    estimator.observe('m', 1.9)
+    skipped = 0
+    while not Deadline(time.perf_counter(), 0.05).allows(estimator.estimate('m')):
+        estimator.skipped('m')
+        skipped += 1
+    assert skipped <= 40
+    for _ in range(20):
+        estimator.observe('m', 0.001)
+    assert estimator.estimate('m') < 0.01
+
+
+def test_explainer_init_not_counted_in_shap_cost(monkeypatch, shap_cost):
+    monkeypatch.setattr(backend, 'bundle', FakeBundle(init_seconds=0.2))
+    assert 'shap_values' in predict()
+    assert shap_cost.estimate('m') < 0.1
+    assert 'shap_values' in predict(0.05)
+
+
+def test_skipped_shap_decays_estimate_until_it_runs_again(monkeypatch, shap_cost):
+    monkeypatch.setattr(backend, 'bundle', FakeBundle())
+    shap_cost.observe('m', 1.9)
+    responses = [predict(0.05) for _ in range(40)]
+    dropped = [response['explanation_dropped'] for response in responses]
+    assert dropped[0] and not dropped[-1]
+    assert shap_cost.estimate('m') < 0.05
+
+
+def test_micro_batch_path_observes_cost(monkeypatch, shap_cost):
+    monkeypatch.setattr(backend, 'bundle', FakeBundle(init_seconds=0.2, batcher=FakeBatcher()))
+    assert 'shap_values' in predict()
+    assert 0 < shap_cost.estimate('m') < 0.1
+    # 剩余时间不足时同样经过微批处理，只是不计算 SHAP
+    shap_cost.observe('m', 1.9)
+    assert predict(0.05)['explanation_dropped']
+
+
+def test_asgi_admission_slot_taken_after_body(monkeypatch):
+    admission = AdmissionController(max_in_flight=1)
+    monkeypatch.setattr(backend, 'admission', admission)
+    chunks = [{'type': 'http.request', 'body': b'{"a"', 'more_body': True},
+              {'type': 'http.request', 'body': b': 1}', 'more_body': False}]
+    received = []
+
+    async def receive():
+        # 上传过程中不占用名额
+        assert admission.in_flight == 0
+        return chunks.pop(0)
+
+    async def app(scope, receive, send):
+        assert admission.in_flight == 1
+        while True:
+            message = await receive()
+            received.append(message['body'])
+            if not message['more_body']:
+                break
+
+    async def send(message):
+        pass
+
+    scope = {'type': 'http', 'path': '/predict', 'method': 'POST', 'headers': []}
+    asyncio.run(asgi_app.AdmissionMiddleware(app)(scope, receive, send))
+    assert b''.join(received) == b'{"a": 1}'
+    assert admission.in_flight == 0
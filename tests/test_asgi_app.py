@@ -0,0 +1,45 @@
+import threading
+
+from starlette.testclient import TestClient
+
+import asgi_app
+
+
+def test_admin_reload_error_without_loaded_model(monkeypatch):
+    def fail():
+        raise FileNotFoundError("models/lightgbm_model.txt")
+
+    monkeypatch.setattr(asgi_app.backend, 'bundle', None)
+    monkeypatch.setattr(asgi_app.backend, 'admin_token', None)
+    monkeypatch.setattr(asgi_app.backend, 'reload_model', fail)
+    # 不进入 with 块，不触发启动时加载模型的 lifespan
+    response = TestClient(asgi_app.app).post('/admin/reload')
+    assert response.status_code == 500
+    assert response.json() == {"error": "models/lightgbm_model.txt", "model_version": None}
+
+
+def test_route_labels_match_flask_rules():
+    flask_rules = {rule.rule for rule in asgi_app.backend.app.url_map.iter_rules()}
+    client = TestClient(asgi_app.app)
+    before = asgi_app.backend.request_count.labels('/jobs/<job_id>', 'GET', '404').value
+    assert client.get('/jobs/does-not-exist').status_code == 404
+    assert asgi_app.backend.request_count.labels('/jobs/<job_id>', 'GET', '404').value == before + 1
+    assert '/jobs/<job_id>' in flask_rules
+
+    middleware = asgi_app.MetricsMiddleware(None, asgi_app.routes)
+    for _, label in middleware.routes:
+        assert label in flask_rules
+    assert middleware.route_label({'type': 'http', 'path': '/no/such/route', 'method': 'GET'}) == 'unmatched'
+    assert middleware.route_label({'type': 'http', 'path': '/predict', 'method': 'GET'}) == 'unmatched'
+
+
+def test_get_models_runs_off_the_event_loop(monkeypatch):
+    threads = []
+
+    def list_models():
+        threads.append(threading.current_thread().name)
+        return {"models": []}
+
+    monkeypatch.setattr(asgi_app.backend, 'list_models', list_models)
+    assert TestClient(asgi_app.app).get('/models').json() == {"models": []}
+    assert threads[0].startswith('model')
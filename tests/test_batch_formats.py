@@ -0,0 +1,93 @@
+import io
+
+import numpy as np
+import pytest
+
+from batch_formats import (ARROW_MIMETYPE, FLOAT32_MIMETYPE, JSON_MIMETYPE, NPY_MIMETYPE, BatchFormatError,
+                           parse_batch, parse_row)
+
+FEATURES = ['a', 'b', 'c']
+
+
+def npy_body(array):
+    buffer = io.BytesIO()
+    np.save(buffer, array, allow_pickle=True)
+    return buffer.getvalue()
+
+
+def arrow_body(columns):
+    pa = pytest.importorskip('pyarrow')
+    table = pa.table(columns)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def assert_rejected(mimetype, body, status_code=400):
+    with pytest.raises(BatchFormatError) as excinfo:
+        parse_batch(mimetype, body, FEATURES)
+    assert excinfo.value.status_code == status_code
+
+
+def test_valid_formats():
+    X = np.arange(6, dtype=np.float64).reshape(2, 3)
+    for mimetype, body in [(NPY_MIMETYPE, npy_body(X)),
+                           (FLOAT32_MIMETYPE, X.astype('<f4').tobytes()),
+                           (JSON_MIMETYPE, b'{"batch_features": [[0, 1, 2], [3, 4, 5]]}'),
+                           (ARROW_MIMETYPE, arrow_body({name: X[:, j] for j, name in enumerate(FEATURES)}))]:
+        features_array, response_format = parse_batch(mimetype, body, FEATURES)
+        assert response_format == mimetype
+        assert np.array_equal(features_array, X)
+
+
+@pytest.mark.parametrize('body', [b'', b'not an npy file', npy_body(np.ones((2, 3)))[:-5]])
+def test_malformed_npy(body):
+    assert_rejected(NPY_MIMETYPE, body)
+
+
+def test_npz_archive_rejected():
+    buffer = io.BytesIO()
+    np.savez(buffer, x=np.ones((2, 3)))
+    assert_rejected(NPY_MIMETYPE, buffer.getvalue())
+
+
+@pytest.mark.parametrize('array', [np.array([[1, 2, 3]], dtype=object),
+                                   np.array([['1', '2', '3']]),
+                                   np.ones((1, 3), dtype=bool),
+                                   np.ones((1, 3), dtype=complex)])
+def test_non_numeric_npy(array):
+    assert_rejected(NPY_MIMETYPE, npy_body(array))
+
+
+@pytest.mark.parametrize('mimetype,body', [
+    (FLOAT32_MIMETYPE, b''),
+    (NPY_MIMETYPE, npy_body(np.empty((0, 3)))),
+    (JSON_MIMETYPE, b'{"batch_features": []}'),
+    (JSON_MIMETYPE, b'{"a": [], "b": [], "c": []}'),
+])
+def test_empty_batch(mimetype, body):
+    assert_rejected(mimetype, body)
+
+
+@pytest.mark.parametrize('body', [b'{"batch_features": 5}', b'{"batch_features": "abc"}',
+                                  b'{"batch_features": {"0": [0, 1, 2]}}', b'{"batch_features": null}'])
+def test_batch_features_not_a_list(body):
+    assert_rejected(JSON_MIMETYPE, body)
+
+
+def test_empty_arrow_batch():
+    assert_rejected(ARROW_MIMETYPE, arrow_body({name: np.empty(0) for name in FEATURES}))
+
+
+def test_malformed_arrow():
+    pytest.importorskip('pyarrow')
+    assert_rejected(ARROW_MIMETYPE, b'not an arrow stream')
+    assert_rejected(ARROW_MIMETYPE, arrow_body({'a': [1.0], 'b': [2.0], 'c': ['x']}))
+
+
+def test_parse_row():
+    assert parse_row([1, 2, 3], 3).tolist() == [[1.0, 2.0, 3.0]]
+    for features in (5, "abc", {"a": 1}, [1, 2], [1, 2, "x"], [[1], [2], [3]]):
+        with pytest.raises(BatchFormatError):
+            parse_row(features, 3)
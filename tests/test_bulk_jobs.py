@@ -0,0 +1,95 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pytest
+
+from bulk_jobs import BulkJobManager, _process_token
+
+
+class FakeBundle:
+    feature_columns = ['a', 'b']
+    version = 'v1'
+
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    def resolve(self, name):
+        return name or 'm'
+
+    def predict(self, features_array, name=None):
+        if self.fail:
+            raise RuntimeError("model crashed")
+        return features_array.sum(axis=1)
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return BulkJobManager(str(tmp_path / 'jobs'), str(tmp_path), lambda: FakeBundle(), ttl=3600)
+
+
+def write_job(manager, status, **fields):
+    job_id, _ = manager.new_job()
+    manager._write_status(job_id, {"job_id": job_id, "status": status, "finished_at": None, **fields})
+    return job_id
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def wait_finished(manager, job_id, timeout=10):
+    deadline = time.time() + timeout
+    while manager.status(job_id)['status'] in ('queued', 'running') and time.time() < deadline:
+        time.sleep(0.01)
+    return manager.status(job_id)
+
+
+def test_job_failed_when_prediction_raises(tmp_path):
+    manager = BulkJobManager(str(tmp_path / 'jobs'), str(tmp_path), lambda: FakeBundle(fail=True))
+    (tmp_path / 'input.csv').write_text("a,b\n1,2\n3,4\n")
+    status = wait_finished(manager, manager.submit_path('input.csv', output_format='csv')['job_id'])
+    assert status['status'] == 'failed' and status['error'] == "model crashed"
+
+
+def test_job_done(manager, tmp_path):
+    (tmp_path / 'input.csv').write_text("id,a,b\n7,1,2\n8,3,4\n")
+    job_id = manager.submit_path('input.csv', output_format='csv')['job_id']
+    assert wait_finished(manager, job_id)['status'] == 'done'
+    path, _, _ = manager.result(job_id)
+    assert np.array_equal(np.loadtxt(path, delimiter=',', skiprows=1), [[7, 3], [8, 7]])
+
+
+def test_orphaned_jobs_marked_failed(manager):
+    host = socket.gethostname()
+    dead = write_job(manager, 'running', worker={"host": host, "pid": dead_pid(), "token": "x"})
+    restarted = write_job(manager, 'queued', worker={"host": host, "pid": os.getpid(), "token": "previous"})
+    alive = write_job(manager, 'running', worker={"host": host, "pid": os.getpid(), "token": _process_token()})
+    other_host = write_job(manager, 'running', worker={"host": host + '-other', "pid": dead_pid(), "token": "x"})
+
+    manager.cleanup()
+    assert manager.status(dead)['status'] == 'failed'
+    assert manager.status(restarted)['status'] == 'failed'
+    assert manager.status(alive)['status'] == 'running'
+    assert manager.status(other_host)['status'] == 'running'
+
+
+def test_expired_jobs_removed(manager):
+    now = time.time()
+    expired = write_job(manager, 'done', finished_at=now - 7200)
+    recent = write_job(manager, 'failed', finished_at=now - 60)
+    abandoned, _ = manager.new_job()
+    os.utime(manager._job_dir(abandoned), (now - 7200, now - 7200))
+    uploading, _ = manager.new_job()
+
+    manager.cleanup()
+    remaining = set(os.listdir(manager.jobs_dir))
+    assert remaining == {recent, uploading}
+    assert json.load(open(os.path.join(manager.jobs_dir, recent, 'status.json')))['status'] == 'failed'
+    assert expired not in remaining
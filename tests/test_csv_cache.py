@@ -0,0 +1,34 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from csv_cache import CsvCache
+
+
+def write_csv(tmp_path, text):
+    path = tmp_path / 'train.csv'
+    path.write_text(text)
+    return str(path)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_int_column_widens_to_float_in_later_rows(tmp_path, workers):
+    csv_path = write_csv(tmp_path, 'id,a,b\n0,1,5\n1,2,6\n2,3,7\n3,4.5,8\n4,,9\n')
+    cache = CsvCache(csv_path, str(tmp_path / 'cache'), chunk_rows=2, workers=workers)
+    arrays = cache.load()
+    expected = pd.read_csv(csv_path)
+    assert arrays['a'].dtype == np.float64
+    assert np.array_equal(arrays['a'], expected['a'].to_numpy(), equal_nan=True)
+    assert arrays['b'].dtype == np.uint8 and arrays['b'].tolist() == [5, 6, 7, 8, 9]
+    assert cache.rows == 5
+
+
+def test_failed_build_removes_temporary_directory(tmp_path):
+    csv_path = write_csv(tmp_path, 'id,name\n0,x\n1,y\n')
+    cache_dir = tmp_path / 'cache'
+    cache = CsvCache(csv_path, str(cache_dir), chunk_rows=1)
+    with pytest.raises(ValueError):
+        cache.load()
+    assert os.listdir(cache_dir) == []
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from data_splits import load_splits, save_splits
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    X = np.arange(20, dtype=np.uint8).reshape(10, 2)
+    y = np.arange(10, dtype=np.float32)
+    save_splits(str(tmp_path), X, y, {'train': [9, 0, 1, 2, 3], 'val': [4, 5], 'test': [6, 7, 8]})
+    return str(tmp_path)
+
+
+def test_load_splits_returns_views_in_order(data_dir):
+    (X_train, y_train), (X_val, y_val), (X_test, y_test) = load_splits(data_dir)
+    assert y_train.tolist() == [9, 0, 1, 2, 3]
+    assert y_val.tolist() == [4, 5]
+    assert X_test.tolist() == [[12, 13], [14, 15], [16, 17]]
+    assert isinstance(X_train.base, np.memmap) or isinstance(X_train, np.memmap)
+
+
+def test_load_splits_subset(data_dir):
+    [(X_val, y_val), (X_test, y_test)] = load_splits(data_dir, 'val', 'test')
+    assert X_val.tolist() == [[8, 9], [10, 11]] and y_test.tolist() == [6, 7, 8]
+    [(X_train, _)] = load_splits(data_dir, 'train')
+    assert X_train[0].tolist() == [18, 19]
+
+
+def test_load_splits_unknown_name(data_dir):
+    with pytest.raises(ValueError):
+        load_splits(data_dir, 'holdout')
@@ -0,0 +1,35 @@
+import lightgbm as lgb
+import numpy as np
+import pytest
+
+from explanations import NativeContribExplainer, ShapTreeExplainer
+
+
+@pytest.fixture(scope='module')
+def model_and_samples():
+    """训练一个小的 LightGBM 回归模型，返回 (Booster, 测试输入)"""
+    rng = np.random.default_rng(0)
+    X = rng.integers(0, 17, size=(2000, 6)).astype(np.float64)
+    y = X[:, 0] * 0.3 + np.sin(X[:, 1]) + X[:, 2] * X[:, 3] * 0.05 + rng.normal(scale=0.1, size=2000)
+    params = {'objective': 'regression', 'num_leaves': 15, 'min_data_in_leaf': 5, 'verbose': -1}
+    booster = lgb.train(params, lgb.Dataset(X, y), num_boost_round=30)
+    return booster, X[:200]
+
+
+def test_native_contributions_sum_to_prediction(model_and_samples):
+    booster, X = model_and_samples
+    explainer = NativeContribExplainer(booster)
+    shap_values = explainer.shap_values(X)
+    assert shap_values.shape == X.shape
+    assert np.allclose(shap_values.sum(axis=1) + explainer.expected_value, booster.predict(X), rtol=1e-6, atol=1e-9)
+
+
+def test_native_matches_shap_tree_explainer(model_and_samples):
+    pytest.importorskip('shap')
+    booster, X = model_and_samples
+    native, reference = NativeContribExplainer(booster), ShapTreeExplainer(booster)
+    assert np.isclose(native.expected_value, reference.expected_value, rtol=1e-6, atol=1e-9)
+    reference_values = reference.shap_values(X)
+    assert np.allclose(native.shap_values(X), reference_values, rtol=1e-6, atol=1e-9)
+    assert np.allclose(reference_values.sum(axis=1) + reference.expected_value, booster.predict(X),
+                       rtol=1e-6, atol=1e-9)
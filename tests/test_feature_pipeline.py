@@ -0,0 +1,42 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from feature_pipeline import FeaturePipeline, pipeline_path, transform_splits
+
+
+@pytest.fixture
+def models_dir(tmp_path):
+    with open(os.path.join(str(tmp_path), 'feature_columns.pkl'), 'wb') as f:
+        pickle.dump(['a', 'b', 'c'], f)
+    return str(tmp_path)
+
+
+def splits():
+    X = np.arange(12, dtype=np.uint8).reshape(4, 3)
+    y = np.arange(4, dtype=np.float32)
+    return [(X[:3], y[:3]), (X[3:], y[3:])]
+
+
+def test_transform_splits_without_pipeline_is_identity(models_dir):
+    original = splits()
+    transformed, columns = transform_splits(models_dir, original)
+    assert columns == ['a', 'b', 'c']
+    for (X, y), (X_expected, y_expected) in zip(transformed, original):
+        assert X is X_expected and y is y_expected
+
+
+def test_transform_splits_appends_derived_features(models_dir):
+    FeaturePipeline(['a', 'b', 'c'], ['sum', 'max']).save(pipeline_path(models_dir))
+    [(X_train, y_train), (X_test, y_test)], columns = transform_splits(models_dir, splits())
+    assert columns == ['a', 'b', 'c', 'row_sum', 'row_max']
+    assert X_train.shape == (3, 5) and X_test.tolist() == [[9, 10, 11, 30, 11]]
+    assert y_test.tolist() == [3]
+
+
+def test_transform_splits_rejects_mismatched_pipeline(models_dir):
+    FeaturePipeline(['a', 'b'], ['sum']).save(pipeline_path(models_dir))
+    with pytest.raises(ValueError):
+        transform_splits(models_dir, splits())
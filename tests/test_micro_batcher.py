@@ -0,0 +1,32 @@
+import threading
+
+import numpy as np
+
+from micro_batcher import MicroBatcher
+
+
+def test_requests_grouped_by_key():
+    calls = []
+    ready = threading.Event()
+
+    def batch_fn(rows, scale):
+        ready.wait(5)
+        calls.append((scale, len(rows)))
+        return rows.sum(axis=1) * scale, [scale] * len(rows)
+
+    batcher = MicroBatcher(batch_fn, window_ms=50, max_batch_size=64)
+    rows = np.arange(8, dtype=np.float64).reshape(4, 2)
+    futures = [batcher.submit(row, (1 if i % 2 else 10,)) for i, row in enumerate(rows)]
+    ready.set()
+    results = [future.result(timeout=5) for future in futures]
+    batcher.close()
+
+    assert sorted(calls) == [(1, 2), (10, 2)]
+    assert results == [(10.0, 10), (5.0, 1), (90.0, 10), (13.0, 1)]
+    assert batcher.batch_count == 2 and batcher.request_count == 4
+
+
+def test_closed_batcher_computes_in_caller_thread():
+    batcher = MicroBatcher(lambda rows, scale: (rows.sum(axis=1) * scale,), window_ms=1)
+    batcher.close()
+    assert batcher.submit(np.array([1.0, 2.0]), (2,)).result() == (6.0,)
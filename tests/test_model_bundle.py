@@ -0,0 +1,56 @@
+import lightgbm as lgb
+import numpy as np
+import pytest
+
+import model_bundle
+from model_bundle import ServedModel
+from tree_engine import export_binary_model
+
+
+@pytest.fixture
+def model_path(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.integers(0, 17, size=(500, 4)).astype(np.float64)
+    booster = lgb.train({'objective': 'regression', 'verbose': -1}, lgb.Dataset(X, X.sum(axis=1)), num_boost_round=5)
+    path = str(tmp_path / 'lightgbm_model.txt')
+    booster.save_model(path)
+    export_binary_model(path)
+    return path
+
+
+def test_mmap_engine_defers_booster_until_explainer(model_path, monkeypatch):
+    parsed = []
+    load_booster = model_bundle.load_booster
+    monkeypatch.setattr(model_bundle, 'load_booster', lambda path: parsed.append(path) or load_booster(path))
+
+    served = ServedModel.load('lightgbm', 'lightgbm', model_path, engine='mmap', lazy_explainer=False)
+    assert served.lazy_explainer and served.explainer_seconds is None
+    assert served.predictor.predict(np.zeros((1, 4))).shape == (1,)
+    assert parsed == []
+
+    assert served.explainer.shap_values(np.zeros((1, 4))).shape == (1, 4)
+    assert parsed == [model_path] and served.explainer_seconds is not None
+
+
+def test_lightgbm_engine_creates_explainer_eagerly(model_path):
+    served = ServedModel.load('lightgbm', 'lightgbm', model_path, engine='lightgbm', lazy_explainer=False)
+    assert not served.lazy_explainer and served.explainer_seconds is not None
+
+
+def test_micro_batched_predictions_match_direct_calls(model_path, tmp_path):
+    import pickle
+    feature_columns_path = str(tmp_path / 'feature_columns.pkl')
+    with open(feature_columns_path, 'wb') as f:
+        pickle.dump(['a', 'b', 'c', 'd'], f)
+    bundle = model_bundle.ModelBundle.load({'lightgbm': ('lightgbm', model_path)}, feature_columns_path,
+                                           micro_batch_window_ms=5)
+    rows = np.arange(12, dtype=np.float64).reshape(3, 4)
+    try:
+        futures = [bundle.batcher.submit(row, ('lightgbm', i != 1)) for i, row in enumerate(rows)]
+        results = [future.result() for future in futures]
+    finally:
+        bundle.close()
+    predictions, shap_values = bundle.predict(rows), bundle.explain(rows)
+    for i, (prediction, shap_row) in enumerate(results):
+        assert prediction == predictions[i]
+        assert shap_row is None if i == 1 else np.array_equal(shap_row, shap_values[i])
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+import app as backend
+import asgi_app
+from admission import CostEstimator
+
+COLUMNS = ['a', 'b', 'c']
+
+
+class FakeBundle:
+    feature_columns = model_columns = COLUMNS
+    default_model = 'm'
+    version = 'v1'
+    batcher = None
+
+    def resolve(self, name):
+        return name or self.default_model
+
+    def predict(self, features_array, name=None):
+        return features_array.sum(axis=1)
+
+    def init_explainers(self, name=None):
+        pass
+
+    def explain(self, features_array, name=None):
+        return features_array.copy()
+
+    def expected_value(self, name=None):
+        return 0.0
+
+
+@pytest.fixture(autouse=True)
+def fake_bundle(monkeypatch):
+    monkeypatch.setattr(backend, 'bundle', FakeBundle())
+    monkeypatch.setattr(backend, 'shap_cost', CostEstimator())
+    monkeypatch.setattr(backend, 'prediction_cache', None)
+
+
+@pytest.mark.parametrize('data', [
+    {"features": 5},
+    {"features": "1,2,3"},
+    {"features": {"a": 1, "b": 2, "c": 3}},
+    {"features": [1, 2]},
+    {"features": [1, 2, "x"]},
+    {"features": [1, 2, 3], "explain": "false"},
+    {"features": [1, 2, 3], "explain": "no"},
+    {"features": [1, 2, 3], "explain": 0},
+    [1, 2, 3],
+    None,
+])
+def test_invalid_predict_request_returns_400(data):
+    response, status = backend.run_predict(data)
+    assert status == 400 and 'error' in response
+
+
+@pytest.mark.parametrize('explain', [True, False])
+def test_explain_flag(explain):
+    response, status = backend.run_predict({"features": [1, 2, 3], "explain": explain})
+    assert status == 200 and response['prediction'] == 6.0
+    assert ('shap_values' in response) == explain
+
+
+def test_invalid_json_body_returns_400():
+    from starlette.testclient import TestClient
+    response = backend.app.test_client().post('/predict', data='{"features": [1,', content_type='application/json')
+    assert response.status_code == 400
+    response = TestClient(asgi_app.app).post('/predict', content='{"features": [1,',
+                                             headers={'Content-Type': 'application/json'})
+    assert response.status_code == 400
@@ -0,0 +1,25 @@
+from prediction_cache import PredictionCache
+
+
+def test_reset_on_model_change_clears_entries_and_counters():
+    cache = PredictionCache(max_size=1)
+    cache.reset('v1')
+    cache.put((1.0,), 0.5, model_version='v1')
+    cache.put((2.0,), 0.6, model_version='v1')
+    assert cache.get((2.0,), explain=False) == (0.6, None)
+    assert cache.get((1.0,), explain=False) is None
+
+    cache.reset('v1')
+    assert cache.stats()['hits'] == 1
+
+    cache.reset('v2')
+    stats = cache.stats()
+    assert (stats['size'], stats['hits'], stats['misses'], stats['evictions']) == (0, 0, 0, 0)
+    assert stats['model_version'] == 'v2'
+
+
+def test_put_from_old_model_version_is_dropped():
+    cache = PredictionCache()
+    cache.reset('v2')
+    cache.put((1.0,), 0.5, model_version='v1')
+    assert cache.get((1.0,), explain=False) is None
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+import app as backend
+from simulation import FeatureMarginals, simulate
+
+COLUMNS = [f'f{i}' for i in range(20)]
+MARGINALS = {name: {"values": list(range(17)), "counts": [i + 1 for i in range(17)]} for name in COLUMNS}
+
+
+def test_simulate_many_perturbed_features():
+    names = COLUMNS[:18]
+    marginals = FeatureMarginals({name: MARGINALS[name] for name in names})
+    base = np.full(len(COLUMNS), 5.0)
+
+    predictions, scored_rows = simulate(lambda rows: rows.sum(axis=1), base, COLUMNS, marginals, names,
+                                        1000, np.random.default_rng(0))
+    assert scored_rows == 1000
+
+    # 组合数（17^18）远大于样本数时逐个样本预测，结果与按相同随机数抽样后直接计算一致
+    rng = np.random.default_rng(0)
+    expected = 2 * 5.0 + sum(marginals.values[name][marginals.sample_indices(name, rng, 1000)] for name in names)
+    assert np.array_equal(predictions, expected)
+
+
+def test_simulate_small_grid_uses_table():
+    names = COLUMNS[:2]
+    marginals = FeatureMarginals({name: MARGINALS[name] for name in names})
+    predictions, scored_rows = simulate(lambda rows: rows.sum(axis=1), np.zeros(len(COLUMNS)), COLUMNS, marginals,
+                                        names, 1000, np.random.default_rng(0))
+    assert scored_rows == 17 * 17
+    assert predictions.min() >= 0 and predictions.max() <= 32
+
+
+class FakeBundle:
+    feature_columns = COLUMNS
+
+    def resolve(self, name):
+        return name or 'm'
+
+    def predict(self, features_array, name=None):
+        return features_array.mean(axis=1) / 16
+
+
+class FakeArtifacts:
+    def load(self, name):
+        return MARGINALS
+
+
+@pytest.fixture
+def fake_backend(monkeypatch):
+    monkeypatch.setattr(backend, 'bundle', FakeBundle())
+    monkeypatch.setattr(backend, 'artifact_store', FakeArtifacts())
+
+
+def test_run_simulate_many_perturbed_features(fake_backend):
+    response, status = backend.run_simulate({"features": [5] * 20, "perturb": COLUMNS[:18], "samples": 5000})
+    assert status == 200
+    assert response["scored_rows"] == 5000
+
+
+@pytest.mark.parametrize('data', [
+    None,
+    [],
+    {"features": 5, "perturb": ["f0"]},
+    {"features": ["x"] * 20, "perturb": ["f0"]},
+    {"features": [float('nan')] * 20, "perturb": ["f0"]},
+    {"features": [5] * 20, "perturb": ["f0", "f0"]},
+    {"features": [5] * 20, "perturb": ["unknown"]},
+    {"features": [5] * 20, "perturb": ["f0"], "samples": 0},
+])
+def test_run_simulate_invalid_requests(fake_backend, data):
+    _, status = backend.run_simulate(data)
+    assert status == 400
+
+
+def test_simulate_endpoint_invalid_json(fake_backend):
+    response = backend.app.test_client().post('/simulate', data=b'{not json', content_type='application/json')
+    assert response.status_code == 400
@@ -0,0 +1,42 @@
+import gzip
+import json
+
+import pytest
+from flask import Flask, request
+
+from static_artifacts import ArtifactStore
+
+DATA = {"b": [1, 2, 3], "a": "洪水"}
+
+
+@pytest.fixture
+def store(tmp_path):
+    (tmp_path / 'stats.json').write_text(json.dumps(DATA), encoding='utf-8')
+    return ArtifactStore(str(tmp_path))
+
+
+def respond(store, headers):
+    app = Flask(__name__)
+    with app.test_request_context('/stats', headers=headers):
+        return store.respond('stats.json', request)
+
+
+def test_brotli_response(store):
+    brotli = pytest.importorskip('brotli')
+    response = respond(store, {'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert json.loads(brotli.decompress(response.get_data())) == DATA
+
+
+def test_gzip_and_identity_responses(store):
+    response = respond(store, {'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(response.get_data())) == DATA
+    response = respond(store, {})
+    assert 'Content-Encoding' not in response.headers and response.get_json() == DATA
+
+
+def test_if_none_match(store):
+    etag = respond(store, {'Accept-Encoding': 'gzip'}).headers['ETag']
+    response = respond(store, {'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert response.status_code == 304
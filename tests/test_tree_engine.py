@@ -0,0 +1,52 @@
+import lightgbm as lgb
+import numpy as np
+import pytest
+
+from tree_engine import NumpyTreeEngine
+
+
+def train_model(tmp_path, num_leaves=31, with_nan=False, zero_as_missing=False):
+    """训练一个小模型并保存为文本文件，返回 (Booster, 模型路径, 测试输入)"""
+    rng = np.random.default_rng(0)
+    X = rng.integers(0, 17, size=(3000, 6)).astype(np.float64)
+    X[:, 5] = rng.normal(size=3000)
+    y = X[:, 0] * 0.3 + np.sin(X[:, 1]) + X[:, 5] + rng.normal(scale=0.1, size=3000)
+    if with_nan:
+        X[rng.random(X.shape) < 0.1] = np.nan
+    params = {'objective': 'regression', 'num_leaves': num_leaves, 'min_data_in_leaf': 5,
+              'zero_as_missing': zero_as_missing, 'verbose': -1}
+    booster = lgb.train(params, lgb.Dataset(X, y), num_boost_round=40)
+    model_path = str(tmp_path / 'model.txt')
+    booster.save_model(model_path)
+    X_test = np.concatenate([X[:500], np.zeros((3, 6)), np.full((2, 6), np.nan)])
+    return booster, model_path, X_test
+
+
+@pytest.mark.parametrize('num_leaves,with_nan,zero_as_missing', [
+    (31, False, False),
+    (31, True, False),
+    (31, True, True),
+    (200, True, False),
+])
+def test_predictions_identical_to_booster(tmp_path, num_leaves, with_nan, zero_as_missing):
+    booster, model_path, X = train_model(tmp_path, num_leaves, with_nan, zero_as_missing)
+    engine = NumpyTreeEngine.from_model_file(model_path)
+    assert engine._use_leaf_masks
+    expected = booster.predict(X)
+    assert np.array_equal(engine.predict(X), expected)
+    assert np.array_equal(np.array([engine.predict(X[i:i + 1])[0] for i in range(len(X))]), expected)
+
+
+def test_binary_engine_identical(tmp_path):
+    booster, model_path, X = train_model(tmp_path, with_nan=True)
+    binary_path = NumpyTreeEngine.from_model_file(model_path).save_binary(str(tmp_path / 'model.bin'))
+    assert np.array_equal(NumpyTreeEngine.from_binary_file(binary_path).predict(X), booster.predict(X))
+
+
+def test_level_wise_fallback_identical(tmp_path, monkeypatch):
+    booster, model_path, X = train_model(tmp_path, with_nan=True, zero_as_missing=True)
+    monkeypatch.setattr(NumpyTreeEngine, 'max_leaf_mask_bytes', 0)
+    engine = NumpyTreeEngine.from_model_file(model_path)
+    assert not engine._use_leaf_masks
+    assert np.array_equal(engine.predict(X), booster.predict(X))
+    assert engine.predict(X[:1])[0] == booster.predict(X[:1])[0]